@@ -0,0 +1,159 @@
+import queue
+import threading
+import time
+from collections import deque
+import numpy as np
+
+class PygameAudioBackend:
+    def __init__(self, sound_path='alarm.wav'):
+        import pygame
+        pygame.mixer.init()
+        self.sound = pygame.mixer.Sound(sound_path)
+
+    def play(self, level):
+        """Play the alarm once, louder at higher escalation levels"""
+        self.sound.set_volume(min(1.0, 0.5 + 0.25 * level))
+        self.sound.play()
+
+    def stop(self):
+        """Cut off the sound if it is still playing"""
+        self.sound.stop()
+
+class NullAudioBackend:
+    def __init__(self, history=1000):
+        # Record what would have been played, for headless runs and tests
+        self.plays = deque(maxlen=history)
+
+    def play(self, level):
+        self.plays.append((time.perf_counter(), level))
+
+    def stop(self):
+        pass
+
+class FileAudioBackend:
+    def __init__(self, path):
+        # Log alarm sounds as "<unix time> play <level>" lines instead of playing them
+        self.path = path
+
+    def play(self, level):
+        with open(self.path, 'a') as f:
+            f.write(f"{time.time():.3f} play {level}\n")
+
+    def stop(self):
+        with open(self.path, 'a') as f:
+            f.write(f"{time.time():.3f} stop\n")
+
+class AlarmService:
+    def __init__(self, backend, repeat_interval=1.0, release_delay=0.5, min_on_time=0.0,
+                 escalate_after=10.0, max_level=2):
+        self.backend = backend
+
+        # Seconds between repeats at level 0; each escalation level repeats faster
+        self.repeat_interval = repeat_interval
+        # Hysteresis: a stop only takes effect once it has held for release_delay seconds,
+        # and never before the alarm has sounded for min_on_time seconds
+        self.release_delay = release_delay
+        self.min_on_time = min_on_time
+        # Escalate automatically after this many seconds of continuous alarm (None = never)
+        self.escalate_after = escalate_after
+        self.max_level = max_level
+
+        # Requested state, set by the caller; the worker thread owns everything else
+        self.requested = False
+        self.commands = queue.Queue()
+        self.sounding = False
+        self.level = 0
+
+        # Detection-to-first-sound latencies in seconds
+        self.latencies = deque(maxlen=100)
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def start(self, requested_at=None):
+        """Request the alarm; never blocks and ignores repeated requests"""
+        if not self.requested:
+            self.requested = True
+            self.commands.put(('start', requested_at or time.perf_counter()))
+
+    def stop(self):
+        """Request the alarm to stop (subject to hysteresis); never blocks"""
+        if self.requested:
+            self.requested = False
+            self.commands.put(('stop', time.perf_counter()))
+
+    def escalate(self):
+        """Raise the alarm level while it is sounding"""
+        self.commands.put(('escalate', time.perf_counter()))
+
+    def shutdown(self):
+        """Silence the alarm and end the worker thread"""
+        self.requested = False
+        self.commands.put(('shutdown', time.perf_counter()))
+        self.thread.join(timeout=1)
+
+    def interval(self):
+        """Seconds between repeats at the current level"""
+        return self.repeat_interval / (1 + self.level)
+
+    def run(self):
+        """Worker loop: sleeps on the command queue until the next command or repeat is due"""
+        next_play = None
+        release_at = None
+        started_at = None
+        pending_request = None
+
+        while True:
+            deadlines = [t for t in (next_play if self.sounding else None, release_at) if t is not None]
+            timeout = max(0.0, min(deadlines) - time.perf_counter()) if deadlines else None
+            try:
+                command, at = self.commands.get(timeout=timeout)
+            except queue.Empty:
+                command, at = None, None
+            now = time.perf_counter()
+
+            if command == 'shutdown':
+                if self.sounding:
+                    self.backend.stop()
+                self.sounding = False
+                break
+            elif command == 'start':
+                release_at = None
+                if not self.sounding:
+                    self.sounding = True
+                    self.level = 0
+                    started_at = now
+                    next_play = now
+                    pending_request = at
+            elif command == 'stop':
+                if self.sounding:
+                    release_at = max(now + self.release_delay, started_at + self.min_on_time)
+            elif command == 'escalate':
+                if self.sounding:
+                    self.level = min(self.max_level, self.level + 1)
+
+            if release_at is not None and now >= release_at:
+                release_at = None
+                self.sounding = False
+                self.backend.stop()
+
+            if self.sounding and now >= next_play:
+                if self.escalate_after and self.level < self.max_level \
+                        and now - started_at >= self.escalate_after * (self.level + 1):
+                    self.level += 1
+                self.backend.play(self.level)
+                if pending_request is not None:
+                    self.latencies.append(time.perf_counter() - pending_request)
+                    pending_request = None
+                next_play = now + self.interval()
+
+    def stats(self):
+        """Alarm state and detection-to-sound latency in milliseconds"""
+        latencies = np.array(self.latencies) * 1000.0
+        return {
+            'requested': self.requested,
+            'sounding': self.sounding,
+            'level': self.level,
+            'latency_mean_ms': float(latencies.mean()) if len(latencies) else 0.0,
+            'latency_max_ms': float(latencies.max()) if len(latencies) else 0.0,
+        }
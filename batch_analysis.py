@@ -0,0 +1,198 @@
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import cv2
+from drowsiness_detector import DrowsinessDetector
+from landmark_backends import add_backend_arguments, create_backend, EYES_AND_MOUTH
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+OUTPUT_FORMATS = ('csv', 'jsonl', 'parquet')
+
+# One detector per worker process, loaded once by init_worker
+_detector = None
+
+def iter_frames(source, fps=30.0):
+    """Yield (frame_index, timestamp_ms, frame) from a video file or a directory of images
+    (frame is None for images that can't be read)"""
+    if os.path.isdir(source):
+        names = sorted(name for name in os.listdir(source) if name.lower().endswith(IMAGE_EXTENSIONS))
+        for index, name in enumerate(names):
+            yield index, index * 1000.0 / fps, cv2.imread(os.path.join(source, name))
+        return
+
+    cap = cv2.VideoCapture(source)
+    video_fps = cap.get(cv2.CAP_PROP_FPS) or fps
+    index = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield index, index * 1000.0 / video_fps, frame
+        index += 1
+    cap.release()
+
+def analyze_frames(detector, frames):
+    """Run the detection pipeline over frames, returning per-face metrics and drowsiness events
+
+    Every monitored face is scored with its own state, as in the live detector, so a passenger
+    never counts as the driver: there is one record per face and frame (a single record with
+    track_id None when no face is visible), and events carry the track_id they belong to.
+    Unreadable frames are recorded as gaps with readable False and produce no sample.
+    """
+    records = []
+    events = []
+    open_events = {}  # (track_id, kind) -> event
+    last_frame, last_ms, interval_ms = None, None, 0.0
+
+    for index, timestamp_ms, frame in frames:
+        if last_ms is not None:
+            interval_ms = timestamp_ms - last_ms
+        last_frame, last_ms = index, timestamp_ms
+        frame_record = {'frame': index, 'timestamp_ms': round(timestamp_ms, 3), 'readable': frame is not None}
+
+        results = []
+        if frame is not None:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            results = detector.analyze_faces(gray, drive_alarm=False, timestamp=timestamp_ms / 1000.0)
+        for result in results:
+            status = result['status']
+            records.append(dict(frame_record, track_id=result['track_id'], faces=len(results),
+                                ear=round(float(result['ear']), 5), mar=round(float(result['mar']), 5),
+                                eye_status=status['eye_status'], yawn_detected=status['yawn_detected'],
+                                blink_detected=status['blink_detected'],
+                                drowsiness_level=status['drowsiness_level']))
+        if not results:
+            records.append(dict(frame_record, track_id=None, faces=0 if frame is not None else None,
+                                ear=None, mar=None, eye_status=None, yawn_detected=False,
+                                blink_detected=False, drowsiness_level=0))
+
+        # Turn each face's runs of drowsy / yawning frames into events covering [start, end), where
+        # end is the first frame after the run; a face that is lost or a gap ends its runs
+        active = set()
+        for result in results:
+            status = result['status']
+            if status['drowsiness_level'] > 0:
+                active.add((result['track_id'], 'drowsy'))
+            if status['yawn_detected']:
+                active.add((result['track_id'], 'yawn'))
+        for key in active - set(open_events):
+            open_events[key] = {'event': key[1], 'track_id': key[0], 'start_frame': index,
+                                'start_ms': frame_record['timestamp_ms']}
+        for key in set(open_events) - active:
+            event = open_events.pop(key)
+            event.update({'end_frame': index, 'end_ms': frame_record['timestamp_ms']})
+            events.append(event)
+
+    # Close events still running at the end of the input, one frame interval after the last frame
+    for event in open_events.values():
+        event.update({'end_frame': last_frame + 1, 'end_ms': round(last_ms + interval_ms, 3)})
+        events.append(event)
+    events.sort(key=lambda event: (event['start_frame'], event['track_id'], event['event']))
+    return records, events
+
+def write_records(path, records, fmt):
+    """Write a list of dicts as CSV, JSON lines or Parquet"""
+    if fmt == 'csv':
+        fieldnames = []
+        for record in records:
+            fieldnames.extend(key for key in record if key not in fieldnames)
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(records)
+    elif fmt == 'jsonl':
+        with open(path, 'w') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+    elif fmt == 'parquet':
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError("Parquet output requires pandas and pyarrow (pip install pandas pyarrow)")
+        pd.DataFrame.from_records(records).to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Unknown output format: {fmt}")
+
+def init_worker(detector_options, backend_options=None):
+    """Load the models once per worker process"""
+    global _detector
+    cv2.setNumThreads(1)  # Parallelism comes from the process pool
+    # Backends hold models and locks, so each worker builds its own from picklable options
+    backend = create_backend(**backend_options) if backend_options else None
+    options = dict(detector_options)
+    driver_region = options.pop('driver_region', None)
+    _detector = DrowsinessDetector(enable_audio=False, backend=backend, **options)
+    _detector.face_monitor.driver_region = driver_region or _detector.face_monitor.driver_region
+    _detector.load_models()  # Up front, so per-file timings exclude model loading
+
+def analyze_file(source, output_dir, fmt='csv', fps=30.0):
+    """Analyze one video or frame directory in a worker and write its outputs"""
+    _detector.reset_state()
+    start = time.perf_counter()
+    records, events = analyze_frames(_detector, iter_frames(source, fps))
+    elapsed = time.perf_counter() - start
+
+    name = os.path.basename(os.path.normpath(source))
+    name = os.path.splitext(name)[0]
+    frames_path = os.path.join(output_dir, f"{name}.frames.{fmt}")
+    events_path = os.path.join(output_dir, f"{name}.events.{fmt}")
+    write_records(frames_path, records, fmt)
+    write_records(events_path, events, fmt)
+
+    return {'source': source, 'frames': len({record['frame'] for record in records}), 'events': len(events),
+            'seconds': elapsed, 'frames_path': frames_path, 'events_path': events_path}
+
+def analyze_batch(sources, output_dir, fmt='csv', workers=None, fps=30.0, detector_options=None,
+                  backend_options=None):
+    """Analyze many recordings in parallel, one set of models per worker process"""
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {fmt}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    summaries = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(detector_options or {}, backend_options)) as pool:
+        futures = {pool.submit(analyze_file, source, output_dir, fmt, fps): source for source in sources}
+        for future in as_completed(futures):
+            try:
+                summary = future.result()
+            except Exception as e:
+                print(f"Error analyzing {futures[future]}: {e}")
+                continue
+            print(f"{summary['source']}: {summary['frames']} frames, {summary['events']} events, "
+                  f"{summary['frames'] / summary['seconds'] if summary['seconds'] > 0 else 0.0:.1f} FPS")
+            summaries.append(summary)
+    return summaries
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless drowsiness analysis of recorded videos")
+    parser.add_argument("sources", nargs="+", help="video files or directories of frame images")
+    parser.add_argument("--output-dir", default="analysis")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="csv")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--fps", type=float, default=30.0, help="frame rate assumed for image directories")
+    parser.add_argument("--keyframe-interval", type=int, default=1)
+    parser.add_argument("--detection-scale", type=float, default=1.0)
+    parser.add_argument("--focus", choices=['all', 'largest', 'driver'], default='all',
+                        help="score every face, only the largest, or only the one in the driver region")
+    parser.add_argument("--driver-region", type=float, nargs=4, default=None, metavar=('X0', 'Y0', 'X1', 'Y1'),
+                        help="driver seat region as fractions of the frame, used with --focus driver")
+    parser.add_argument("--predictor", default=None, help="path of the 68-point landmark model")
+    add_backend_arguments(parser)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summaries = analyze_batch(args.sources, args.output_dir, args.format, args.workers, args.fps,
+                              {'keyframe_interval': args.keyframe_interval,
+                               'detection_scale': args.detection_scale, 'focus': args.focus,
+                               'driver_region': args.driver_region},
+                              {'face_detector': args.face_detector, 'detector_model': args.detector_model,
+                               'detector_config': args.detector_config, 'predictor_path': args.predictor,
+                               'points': EYES_AND_MOUTH if args.partial_landmarks else None})
+    elapsed = time.perf_counter() - start
+    total_frames = sum(summary['frames'] for summary in summaries)
+    print(f"Analyzed {len(summaries)} files, {total_frames} frames in {elapsed:.1f} s "
+          f"({total_frames / elapsed if elapsed > 0 else 0.0:.1f} FPS overall)")
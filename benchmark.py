@@ -0,0 +1,705 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import time
+import tracemalloc
+import cv2
+import dlib
+import numpy as np
+from drowsiness_detector import DrowsinessDetector
+from features import compute_features
+from synthetic_fixtures import synthetic_session, faces_from_features
+from session_recording import SessionRecorder, session_records, load_session, replay_session
+from threshold_sweep import sweep_thresholds, label_episodes, score_levels
+import model_registry
+from landmark_backends import create_backend, EYES_AND_MOUTH
+from overlay import OverlayRenderer, OVERLAY_LEVELS
+from profiling import Profiler
+from telemetry import TelemetryPublisher, StandInServer, HttpSink, UdpSink
+from calibration import DriverCalibration, ProfileStore
+from multi_stream import MultiStreamRunner
+
+# Threshold configurations evaluated on the synthetic landmark fixture
+SYNTHETIC_CONFIGS = {
+    'default': {},
+    'consecutive_5': {'CONSECUTIVE_FRAMES': 5},
+    'consecutive_10': {'CONSECUTIVE_FRAMES': 10},
+    'ear_0.20': {'EAR_THRESHOLD': 0.20},
+}
+
+# Detector configurations evaluated on recorded clips
+VIDEO_CONFIGS = {
+    'every_frame': {},
+    'keyframe_5': {'keyframe_interval': 5},
+    'scale_0.5': {'detection_scale': 0.5},
+    'keyframe_5_scale_0.5': {'keyframe_interval': 5, 'detection_scale': 0.5},
+}
+
+def load_frames(video_path, max_frames):
+    """Decode up to max_frames grayscale frames so decoding is not part of the timings"""
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    cap.release()
+    return frames
+
+def run_features(detector, frames):
+    """Run face location and feature extraction for every face over frames, returning timings and
+    per-frame lists of (ear, mar), ordered left to right so runs with different track IDs compare"""
+    results = []
+    frame_times = []
+    for gray in frames:
+        start = time.perf_counter()
+        faces = detector.analyze_faces(gray, drive_alarm=False)
+        frame_times.append(time.perf_counter() - start)
+        faces = sorted(faces, key=lambda result: result['face'].left())
+        results.append([(result['ear'], result['mar']) for result in faces])
+    return results, frame_times
+
+def summarize_times(frame_times):
+    """Turn per-frame durations into FPS and latency figures in milliseconds"""
+    total = sum(frame_times)
+    times_ms = np.array(frame_times) * 1000.0
+    return {
+        'fps': len(frame_times) / total if total > 0 else 0.0,
+        'latency_mean_ms': float(times_ms.mean()) if len(times_ms) else 0.0,
+        'latency_p95_ms': float(np.percentile(times_ms, 95)) if len(times_ms) else 0.0,
+    }
+
+def compare_features(reference, candidate):
+    """Summarize how closely candidate EAR/MAR values follow the reference run
+
+    Frames agree when both runs found the same number of faces; the faces of those frames are
+    compared pairwise, so every face counts, not just the first.
+    """
+    agreeing = [(r, c) for r, c in zip(reference, candidate) if len(r) == len(c)]
+    both = [pair for r, c in agreeing for pair in zip(r, c)]
+    summary = {'face_agreement': len(agreeing) / len(reference) if reference else 0.0}
+    if both:
+        ear_diff = np.abs([r[0] - c[0] for r, c in both])
+        mar_diff = np.abs([r[1] - c[1] for r, c in both])
+        summary.update({
+            'ear_mean_abs_diff': float(ear_diff.mean()),
+            'ear_max_abs_diff': float(ear_diff.max()),
+            'mar_mean_abs_diff': float(mar_diff.mean()),
+            'mar_max_abs_diff': float(mar_diff.max()),
+        })
+    return summary
+
+def benchmark_tracking(frames, keyframe_intervals, redetect_threshold):
+    """Compare detect-every-frame against detect-then-track for several keyframe intervals"""
+    baseline = DrowsinessDetector(keyframe_interval=1, enable_audio=False)
+    reference, reference_times = run_features(baseline, frames)
+    reference_fps = summarize_times(reference_times)['fps']
+    print(f"every frame      : {reference_fps:6.1f} FPS, {baseline.face_tracker.detection_count} detections")
+
+    for interval in keyframe_intervals:
+        detector = DrowsinessDetector(keyframe_interval=interval, redetect_threshold=redetect_threshold,
+                                      enable_audio=False)
+        results, frame_times = run_features(detector, frames)
+        fps = summarize_times(frame_times)['fps']
+        summary = compare_features(reference, results)
+        print(f"keyframe every {interval:2d}: {fps:6.1f} FPS ({fps / reference_fps:.2f}x), "
+              f"{detector.face_tracker.detection_count} detections, "
+              f"face agreement {summary['face_agreement']:.1%}, "
+              f"EAR diff {summary.get('ear_mean_abs_diff', float('nan')):.4f}, "
+              f"MAR diff {summary.get('mar_mean_abs_diff', float('nan')):.4f}")
+
+def benchmark_features(batch_size, repeats):
+    """Micro-benchmark the per-call scipy EAR/MAR formulas against the vectorized feature module"""
+    from scipy.spatial import distance
+
+    # Plausible synthetic faces: a mean shape plus per-landmark jitter
+    rng = np.random.default_rng(0)
+    base = rng.integers(100, 400, size=(68, 2))
+    batch = base + rng.integers(-5, 6, size=(batch_size, 68, 2))
+
+    def scalar_ear(eye):
+        A = distance.euclidean(eye[1], eye[5])
+        B = distance.euclidean(eye[2], eye[4])
+        C = distance.euclidean(eye[0], eye[3])
+        return (A + B) / (2.0 * C)
+
+    def scalar_mar(mouth):
+        A = distance.euclidean(mouth[13], mouth[19])
+        B = distance.euclidean(mouth[14], mouth[18])
+        C = distance.euclidean(mouth[15], mouth[17])
+        D = distance.euclidean(mouth[12], mouth[16])
+        return (A + B + C) / (2.0 * D)
+
+    def scalar_features(landmarks):
+        ear = (scalar_ear(landmarks[36:42]) + scalar_ear(landmarks[42:48])) / 2.0
+        return ear, scalar_mar(landmarks[48:68])
+
+    def best_of(fn):
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    scalar_time = best_of(lambda: [scalar_features(face) for face in batch])
+    single_time = best_of(lambda: [compute_features(face) for face in batch])
+    batch_time = best_of(lambda: compute_features(batch))
+
+    # The vectorized formulas must agree exactly with the scalar ones
+    expected = np.array([scalar_features(face) for face in batch])
+    vectorized = compute_features(batch)
+    ear_diff = np.abs(vectorized['ear'] - expected[:, 0]).max()
+    mar_diff = np.abs(vectorized['mar'] - expected[:, 1]).max()
+
+    for name, elapsed in (('scipy per call', scalar_time), ('vectorized single', single_time),
+                          ('vectorized batch', batch_time)):
+        print(f"{name:18s}: {elapsed / batch_size * 1e6:8.2f} us/face ({scalar_time / elapsed:6.1f}x)")
+    print(f"max abs diff: EAR {ear_diff:.2e}, MAR {mar_diff:.2e}")
+
+def benchmark_region(clips, scales, roi_padding):
+    """Compare full-resolution detection against downscaled and ROI-restricted detection on each clip"""
+    configs = [(1.0, None)] + [(scale, None) for scale in scales]
+    if roi_padding is not None:
+        configs += [(scale, roi_padding) for scale in [1.0] + scales]
+
+    for name, frames in clips:
+        print(f"{name}: {len(frames)} frames at {frames[0].shape[1]}x{frames[0].shape[0]}" if frames else f"{name}: no frames")
+        if not frames:
+            continue
+
+        reference = None
+        for scale, padding in configs:
+            detector = DrowsinessDetector(detection_scale=scale, roi_padding=padding, enable_audio=False)
+            results, frame_times = run_features(detector, frames)
+            timing = summarize_times(frame_times)
+            if reference is None:
+                reference = results
+            summary = compare_features(reference, results)
+            print(f"  scale {scale:.2f}, roi padding {str(padding):>4}: {timing['fps']:6.1f} FPS, "
+                  f"mean {timing['latency_mean_ms']:6.1f} ms, p95 {timing['latency_p95_ms']:6.1f} ms, "
+                  f"face agreement {summary['face_agreement']:.1%}, "
+                  f"EAR diff {summary.get('ear_mean_abs_diff', float('nan')):.4f}")
+
+def benchmark_backends(clips, backends):
+    """Compare each landmark backend's speed and EAR/MAR against the default dlib HOG + 68-point backend"""
+    for name, frames in clips:
+        print(f"{name}: {len(frames)} frames at {frames[0].shape[1]}x{frames[0].shape[0]}" if frames else f"{name}: no frames")
+        if not frames:
+            continue
+
+        reference, reference_fps = None, None
+        for label, options in [('hog (default)', {})] + backends:
+            try:
+                detector = DrowsinessDetector(enable_audio=False, backend=create_backend(**options))
+                detector.load_models()  # Model loading is not part of the timings
+            except (OSError, ImportError) as e:
+                print(f"  {label:24s}: unavailable ({e})")
+                continue
+            results, frame_times = run_features(detector, frames)
+            timing = summarize_times(frame_times)
+            if reference is None:
+                reference, reference_fps = results, timing['fps']
+            summary = compare_features(reference, results)
+            print(f"  {label:24s}: {timing['fps']:6.1f} FPS ({timing['fps'] / reference_fps:5.2f}x), "
+                  f"p95 {timing['latency_p95_ms']:6.1f} ms, face agreement {summary['face_agreement']:.1%}, "
+                  f"EAR diff {summary.get('ear_mean_abs_diff', float('nan')):.4f}, "
+                  f"MAR diff {summary.get('mar_mean_abs_diff', float('nan')):.4f}")
+
+def benchmark_streams(video, streams, worker_counts):
+    """Multi-stream throughput for each pool size, every stream replaying the clip in real time"""
+    print(f"{streams} streams of {video} on {os.cpu_count()} CPUs:")
+    baseline = None
+    for workers in worker_counts:
+        runner = MultiStreamRunner([video] * streams, workers)
+        start = time.perf_counter()
+        runner.start()
+        while not runner.all_finished():
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        runner.stop()
+
+        stats = runner.stats()
+        fps = sum(stream['processed'] for stream in stats) / elapsed
+        baseline = baseline or fps
+        print(f"  {workers} workers: {fps:6.1f} frames/s processed ({fps / baseline:4.2f}x), "
+              f"{sum(stream['dropped'] for stream in stats)} dropped, "
+              f"mean latency {np.mean([stream['latency_mean_ms'] for stream in stats]):6.1f} ms")
+
+def benchmark_overlay(faces, frames, profile):
+    """Time the overlay renderer at each level against per-point circles and Python min/max boxes"""
+    rng = np.random.default_rng(0)
+    landmarks = np.rint(faces_from_features(rng.uniform(0.05, 0.3, faces), rng.uniform(0.05, 0.7, faces)))
+    landmarks = landmarks.astype(np.int64) + (np.arange(faces) * 150 - 150)[:, None, None] * [1, 0]
+    results = [{'track_id': i, 'landmarks': face,
+                'face': dlib.rectangle(*face.min(axis=0).tolist(), *face.max(axis=0).tolist()),
+                'ear': 0.1, 'mar': 0.5, 'status': {'eye_status': 'Drowsy', 'yawn_detected': True,
+                                                   'drowsiness_level': 1}}
+               for i, face in enumerate(landmarks)]
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    profiler = Profiler(enabled=profile)
+    for name in ('capture', 'detect', 'landmarks', 'features'):
+        for _ in range(100):
+            profiler.record(name, rng.uniform(0.001, 0.02))
+
+    def legacy():
+        for result in results:
+            points = result['landmarks']
+            for (x, y) in points:
+                cv2.circle(frame, (x, y), 1, (0, 255, 0), -1)
+            for region in (points[36:42], points[42:48], points[48:68]):
+                cv2.rectangle(frame, (min(region[:, 0]), min(region[:, 1])),
+                              (max(region[:, 0]), max(region[:, 1])), (0, 255, 0), 1)
+            cv2.putText(frame, f"EAR: {result['ear']:.3f}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            cv2.putText(frame, f"MAR: {result['mar']:.3f}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            cv2.putText(frame, "ALARM ACTIVE!", (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        if profile:
+            for i, line in enumerate(profiler.overlay_lines()):
+                cv2.putText(frame, line, (10, frame.shape[0] - 15 - 18 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.45,
+                            (255, 255, 0), 1)
+
+    def per_frame_us(fn):
+        start = time.perf_counter()
+        for _ in range(frames):
+            fn()
+        return (time.perf_counter() - start) / frames * 1e6
+
+    legacy_us = per_frame_us(legacy)
+    print(f"{faces} faces, {frames} frames{', profiling overlay' if profile else ''}")
+    print(f"  {'per-point drawing':18s}: {legacy_us:8.1f} us/frame")
+    for level in OVERLAY_LEVELS:
+        renderer = OverlayRenderer(level, profiler)
+        elapsed = per_frame_us(lambda: renderer.render(frame, results, alarm_on=True))
+        print(f"  {'renderer ' + level:18s}: {elapsed:8.1f} us/frame ({legacy_us / elapsed:5.1f}x)")
+
+def benchmark_telemetry(duration, fps, delay):
+    """Time TelemetryPublisher.record() in a paced frame loop while a stand-in backend answers after delay"""
+    session = synthetic_session(duration=duration, fps=fps)
+    server = StandInServer(delay=delay).start()
+    publisher = TelemetryPublisher([HttpSink(server.http_url), UdpSink(server.host, server.udp_port)],
+                                   source='benchmark').start()
+    state = DrowsinessDetector(enable_audio=False)
+    costs = []
+    start = time.perf_counter()
+    for t, ear, mar in zip(session['timestamps'].tolist(), session['ear'].tolist(), session['mar'].tolist()):
+        wait = start + t - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        status = state.get_detection_status(ear, mar, t)
+        began = time.perf_counter()
+        publisher.record([{'track_id': 0, 'ear': ear, 'mar': mar, 'status': status}], state.alarm_on,
+                         state.EAR_THRESHOLD)
+        costs.append(time.perf_counter() - began)
+    publisher.stop()
+    server.stop()
+
+    p50, p99 = np.percentile(np.array(costs) * 1e6, [50, 99])
+    print(f"{len(costs)} frames at {fps:.0f} FPS, backend answering after {delay:.1f} s")
+    print(f"record(): p50 {p50:.1f} us, p99 {p99:.1f} us, max {max(costs) * 1e6:.1f} us")
+    print(f"stand-in received {len(server.received)} records in {server.requests} HTTP requests")
+    for name, stats in publisher.stats()['sinks'].items():
+        print(f"  {name}: sent {stats['sent']}, dropped {stats['dropped']}, errors {stats['errors']}")
+
+# Synthetic drivers for the calibration benchmark: (name, open-eye EAR, resting MAR)
+CALIBRATION_DRIVERS = [('typical', 0.30, 0.05), ('narrow eyes', 0.17, 0.05), ('wide eyes', 0.40, 0.05),
+                       ('open mouth', 0.30, 0.33)]
+
+def benchmark_calibration(duration, noise, path):
+    """Fixed thresholds against per-driver calibrated thresholds, and profile reload time
+
+    Sessions have no blinks: with CONSECUTIVE_FRAMES = 3 every blink alarms whatever the thresholds,
+    so the false alarms counted here are the ones the thresholds cause.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    store = ProfileStore(path)
+    print(f"{duration / 60.0:.0f} min per driver, EAR/MAR noise {noise}")
+    for seed, (name, open_ear, rest_mar) in enumerate(CALIBRATION_DRIVERS):
+        session = synthetic_session(duration=duration, seed=seed, blinks_per_minute=0, noise=noise,
+                                    open_ear=open_ear, rest_mar=rest_mar)
+        records = session_records(session['timestamps'], session['landmarks'], session['ear'], session['mar'])
+
+        fixed = DrowsinessDetector(enable_audio=False)
+        fixed_events = count_events(replay_session(records, lambda t, ear, mar: fixed.get_detection_status(ear, mar, t)),
+                                    session['timestamps'], session['episodes'])
+
+        adaptive = DrowsinessDetector(enable_audio=False)
+        adaptive.calibration = DriverCalibration(store=store, key=name)
+
+        def decide(t, ear, mar):
+            adaptive.update_calibration(ear, mar, t)
+            return adaptive.get_detection_status(ear, mar, t)
+
+        adaptive_events = count_events(replay_session(records, decide), session['timestamps'], session['episodes'])
+        profile = adaptive.calibration.profile
+        print(f"  {name:12s}: open EAR {open_ear:.2f} (learned {profile['ear_open']:.3f}), resting MAR "
+              f"{rest_mar:.2f} (learned {profile['mar_rest']:.3f})")
+        for label, events in (('fixed', fixed_events), ('calibrated', adaptive_events)):
+            print(f"    {label:10s}: {events['detected']}/{events['episodes']} episodes, "
+                  f"{events['false_alarms']} false alarms")
+
+    start = time.perf_counter()
+    reloaded = DriverCalibration(store=ProfileStore(path), key=CALIBRATION_DRIVERS[0][0])
+    reload_time = time.perf_counter() - start
+    print(f"profile reload: {reload_time * 1e3:.2f} ms ({len(store.keys())} profiles, calibrated={reloaded.calibrated})")
+
+def count_events(levels, timestamps, episodes=None):
+    """Count alarm onsets, and match them against ground-truth episodes when given"""
+    levels = np.asarray(levels) > 0
+    onsets = np.flatnonzero(levels & ~np.concatenate(([False], levels[:-1])))
+    summary = {'alarm_onsets': int(len(onsets))}
+    if episodes is None:
+        return summary
+
+    alarm_times = timestamps[levels]
+    detected, latencies = 0, []
+    for episode in episodes:
+        hits = alarm_times[(alarm_times >= episode['start']) & (alarm_times <= episode['end'])]
+        if len(hits):
+            detected += 1
+            latencies.append(float(hits[0] - episode['start']))
+    inside = [any(e['start'] <= t <= e['end'] for e in episodes) for t in timestamps[onsets]]
+    summary.update({'episodes': len(episodes), 'detected': detected,
+                    'false_alarms': int(len(inside) - sum(inside)),
+                    'latency_to_alarm_s': float(np.mean(latencies)) if latencies else None})
+    return summary
+
+def benchmark_replay(duration, path):
+    """Time recording in the live loop, then replaying the recording through get_detection_status"""
+    session = synthetic_session(duration=duration)
+    records = session_records(session['timestamps'], session['landmarks'], session['ear'], session['mar'])
+    if os.path.exists(path):
+        os.remove(path)
+
+    recorder = SessionRecorder(path)
+    face = dlib.rectangle(*(int(value) for value in records['box'][0]))
+    start = time.perf_counter()
+    for record in records:
+        recorder.record(record['timestamp'], face, record['landmarks'], record['ear'], record['mar'])
+    recorder.close()
+    write_time = time.perf_counter() - start
+
+    replayed = load_session(path)
+    detector = DrowsinessDetector(enable_audio=False)
+    start = time.perf_counter()
+    levels = replay_session(replayed, lambda t, ear, mar: detector.get_detection_status(ear, mar, t))
+    replay_time = time.perf_counter() - start
+
+    events = count_events(levels, session['timestamps'], session['episodes'])
+    print(f"{len(records)} samples ({duration / 3600.0:.2f} h at {session['fps']:.0f} FPS), "
+          f"{os.path.getsize(path) / 1e6:.1f} MB on disk")
+    print(f"record: {write_time / len(records) * 1e6:6.2f} us/sample")
+    print(f"replay: {len(levels) / replay_time:,.0f} samples/s ({duration / replay_time:,.0f}x real time), "
+          f"{events['detected']}/{events['episodes']} episodes, {events['false_alarms']} false alarms")
+
+def benchmark_sweep(duration, checks):
+    """Time the vectorized threshold sweep and check a few configs against get_detection_status"""
+    session = synthetic_session(duration=duration)
+    ear_thresholds = np.arange(0.10, 0.25, 0.01)
+    yawn_thresholds = np.arange(0.25, 0.60, 0.025)
+    consecutive_frames = np.arange(1, 31)
+
+    start = time.perf_counter()
+    results = sweep_thresholds(session['ear'], session['mar'], session['labels'], session['timestamps'],
+                               ear_thresholds, yawn_thresholds, consecutive_frames)
+    sweep_time = time.perf_counter() - start
+    configs = len(results['recall'])
+
+    # Replay a random sample of configs one by one; every metric must agree exactly
+    metrics = ['precision', 'recall', 'false_positive_rate', 'episodes_detected', 'false_alarms',
+               'latency_to_alarm_s']
+    starts, ends = label_episodes(session['labels'])
+    rng = np.random.default_rng(0)
+    loop_time, mismatches = 0.0, {metric: 0 for metric in metrics}
+    for i in rng.choice(configs, size=min(checks, configs), replace=False):
+        detector = DrowsinessDetector(enable_audio=False)
+        detector.EAR_THRESHOLD = results['ear_threshold'][i]
+        detector.YAWN_THRESHOLD = results['yawn_threshold'][i]
+        detector.CONSECUTIVE_FRAMES = results['consecutive_frames'][i]
+        start = time.perf_counter()
+        levels = replay_session(session_records(session['timestamps'], session['landmarks'], session['ear'],
+                                                session['mar']),
+                                lambda t, ear, mar: detector.get_detection_status(ear, mar, t))
+        loop_time += time.perf_counter() - start
+        replayed = score_levels((levels > 0)[None, :], session['labels'], session['timestamps'], starts, ends)
+        for metric in metrics:
+            mismatches[metric] += not np.array_equal(replayed[metric][0], results[metric][i], equal_nan=True)
+
+    per_config = loop_time / min(checks, configs)
+    print(f"{configs} configs x {len(session['ear'])} samples ({duration / 3600.0:.2f} h)")
+    print(f"vectorized sweep: {sweep_time:7.2f} s ({sweep_time / configs * 1e3:.2f} ms/config)")
+    print(f"replay per config: {per_config:7.2f} s (~{per_config * configs:.0f} s for the grid, "
+          f"{per_config * configs / sweep_time:.0f}x)")
+    print(f"mismatches in {min(checks, configs)} checked configs: "
+          + ", ".join(f"{metric} {count}" for metric, count in mismatches.items()))
+    if any(mismatches.values()):
+        raise SystemExit("vectorized sweep metrics disagree with the replayed detector")
+
+def benchmark_startup(predictor_path, video=None):
+    """Time detector construction, cold and cached model loading, and time to the first detected face"""
+    start = time.perf_counter()
+    detector = DrowsinessDetector(enable_audio=False, predictor_path=predictor_path)
+    construct_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    detector.load_models()
+    cold_time = time.perf_counter() - start
+
+    # A second detector (or worker) gets the already-loaded models from the registry
+    start = time.perf_counter()
+    DrowsinessDetector(enable_audio=False, predictor_path=predictor_path).load_models()
+    cached_time = time.perf_counter() - start
+
+    print(f"construct detector: {construct_time * 1e3:8.2f} ms (models not loaded yet)")
+    print(f"cold model load:    {cold_time * 1e3:8.2f} ms")
+    for key, seconds in model_registry.load_seconds.items():
+        print(f"  {os.path.basename(key):26s} {seconds * 1e3:8.2f} ms")
+    print(f"cached model load:  {cached_time * 1e3:8.2f} ms")
+
+    if video:
+        capture = cv2.VideoCapture(video)
+        frames = 0
+        while True:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            frames += 1
+            if detector.analyze_faces(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)):
+                detector.profiler.startup.mark('first_face')
+                break
+        capture.release()
+        milestones = detector.profiler.startup.milestones
+        if 'first_face' in milestones:
+            print(f"first detected face: {milestones['first_face']:8.2f} s after construction (frame {frames})")
+        else:
+            print(f"no face detected in {frames} frames")
+
+def measure(run):
+    """Run a benchmark callable twice: once for timings, once under tracemalloc for peak memory"""
+    result = run()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result['python_peak_kb'] = peak / 1024.0
+    result['max_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return result
+
+def run_synthetic_config(name, thresholds, session):
+    """Feed the synthetic landmark fixture through feature extraction and get_detection_status"""
+    def run():
+        detector = DrowsinessDetector(enable_audio=False)
+        for key, value in thresholds.items():
+            setattr(detector, key, value)
+        detector.profiler.enabled = True
+
+        levels = []
+        start = time.perf_counter()
+        for landmarks in session['landmarks']:
+            with detector.profiler.stage('features'):
+                features = compute_features(landmarks)
+            with detector.profiler.stage('status'):
+                status = detector.get_detection_status(features['ear'], features['mar'])
+            levels.append(status['drowsiness_level'])
+            detector.profiler.end_frame()
+        elapsed = time.perf_counter() - start
+
+        return {'suite': 'synthetic', 'config': name, 'options': thresholds,
+                'frames': len(levels), 'fps': len(levels) / elapsed if elapsed > 0 else 0.0,
+                'stages': detector.profiler.summary()['stages'],
+                'events': count_events(levels, session['timestamps'], session['episodes'])}
+    return measure(run)
+
+def run_video_config(name, options, clip, frames):
+    """Run the full detection pipeline over decoded frames of a recorded clip"""
+    def run():
+        detector = DrowsinessDetector(enable_audio=False, **options)
+        detector.profiler.enabled = True
+
+        levels = []
+        start = time.perf_counter()
+        for gray in frames:
+            results = detector.analyze_faces(gray)
+            levels.append(max((result['status']['drowsiness_level'] for result in results), default=0))
+            detector.profiler.end_frame()
+        elapsed = time.perf_counter() - start
+
+        return {'suite': 'video', 'clip': clip, 'config': name, 'options': options,
+                'frames': len(levels), 'fps': len(levels) / elapsed if elapsed > 0 else 0.0,
+                'stages': detector.profiler.summary()['stages'],
+                'events': count_events(levels, np.arange(len(levels)))}
+    return measure(run)
+
+def run_suite(videos, output, duration, seed, max_frames):
+    """Run every configuration and store the results as JSON for later comparison"""
+    session = synthetic_session(duration=duration, seed=seed)
+    results = []
+    for name, thresholds in SYNTHETIC_CONFIGS.items():
+        results.append(run_synthetic_config(name, thresholds, session))
+        print_result(results[-1])
+
+    for video in videos:
+        frames = load_frames(video, max_frames)
+        for name, options in VIDEO_CONFIGS.items():
+            results.append(run_video_config(name, options, os.path.basename(video), frames))
+            print_result(results[-1])
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': {'platform': platform.platform(), 'processor': platform.processor(),
+                    'cpus': os.cpu_count(), 'python': platform.python_version(),
+                    'numpy': np.__version__, 'opencv': cv2.__version__},
+        'fixture': {'duration': duration, 'seed': seed},
+        'results': results,
+    }
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    return report
+
+def print_result(result):
+    """One line per benchmark result"""
+    label = result['config'] if result['suite'] == 'synthetic' else f"{result['clip']}/{result['config']}"
+    events = result['events']
+    detail = f"{events['alarm_onsets']} alarms"
+    if 'detected' in events:
+        detail += f", {events['detected']}/{events['episodes']} episodes, {events['false_alarms']} false"
+    print(f"{result['suite']:9s} {label:32s} {result['fps']:9.1f} FPS, peak {result['python_peak_kb']:8.0f} KB, {detail}")
+
+def compare_reports(baseline_path, candidate_path):
+    """Print FPS and event differences between two stored suite runs"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(candidate_path) as f:
+        candidate = json.load(f)
+
+    def key(result):
+        return result['suite'], result.get('clip'), result['config']
+
+    baseline_results = {key(result): result for result in baseline['results']}
+    for result in candidate['results']:
+        before = baseline_results.get(key(result))
+        if before is None:
+            continue
+        ratio = result['fps'] / before['fps'] if before['fps'] > 0 else float('nan')
+        alarms = result['events']['alarm_onsets'] - before['events']['alarm_onsets']
+        label = '/'.join(part for part in key(result) if part)
+        print(f"{label:42s} {before['fps']:9.1f} -> {result['fps']:9.1f} FPS ({ratio:5.2f}x), alarms {alarms:+d}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drowsiness detection benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    tracking = subparsers.add_parser("tracking", help="detect-then-track against detecting every frame")
+    tracking.add_argument("video", help="recorded clip to benchmark against")
+    tracking.add_argument("--max-frames", type=int, default=300)
+    tracking.add_argument("--keyframe-intervals", type=int, nargs="+", default=[2, 5, 10])
+    tracking.add_argument("--redetect-threshold", type=float, default=7.0)
+
+    region = subparsers.add_parser("region", help="downscaled and ROI detection against full resolution")
+    region.add_argument("videos", nargs="+", help="recorded clips to benchmark against")
+    region.add_argument("--max-frames", type=int, default=300)
+    region.add_argument("--scales", type=float, nargs="+", default=[0.5, 0.25])
+    region.add_argument("--roi-padding", type=float, default=0.5)
+
+    features = subparsers.add_parser("features", help="vectorized EAR/MAR against per-call scipy distances")
+    features.add_argument("--batch-size", type=int, default=10000)
+    features.add_argument("--repeats", type=int, default=5)
+
+    suite = subparsers.add_parser("suite", help="full benchmark suite with JSON results")
+    suite.add_argument("videos", nargs="*", help="optional recorded clips; the synthetic fixture always runs")
+    suite.add_argument("--output", default="benchmark_results.json")
+    suite.add_argument("--duration", type=float, default=600.0, help="synthetic session length in seconds")
+    suite.add_argument("--seed", type=int, default=0)
+    suite.add_argument("--max-frames", type=int, default=300)
+
+    replay = subparsers.add_parser("replay", help="session recording cost and replay throughput")
+    replay.add_argument("--duration", type=float, default=3600.0, help="synthetic session length in seconds")
+    replay.add_argument("--path", default="benchmark_session.rec")
+
+    sweep = subparsers.add_parser("sweep", help="vectorized threshold sweep against per-config replay")
+    sweep.add_argument("--duration", type=float, default=3600.0, help="synthetic session length in seconds")
+    sweep.add_argument("--checks", type=int, default=5, help="configs to replay one by one for comparison")
+
+    startup = subparsers.add_parser("startup", help="model loading and time to the first detected face")
+    startup.add_argument("video", nargs="?", default=None, help="optional clip for time to first detected face")
+    startup.add_argument("--predictor", default=None, help="path of the 68-point landmark model")
+
+    backends = subparsers.add_parser("backends", help="landmark backends against the default dlib backend")
+    backends.add_argument("videos", nargs="+", help="recorded clips to benchmark against")
+    backends.add_argument("--max-frames", type=int, default=300)
+    backends.add_argument("--haar-cascade", default=None, help="Haar cascade (default: OpenCV's bundled one)")
+    backends.add_argument("--lbp-cascade", default=None, help="LBP cascade, e.g. lbpcascade_frontalface_improved.xml")
+    backends.add_argument("--dnn-model", default=None, help="DNN face detector weights")
+    backends.add_argument("--dnn-config", default=None, help="DNN face detector config")
+    backends.add_argument("--partial-predictor", default=None,
+                          help="smaller landmark model predicting only the eye and mouth points")
+
+    streams = subparsers.add_parser("streams", help="multi-stream throughput for different worker pool sizes")
+    streams.add_argument("video", help="clip replayed in real time by every stream")
+    streams.add_argument("--streams", type=int, default=4)
+    streams.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+
+    overlay = subparsers.add_parser("overlay", help="overlay renderer against per-point drawing")
+    overlay.add_argument("--faces", type=int, default=1)
+    overlay.add_argument("--frames", type=int, default=2000)
+    overlay.add_argument("--profile", action="store_true", help="include the profiling text overlay")
+
+    telemetry = subparsers.add_parser("telemetry", help="telemetry publishing cost in the frame loop")
+    telemetry.add_argument("--duration", type=float, default=10.0, help="seconds of paced frames")
+    telemetry.add_argument("--fps", type=float, default=30.0)
+    telemetry.add_argument("--delay", type=float, default=0.0,
+                           help="stand-in backend response delay; above 2 s every HTTP batch times out")
+
+    calibration = subparsers.add_parser("calibration", help="fixed against per-driver calibrated thresholds")
+    calibration.add_argument("--duration", type=float, default=1800.0, help="synthetic session length per driver")
+    calibration.add_argument("--noise", type=float, default=0.015, help="EAR/MAR measurement noise")
+    calibration.add_argument("--path", default="benchmark_profiles.json")
+
+    compare = subparsers.add_parser("compare", help="compare two stored suite results")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+
+    args = parser.parse_args()
+
+    if args.benchmark == "tracking":
+        frames = load_frames(args.video, args.max_frames)
+        benchmark_tracking(frames, args.keyframe_intervals, args.redetect_threshold)
+    elif args.benchmark == "region":
+        clips = [(video, load_frames(video, args.max_frames)) for video in args.videos]
+        benchmark_region(clips, args.scales, args.roi_padding)
+    elif args.benchmark == "features":
+        benchmark_features(args.batch_size, args.repeats)
+    elif args.benchmark == "suite":
+        run_suite(args.videos, args.output, args.duration, args.seed, args.max_frames)
+    elif args.benchmark == "replay":
+        benchmark_replay(args.duration, args.path)
+    elif args.benchmark == "sweep":
+        benchmark_sweep(args.duration, args.checks)
+    elif args.benchmark == "startup":
+        benchmark_startup(args.predictor, args.video)
+    elif args.benchmark == "backends":
+        candidates = [('haar', {'face_detector': 'haar', 'detector_model': args.haar_cascade})]
+        if args.lbp_cascade:
+            candidates.append(('lbp', {'face_detector': 'lbp', 'detector_model': args.lbp_cascade}))
+        if args.dnn_model:
+            candidates.append(('dnn', {'face_detector': 'dnn', 'detector_model': args.dnn_model,
+                                       'detector_config': args.dnn_config}))
+        if args.partial_predictor:
+            candidates.append(('hog + partial landmarks', {'predictor_path': args.partial_predictor,
+                                                           'points': EYES_AND_MOUTH}))
+        clips = [(video, load_frames(video, args.max_frames)) for video in args.videos]
+        benchmark_backends(clips, candidates)
+    elif args.benchmark == "streams":
+        benchmark_streams(args.video, args.streams, args.workers)
+    elif args.benchmark == "overlay":
+        benchmark_overlay(args.faces, args.frames, args.profile)
+    elif args.benchmark == "telemetry":
+        benchmark_telemetry(args.duration, args.fps, args.delay)
+    elif args.benchmark == "calibration":
+        benchmark_calibration(args.duration, args.noise, args.path)
+    elif args.benchmark == "compare":
+        compare_reports(args.baseline, args.candidate)
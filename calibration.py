@@ -0,0 +1,234 @@
+import argparse
+import json
+import os
+import threading
+import time
+from bisect import bisect_right
+
+# Bounds for calibrated thresholds, so a bad calibration minute can't disable or saturate detection
+EAR_THRESHOLD_RANGE = (0.08, 0.30)
+YAWN_THRESHOLD_RANGE = (0.20, 0.90)
+
+class P2Quantile:
+    def __init__(self, q):
+        # Streaming estimate of the q-quantile with the P-square algorithm (Jain & Chlamtac, 1985):
+        # five markers whose heights follow the minimum, q/2, q, (1+q)/2 quantiles and maximum,
+        # adjusted with piecewise-parabolic interpolation, so memory is constant however many samples
+        self.q = q
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1.0, 1.0 + 2.0 * q, 1.0 + 4.0 * q, 3.0 + 2.0 * q, 5.0]
+        self.increments = [0.0, q / 2.0, q, (1.0 + q) / 2.0, 1.0]
+        self.count = 0
+
+    def update(self, value):
+        """Fold in one sample"""
+        self.count += 1
+        heights = self.heights
+        if len(heights) < 5:
+            heights.insert(bisect_right(heights, value), value)
+            return
+
+        # Cell holding the sample; the outer markers track the extremes
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = bisect_right(heights, value) - 1
+
+        positions = self.positions
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the three middle markers one position towards where they should be
+        for i in (1, 2, 3):
+            offset = self.desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or \
+               (offset <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if offset > 0 else -1
+                height = self.parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+
+    def parabolic(self, i, step):
+        h, n = self.heights, self.positions
+        return h[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (h[i + 1] - h[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - step) * (h[i] - h[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self):
+        """Current estimate (exact while fewer than five samples have been seen; None before any)"""
+        if not self.heights:
+            return None
+        if len(self.heights) < 5:
+            return self.heights[min(len(self.heights) - 1, int(round(self.q * (len(self.heights) - 1))))]
+        return self.heights[2]
+
+class ProfileStore:
+    def __init__(self, path):
+        # Driver profiles keyed by driver or camera ID, in one small JSON file that is read once
+        # and rewritten atomically whenever a profile is saved
+        self.path = path
+        self.lock = threading.Lock()
+        self.profiles = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.profiles = json.load(f)
+
+    def get(self, key):
+        """The stored profile for key, or None"""
+        with self.lock:
+            return self.profiles.get(key)
+
+    def save(self, key, profile):
+        """Store a profile and write the file"""
+        with self.lock:
+            self.profiles[key] = profile
+            self.write()
+
+    def remove(self, key):
+        """Delete a profile; returns False if there was none"""
+        with self.lock:
+            if self.profiles.pop(key, None) is None:
+                return False
+            self.write()
+            return True
+
+    def write(self):
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump(self.profiles, f, indent=1)
+        os.replace(temporary, self.path)
+
+    def keys(self):
+        with self.lock:
+            return list(self.profiles)
+
+class DriverCalibration:
+    def __init__(self, duration=60.0, ear_ratio=0.5, yawn_margin=0.30, store=None, key=None,
+                 min_samples=100, max_gap=2.0):
+        # Learns a driver's open-eye EAR and resting MAR (streaming medians: blinks, closures and
+        # yawns are a small minority of an alert driver's frames) over the first `duration`
+        # seconds of face time, then sets EAR_THRESHOLD = ear_ratio x open-eye EAR and
+        # YAWN_THRESHOLD = resting MAR + yawn_margin. The defaults reproduce the fixed 0.15 / 0.35
+        # thresholds for a typical face (open EAR 0.30, resting MAR 0.05).
+        self.duration = duration
+        self.ear_ratio = ear_ratio
+        self.yawn_margin = yawn_margin
+        self.min_samples = min_samples
+        # Gaps longer than this (face lost, camera stalled) don't count towards the duration
+        self.max_gap = max_gap
+
+        # Finished profiles are saved under key, and a stored profile skips calibration entirely
+        self.store = store
+        self.key = key
+        self.restart()
+        self.profile = store.get(key) if store is not None and key is not None else None
+        self.loaded = self.profile is not None
+
+    def restart(self):
+        """Forget the current profile and calibrate again from the next sample"""
+        self.profile = None
+        self.loaded = False
+        self.ear_open = P2Quantile(0.5)
+        self.mar_rest = P2Quantile(0.5)
+        self.elapsed = 0.0
+        self.last_time = None
+
+    @property
+    def calibrated(self):
+        return self.profile is not None
+
+    def progress(self):
+        """Fraction of the calibration period covered so far"""
+        if self.calibrated:
+            return 1.0
+        return min(1.0, self.elapsed / self.duration) if self.duration > 0 else 1.0
+
+    def update(self, timestamp, ear, mar):
+        """Feed one sample of the driver's face; returns True when it completes the calibration"""
+        if self.profile is not None:
+            return False
+        if self.last_time is not None:
+            self.elapsed += min(max(0.0, timestamp - self.last_time), self.max_gap)
+        self.last_time = timestamp
+        self.ear_open.update(ear)
+        self.mar_rest.update(mar)
+
+        if self.elapsed < self.duration or self.ear_open.count < self.min_samples:
+            return False
+        self.profile = {
+            'ear_open': self.ear_open.value(),
+            'mar_rest': self.mar_rest.value(),
+            'samples': self.ear_open.count,
+            'seconds': self.elapsed,
+            'calibrated_at': time.time(),
+        }
+        if self.store is not None and self.key is not None:
+            self.store.save(self.key, self.profile)
+        return True
+
+    def thresholds(self):
+        """EAR, blink and yawn thresholds relative to the profile's baselines"""
+        low, high = EAR_THRESHOLD_RANGE
+        ear_threshold = min(high, max(low, self.profile['ear_open'] * self.ear_ratio))
+        low, high = YAWN_THRESHOLD_RANGE
+        yawn_threshold = min(high, max(low, self.profile['mar_rest'] + self.yawn_margin))
+        return {'EAR_THRESHOLD': ear_threshold, 'BLINK_THRESHOLD': ear_threshold, 'YAWN_THRESHOLD': yawn_threshold}
+
+    def apply(self, detector):
+        """Set a detector's thresholds from the profile"""
+        for name, value in self.thresholds().items():
+            setattr(detector, name, value)
+
+    def describe(self):
+        """One-line summary for logs and the GUI"""
+        if not self.calibrated:
+            return f"calibrating {self.elapsed:.0f}/{self.duration:.0f} s"
+        thresholds = self.thresholds()
+        origin = 'stored' if self.loaded else 'calibrated'
+        return (f"{origin}: open EAR {self.profile['ear_open']:.3f}, resting MAR {self.profile['mar_rest']:.3f} "
+                f"-> EAR < {thresholds['EAR_THRESHOLD']:.3f}, MAR > {thresholds['YAWN_THRESHOLD']:.3f}")
+
+def add_calibration_arguments(parser):
+    """Command-line options for per-driver calibration"""
+    parser.add_argument("--calibrate", action="store_true",
+                        help="learn the driver's EAR/MAR baseline and adapt the thresholds to it")
+    parser.add_argument("--driver-id", default=None,
+                        help="key of the driver's stored profile (default: the camera ID)")
+    parser.add_argument("--profiles", default="driver_profiles.json", help="driver profile store")
+    parser.add_argument("--recalibrate", action="store_true", help="ignore a stored profile and calibrate again")
+    parser.add_argument("--calibration-seconds", type=float, default=60.0,
+                        help="seconds of face time used for calibration")
+
+def calibration_from_args(args, default_key):
+    """Build the calibration selected by add_calibration_arguments options, or None"""
+    if not args.calibrate:
+        return None
+    calibration = DriverCalibration(args.calibration_seconds, store=ProfileStore(args.profiles),
+                                    key=args.driver_id or default_key)
+    if args.recalibrate:
+        calibration.restart()
+    return calibration
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List or remove stored driver profiles")
+    parser.add_argument("--profiles", default="driver_profiles.json")
+    parser.add_argument("--remove", nargs="+", default=[], metavar="KEY", help="delete these profiles")
+    args = parser.parse_args()
+
+    store = ProfileStore(args.profiles)
+    for key in args.remove:
+        if not store.remove(key):
+            print(f"No profile for {key}")
+    for key in store.keys():
+        calibration = DriverCalibration(store=store, key=key)
+        print(f"{key}: {calibration.describe()}, {calibration.profile['samples']} samples, "
+              f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(calibration.profile['calibrated_at']))}")
@@ -0,0 +1,182 @@
+import math
+from collections import deque
+
+class TimeEMA:
+    def __init__(self, time_constant):
+        # Exponential moving average whose decay depends on elapsed time, not sample count
+        self.time_constant = time_constant
+        self.value = None
+        self.last_time = None
+
+    def update(self, timestamp, value):
+        """Fold in a sample taken at timestamp (seconds)"""
+        if self.value is None or self.time_constant <= 0:
+            self.value = value
+        else:
+            dt = max(0.0, timestamp - self.last_time)
+            alpha = 1.0 - math.exp(-dt / self.time_constant)
+            self.value += alpha * (value - self.value)
+        self.last_time = timestamp
+        return self.value
+
+class SlidingWindow:
+    def __init__(self, duration, max_hold=None):
+        # Time-weighted mean and variance over the last `duration` seconds, O(1) amortized per sample.
+        # Each sample holds its value until the next one arrives, so dropped frames don't bias the stats.
+        self.duration = duration
+        # Longest time one sample may hold its value; across a longer gap (face lost) the
+        # time after it is left out instead of being filled with a stale value (None = no limit)
+        self.max_hold = max_hold
+        self.samples = deque()  # (start, end, value)
+        self.weight = 0.0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.last = None  # (timestamp, value) of the newest, still-open sample
+
+    def update(self, timestamp, value):
+        """Close the previous sample at timestamp, open a new one and drop expired time"""
+        if self.last is not None:
+            start, previous = self.last
+            end = timestamp if self.max_hold is None else min(timestamp, start + self.max_hold)
+            if end > start:
+                self.add(start, end, previous)
+        self.last = (timestamp, value)
+        self.expire(timestamp - self.duration)
+
+    def add(self, start, end, value):
+        """Add a closed sample covering [start, end)"""
+        span = end - start
+        self.samples.append((start, end, value))
+        self.weight += span
+        self.total += span * value
+        self.total_sq += span * value * value
+
+    def expire(self, cutoff):
+        """Remove time before cutoff, trimming a sample that straddles it"""
+        while self.samples and self.samples[0][0] < cutoff:
+            start, end, value = self.samples.popleft()
+            removed = min(end, cutoff) - start
+            self.weight -= removed
+            self.total -= removed * value
+            self.total_sq -= removed * value * value
+            if end > cutoff:
+                self.samples.appendleft((cutoff, end, value))
+                break
+
+    def mean(self):
+        """Time-weighted mean over the window"""
+        if self.weight <= 1e-9:
+            return self.last[1] if self.last is not None else 0.0
+        return self.total / self.weight
+
+    def variance(self):
+        """Time-weighted variance over the window"""
+        if self.weight <= 1e-9:
+            return 0.0
+        mean = self.total / self.weight
+        return max(0.0, self.total_sq / self.weight - mean * mean)
+
+    def covered(self):
+        """Seconds of data currently in the window"""
+        return self.weight
+
+class DecisionEngine:
+    def __init__(self, ear_threshold=0.15, yawn_threshold=0.35, blink_threshold=0.15,
+                 eye_closed_seconds=0.1, yawn_seconds=0.1, smoothing_seconds=0.0,
+                 stats_window=5.0, perclos_window=60.0, perclos_threshold=None, max_gap=2.0):
+        # Feature thresholds (same meaning as DrowsinessDetector's)
+        self.ear_threshold = ear_threshold
+        self.yawn_threshold = yawn_threshold
+        self.blink_threshold = blink_threshold
+
+        # How long eyes must stay closed / the mouth open before it counts. Three consecutive
+        # frames at 30 FPS span only 2/30 = 0.067 s, so the 0.1 s defaults are slightly stricter
+        # than CONSECUTIVE_FRAMES = 3 but, unlike it, don't depend on the frame rate
+        self.eye_closed_seconds = eye_closed_seconds
+        self.yawn_seconds = yawn_seconds
+
+        # Optional EMA smoothing applied before thresholding (0 = raw values)
+        self.smoothing_seconds = smoothing_seconds
+        # Rolling EAR/MAR statistics and PERCLOS (fraction of time with eyes closed);
+        # PERCLOS at or above perclos_threshold also raises drowsiness (None = report only)
+        self.stats_window = stats_window
+        self.perclos_window = perclos_window
+        self.perclos_threshold = perclos_threshold
+        # A gap longer than this (e.g. the face was lost) restarts the run timers, and the
+        # rolling statistics don't count more than this much of it
+        self.max_gap = max_gap
+
+        self.reset()
+
+    def reset(self):
+        """Clear all streaming state"""
+        self.ear_ema = TimeEMA(self.smoothing_seconds)
+        self.mar_ema = TimeEMA(self.smoothing_seconds)
+        self.ear_window = SlidingWindow(self.stats_window, self.max_gap)
+        self.mar_window = SlidingWindow(self.stats_window, self.max_gap)
+        self.perclos = SlidingWindow(self.perclos_window, self.max_gap)
+        self.closed_since = None
+        self.yawn_since = None
+        self.last_time = None
+        self.last_ear = 1.0
+
+    def copy(self):
+        """A fresh engine with the same configuration, e.g. for another face"""
+        return DecisionEngine(self.ear_threshold, self.yawn_threshold, self.blink_threshold,
+                              self.eye_closed_seconds, self.yawn_seconds, self.smoothing_seconds,
+                              self.stats_window, self.perclos_window, self.perclos_threshold, self.max_gap)
+
+    def update(self, timestamp, ear, mar):
+        """Process one timestamped sample and return a get_detection_status-style dict"""
+        if self.last_time is not None and timestamp - self.last_time > self.max_gap:
+            self.closed_since = None
+            self.yawn_since = None
+        self.last_time = timestamp
+
+        ear_smoothed = self.ear_ema.update(timestamp, ear)
+        mar_smoothed = self.mar_ema.update(timestamp, mar)
+        self.ear_window.update(timestamp, ear)
+        self.mar_window.update(timestamp, mar)
+
+        eyes_closed = ear_smoothed < self.ear_threshold
+        yawning = mar_smoothed > self.yawn_threshold
+        self.perclos.update(timestamp, 1.0 if eyes_closed else 0.0)
+
+        # Duration of the current eye-closure and yawn runs
+        if eyes_closed:
+            self.closed_since = timestamp if self.closed_since is None else self.closed_since
+        else:
+            self.closed_since = None
+        if yawning:
+            self.yawn_since = timestamp if self.yawn_since is None else self.yawn_since
+        else:
+            self.yawn_since = None
+        closed_for = timestamp - self.closed_since if self.closed_since is not None else 0.0
+        yawn_for = timestamp - self.yawn_since if self.yawn_since is not None else 0.0
+
+        blink = ear < self.blink_threshold and self.last_ear >= self.blink_threshold
+        self.last_ear = ear
+
+        perclos = self.perclos.mean()
+        eyes_drowsy = self.closed_since is not None and closed_for >= self.eye_closed_seconds
+        yawn_drowsy = self.yawn_since is not None and yawn_for >= self.yawn_seconds
+        perclos_drowsy = self.perclos_threshold is not None and perclos >= self.perclos_threshold \
+            and self.perclos.covered() >= self.perclos_window * 0.5
+
+        return {
+            'eye_status': 'Drowsy' if eyes_drowsy else 'Normal',
+            'yawn_status': 'Yawning' if yawning else 'Normal',
+            'blink_detected': blink,
+            'yawn_detected': yawning,
+            'drowsiness_level': 1 if (eyes_drowsy or yawn_drowsy or perclos_drowsy) else 0,
+            'ear_value': ear,
+            'mar_value': mar,
+            'ear_smoothed': ear_smoothed,
+            'mar_smoothed': mar_smoothed,
+            'ear_mean': self.ear_window.mean(),
+            'ear_std': math.sqrt(self.ear_window.variance()),
+            'mar_mean': self.mar_window.mean(),
+            'perclos': perclos,
+            'eyes_closed_seconds': closed_for,
+            'yawn_seconds': yawn_for,
+        }
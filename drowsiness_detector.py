@@ -1,20 +1,27 @@
 import cv2
-import numpy as np
-import dlib
 from scipy.spatial import distance
-import time
+import argparse
 import threading
-import pygame
+import time
+from face_tracker import FaceTracker
+from region_detector import RegionDetector
+from features import compute_features
+from multi_face import MultiFaceMonitor
+from profiling import Profiler
+from alarm_service import AlarmService, PygameAudioBackend, FileAudioBackend
+from decision_engine import DecisionEngine
+from governor import LoadGovernor
+from pipeline import LatestFrameReader
+from session_recording import SessionRecorder
+from overlay import OverlayRenderer, OVERLAY_LEVELS
+from landmark_backends import create_backend, add_backend_arguments, backend_from_args
+from telemetry import add_telemetry_arguments, publisher_from_args
+from calibration import add_calibration_arguments, calibration_from_args
 
-class DrowsinessDetector:
-    def __init__(self):
-        # Initialize dlib's face detector and facial landmark predictor
-        self.detector = dlib.get_frontal_face_detector()
-        self.predictor = dlib.shape_predictor('shape_predictor_68_face_landmarks.dat')
-        
-        # Initialize pygame for alarm sound
-        pygame.mixer.init()
-        self.alarm_sound = pygame.mixer.Sound('alarm.wav')
+class FaceState:
+    def __init__(self, decision_engine=None):
+        # Decision state for one face: thresholds, frame counters and the alarm flag. Every
+        # tracked face has its own; DrowsinessDetector adds face location, landmarks and sound.
         
         # Constants for drowsiness detection - made more sensitive
         self.EAR_THRESHOLD = 0.15  # Lowered threshold for eye detection
@@ -22,6 +29,9 @@ class DrowsinessDetector:
         self.CONSECUTIVE_FRAMES = 3  # Reduced frames for faster detection
         self.BLINK_THRESHOLD = 0.15  # Threshold for blink detection
         
+        # Optional time-based decision engine; when set it replaces the frame counters below
+        self.decision_engine = decision_engine
+        
         # Initialize counters and state
         self.eye_counter = 0
         self.yawn_counter = 0
@@ -30,38 +40,18 @@ class DrowsinessDetector:
         self.last_ear = 1.0
         self.blink_detected = False
         self.last_mar = 0.0  # Track last MAR value
-        self.alarm_thread = None
-        
-    def calculate_ear(self, eye_points):
-        """Calculate Eye Aspect Ratio with improved accuracy"""
-        try:
-            # Calculate vertical distances
-            A = distance.euclidean(eye_points[1], eye_points[5])
-            B = distance.euclidean(eye_points[2], eye_points[4])
-            # Calculate horizontal distance
-            C = distance.euclidean(eye_points[0], eye_points[3])
-            # Calculate EAR
-            ear = (A + B) / (2.0 * C)
-            return ear
-        except Exception as e:
-            print(f"Error calculating EAR: {e}")
-            return 1.0
     
-    def calculate_yawn(self, mouth_points):
-        """Calculate mouth aspect ratio for yawn detection with improved accuracy"""
-        try:
-            # Calculate vertical distances
-            A = distance.euclidean(mouth_points[13], mouth_points[19])
-            B = distance.euclidean(mouth_points[14], mouth_points[18])
-            C = distance.euclidean(mouth_points[15], mouth_points[17])
-            # Calculate horizontal distance
-            D = distance.euclidean(mouth_points[12], mouth_points[16])
-            # Calculate MAR
-            mar = (A + B + C) / (2.0 * D)
-            return mar
-        except Exception as e:
-            print(f"Error calculating MAR: {e}")
-            return 0.0
+    def reset(self):
+        """Clear the counters, the decision engine and the alarm"""
+        self.stop_alarm()
+        self.eye_counter = 0
+        self.yawn_counter = 0
+        self.blink_counter = 0
+        self.last_ear = 1.0
+        self.blink_detected = False
+        self.last_mar = 0.0
+        if self.decision_engine is not None:
+            self.decision_engine.reset()
     
     def detect_blink(self, current_ear):
         """Detect if a blink occurred"""
@@ -78,28 +68,39 @@ class DrowsinessDetector:
             return True
         return False
     
-    def play_alarm(self):
-        """Play alarm sound in a separate thread"""
-        while self.alarm_on:
-            self.alarm_sound.play()
-            time.sleep(1)
-            
     def start_alarm(self):
-        """Start the alarm if it's not already running"""
-        if not self.alarm_on:
-            self.alarm_on = True
-            self.alarm_thread = threading.Thread(target=self.play_alarm)
-            self.alarm_thread.daemon = True
-            self.alarm_thread.start()
-            
+        """Flag this face as alarming"""
+        self.alarm_on = True
+    
     def stop_alarm(self):
-        """Stop the alarm"""
+        """Clear the alarm flag"""
         self.alarm_on = False
-        if self.alarm_thread:
-            self.alarm_thread.join(timeout=1)
     
-    def get_detection_status(self, ear, mar):
+    def get_timed_status(self, ear, mar, timestamp):
+        """Get detection status from the time-based decision engine"""
+        engine = self.decision_engine
+        engine.ear_threshold = self.EAR_THRESHOLD
+        engine.yawn_threshold = self.YAWN_THRESHOLD
+        engine.blink_threshold = self.BLINK_THRESHOLD
+        status = engine.update(time.perf_counter() if timestamp is None else timestamp, ear, mar)
+        
+        if status['blink_detected']:
+            self.blink_counter += 1
+        if status['drowsiness_level'] > 0:
+            self.start_alarm()
+        else:
+            self.stop_alarm()
+        
+        self.blink_detected = status['blink_detected']
+        self.last_ear = ear
+        self.last_mar = mar
+        return status
+    
+    def get_detection_status(self, ear, mar, timestamp=None):
         """Get detailed detection status"""
+        if self.decision_engine is not None:
+            return self.get_timed_status(ear, mar, timestamp)
+        
         status = {
             'eye_status': 'Normal',
             'yawn_status': 'Normal',
@@ -146,86 +147,310 @@ class DrowsinessDetector:
         self.last_mar = mar
         
         return status
+
+class DrowsinessDetector(FaceState):
+    def __init__(self, keyframe_interval=1, redetect_threshold=7.0, detection_scale=1.0, roi_padding=None,
+                 enable_audio=True, detector=None, predictor=None, focus='all', alarm_service=None,
+                 decision_engine=None, predictor_path=None, backend=None):
+        # Face detector and landmark predictor, dlib's HOG detector and 68-point predictor by default.
+        # Models come from the process-wide registry and are only loaded on first use (or by
+        # load_models), unless already-loaded models or a backend are passed in to be shared.
+        self.backend = backend if backend is not None else create_backend(
+            predictor_path=predictor_path, detector=detector, predictor=predictor)
+        self.detector = self.backend.detector
+        self.predictor = self.backend.predictor
+        
+        # Search a downscaled image (optionally only around the last face) on keyframes,
+        # and track faces in between; landmarks still use the full-resolution frame
+        self.region_detector = RegionDetector(self.detector, detection_scale, roi_padding)
+        self.face_tracker = FaceTracker(self.region_detector, keyframe_interval, redetect_threshold)
+        
+        # Per-face tracks with their own counters; focus='largest'/'driver' monitors a single face
+        self.face_monitor = MultiFaceMonitor(self, focus)
+        
+        # Per-stage timing instrumentation, disabled (and near free) by default
+        self.profiler = Profiler()
+        
+        # Overlay drawing, shared with the GUI; its cost is recorded as the 'draw' stage
+        self.overlay = OverlayRenderer('debug', self.profiler)
+        
+        # Alarm service playing the sound on its own thread; silent detectors (headless runs)
+        # only keep the alarm_on flag unless a service is passed in
+        self.alarm_service = alarm_service
+        if self.alarm_service is None and enable_audio:
+            self.alarm_service = AlarmService(PygameAudioBackend('alarm.wav'))
+        
+        # Thresholds, counters, alarm flag and optional time-based decision engine
+        super().__init__(decision_engine)
+        
+        # Optional load governor that sheds work per frame to stay within a latency budget
+        self.governor = None
+        
+        # Optional session recorder; every analysed face is appended to it for later replay
+        self.recorder = None
+        
+        # Optional telemetry publisher; every frame's results and the alarm state are handed to it
+        self.telemetry = None
+        
+        # Optional per-driver calibration; once the driver's baseline is known it sets the thresholds
+        self.calibration = None
+        
+    def load_models(self):
+        """Load the face detector and predictor now instead of on the first frame"""
+        self.backend.load()
+        self.profiler.startup.mark('models')
+    
+    def calculate_ear(self, eye_points):
+        """Calculate Eye Aspect Ratio with improved accuracy"""
+        try:
+            # Calculate vertical distances
+            A = distance.euclidean(eye_points[1], eye_points[5])
+            B = distance.euclidean(eye_points[2], eye_points[4])
+            # Calculate horizontal distance
+            C = distance.euclidean(eye_points[0], eye_points[3])
+            # Calculate EAR
+            ear = (A + B) / (2.0 * C)
+            return ear
+        except Exception as e:
+            print(f"Error calculating EAR: {e}")
+            return 1.0
+    
+    def calculate_yawn(self, mouth_points):
+        """Calculate mouth aspect ratio for yawn detection with improved accuracy"""
+        try:
+            # Calculate vertical distances
+            A = distance.euclidean(mouth_points[13], mouth_points[19])
+            B = distance.euclidean(mouth_points[14], mouth_points[18])
+            C = distance.euclidean(mouth_points[15], mouth_points[17])
+            # Calculate horizontal distance
+            D = distance.euclidean(mouth_points[12], mouth_points[16])
+            # Calculate MAR
+            mar = (A + B + C) / (2.0 * D)
+            return mar
+        except Exception as e:
+            print(f"Error calculating MAR: {e}")
+            return 0.0
+    
+    def locate_faces(self, gray):
+        """Find face rectangles, running the full detector only on keyframes"""
+        with self.profiler.stage('detect'):
+            return self.face_tracker.update(gray)
+    
+    def extract_features(self, gray, face):
+        """Predict landmarks for a face and compute its EAR and MAR"""
+        with self.profiler.stage('landmarks'):
+            landmarks = self.backend.landmarks(gray, face)
+        
+        # Calculate EAR for both eyes and MAR in one vectorized pass
+        with self.profiler.stage('features'):
+            features = compute_features(landmarks)
+        
+        return landmarks, features['ear'], features['mar']
+    
+    def analyze_faces(self, gray, drive_alarm=True, timestamp=None):
+        """Score every monitored face with its own state and drive the alarm from the results"""
+        results = self.face_monitor.update(gray, timestamp)
+        if self.calibration is not None and results:
+            # The longest-tracked face is taken to be the driver
+            driver = min(results, key=lambda result: result['track_id'])
+            self.update_calibration(driver['ear'], driver['mar'], timestamp)
+        if self.recorder is not None:
+            # Recordings use wall-clock time; a perf_counter() capture time is shifted onto it
+            recorded_at = time.time() - (0.0 if timestamp is None else time.perf_counter() - timestamp)
+            for result in results:
+                self.recorder.record(recorded_at, result['face'], result['landmarks'], result['ear'],
+                                     result['mar'], result['track_id'])
+        if results and drive_alarm:
+            if any(result['status']['drowsiness_level'] > 0 for result in results):
+                self.start_alarm()
+            else:
+                self.stop_alarm()
+        return results
+    
+    def set_calibration(self, calibration):
+        """Use a driver calibration, adopting a stored profile's thresholds right away"""
+        self.calibration = calibration
+        if calibration is not None and calibration.calibrated:
+            calibration.apply(self)
+            print(f"[calibration] {calibration.key}: {calibration.describe()}")
+    
+    def update_calibration(self, ear, mar, timestamp=None):
+        """Feed the driver's features to the calibration and adopt its thresholds once it completes"""
+        calibration = self.calibration
+        if calibration is None or calibration.calibrated:
+            return
+        if calibration.update(time.perf_counter() if timestamp is None else timestamp, ear, mar):
+            calibration.apply(self)
+            print(f"[calibration] {calibration.key}: {calibration.describe()}")
+    
+    def create_track_state(self):
+        """Create the decision state for one tracked face, with this detector's thresholds"""
+        state = FaceState(self.decision_engine.copy() if self.decision_engine is not None else None)
+        self.copy_thresholds_to(state)
+        return state
+    
+    def copy_thresholds_to(self, other):
+        """Copy detection thresholds to another detector or face state"""
+        other.EAR_THRESHOLD = self.EAR_THRESHOLD
+        other.YAWN_THRESHOLD = self.YAWN_THRESHOLD
+        other.CONSECUTIVE_FRAMES = self.CONSECUTIVE_FRAMES
+        other.BLINK_THRESHOLD = self.BLINK_THRESHOLD
+    
+    def start_alarm(self):
+        """Start the alarm if it's not already running (never blocks)"""
+        if not self.alarm_on:
+            self.alarm_on = True
+            if self.alarm_service is not None:
+                self.alarm_service.start()
+            
+    def stop_alarm(self):
+        """Stop the alarm (never blocks)"""
+        if self.alarm_on:
+            self.alarm_on = False
+            if self.alarm_service is not None:
+                self.alarm_service.stop()
+    
+    def reset_state(self):
+        """Clear per-person counters and tracking state, e.g. before analysing a new video"""
+        self.reset()
+        self.face_tracker.reset()
+        self.region_detector.reset()
+        self.face_monitor.reset()
     
     def detect_drowsiness(self):
         """Main function to detect drowsiness"""
+        # Load the models while the camera opens; both take a noticeable part of startup
+        loader = threading.Thread(target=self.load_models, daemon=True)
+        loader.start()
         cap = cv2.VideoCapture(0)
+        self.profiler.startup.mark('camera')
+        loader.join()
+        # With a governor, always work on the newest frame instead of draining the camera buffer
+        reader = LatestFrameReader(cap) if self.governor is not None else None
         
         while True:
-            ret, frame = cap.read()
+            with self.profiler.stage('capture'):
+                if reader is not None:
+                    ret, frame, captured_at = reader.read()
+                else:
+                    ret, frame = cap.read()
+                    captured_at = time.perf_counter()
             if not ret:
                 break
                 
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.detector(gray)
+            with self.profiler.stage('gray'):
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             
-            for face in faces:
-                landmarks = self.predictor(gray, face)
-                landmarks = np.array([[p.x, p.y] for p in landmarks.parts()])
-                
-                # Get eye landmarks
-                left_eye = landmarks[36:42]
-                right_eye = landmarks[42:48]
-                
-                # Calculate EAR for both eyes
-                left_ear = self.calculate_ear(left_eye)
-                right_ear = self.calculate_ear(right_eye)
-                ear = (left_ear + right_ear) / 2.0
-                
-                # Get mouth landmarks
-                mouth = landmarks[48:68]
-                mar = self.calculate_yawn(mouth)
-                
-                # Get detection status
-                status = self.get_detection_status(ear, mar)
-                
-                # Draw landmarks
-                for (x, y) in landmarks:
-                    cv2.circle(frame, (x, y), 1, (0, 255, 0), -1)
-                
-                # Add visual feedback for yawn detection
-                if status['yawn_detected']:
-                    cv2.putText(frame, "YAWNING!", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-                    # Draw rectangle around mouth
-                    mouth_points = landmarks[48:68]
-                    x_coords = [p[0] for p in mouth_points]
-                    y_coords = [p[1] for p in mouth_points]
-                    x_min, x_max = min(x_coords), max(x_coords)
-                    y_min, y_max = min(y_coords), max(y_coords)
-                    cv2.rectangle(frame, (x_min-10, y_min-10), (x_max+10, y_max+10), (0, 0, 255), 2)
-                
-                # Add visual feedback for eye closure
-                if status['eye_status'] == 'Drowsy':
-                    cv2.putText(frame, "DROWSY EYES!", (10, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-                    # Draw rectangles around eyes
-                    left_eye_points = landmarks[36:42]
-                    right_eye_points = landmarks[42:48]
-                    
-                    for eye_points in [left_eye_points, right_eye_points]:
-                        x_coords = [p[0] for p in eye_points]
-                        y_coords = [p[1] for p in eye_points]
-                        x_min, x_max = min(x_coords), max(x_coords)
-                        y_min, y_max = min(y_coords), max(y_coords)
-                        cv2.rectangle(frame, (x_min-5, y_min-5), (x_max+5, y_max+5), (0, 0, 255), 2)
-                
-                # Display EAR and MAR values
-                cv2.putText(frame, f"EAR: {ear:.2f}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                cv2.putText(frame, f"MAR: {mar:.2f}", (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                
-                # Display alarm status
-                if self.alarm_on:
-                    cv2.putText(frame, "ALARM ACTIVE!", (10, 150), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            # Each tracked face keeps its own counters; time-based decisions use the capture time
+            results = self.analyze_faces(gray, timestamp=captured_at)
+            startup = self.profiler.startup
+            if 'first_frame' not in startup.milestones:
+                startup.mark('first_frame')
+            if results and 'first_face' not in startup.milestones:
+                startup.mark('first_face')
+                print(startup.format_line())
+            
+            # Let the governor adjust the work per frame; at high load only minimal overlays are drawn
+            level = None
+            if self.governor is not None:
+                self.governor.update(time.perf_counter() - captured_at)
+                if not self.governor.draw_enabled and self.overlay.level == 'debug':
+                    level = 'minimal'
+            if self.telemetry is not None:
+                self.telemetry.record(results, self.alarm_on, self.EAR_THRESHOLD)
+            self.overlay.render(frame, results, self.alarm_on, level)
             
             # Display the frame
-            cv2.imshow("Drowsiness Detection", frame)
+            with self.profiler.stage('display'):
+                cv2.imshow("Drowsiness Detection", frame)
+                key = cv2.waitKey(1) & 0xFF
+            self.profiler.end_frame()
             
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            if key == ord('q'):
                 self.stop_alarm()  # Ensure alarm is stopped when quitting
                 break
         
-        cap.release()
+        if reader is not None:
+            reader.release()
+        else:
+            cap.release()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.telemetry is not None:
+            self.telemetry.stop()
         cv2.destroyAllWindows()
 
 if __name__ == "__main__":
-    detector = DrowsinessDetector()
+    parser = argparse.ArgumentParser(description="Webcam drowsiness detection")
+    parser.add_argument("--keyframe-interval", type=int, default=1,
+                        help="run the full face detector every N frames and track in between (1 = every frame)")
+    parser.add_argument("--redetect-threshold", type=float, default=7.0,
+                        help="tracker confidence below which the face is re-detected")
+    parser.add_argument("--detection-scale", type=float, default=1.0,
+                        help="downscale factor for the face detection image (e.g. 0.5 on 1080p cameras)")
+    parser.add_argument("--roi-padding", type=float, default=None,
+                        help="only search around the last face, padded by this fraction of its size")
+    parser.add_argument("--focus", choices=['all', 'largest', 'driver'], default='all',
+                        help="monitor every face, only the largest, or only the one in the driver region")
+    parser.add_argument("--driver-region", type=float, nargs=4, default=None, metavar=('X0', 'Y0', 'X1', 'Y1'),
+                        help="driver seat region as fractions of the frame, used with --focus driver")
+    parser.add_argument("--smoothing", type=float, default=0.0,
+                        help="EMA weight of the previous EAR/MAR value per face (0 = off)")
+    parser.add_argument("--max-landmark-age", type=int, default=0,
+                        help="reuse a face's landmarks for up to N frames while it stays still")
+    parser.add_argument("--profile", action="store_true",
+                        help="record per-stage timings and show them on the frame")
+    parser.add_argument("--profile-log-interval", type=float, default=None,
+                        help="print a timing summary every N seconds")
+    parser.add_argument("--profile-jsonl", default=None,
+                        help="append timing summaries to this JSON lines file (with --profile-log-interval)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="serve Prometheus-style metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--time-based", action="store_true",
+                        help="decide on elapsed time instead of consecutive frame counts")
+    parser.add_argument("--eye-closed-seconds", type=float, default=0.1,
+                        help="with --time-based: how long eyes must stay closed to count as drowsy")
+    parser.add_argument("--perclos-threshold", type=float, default=None,
+                        help="with --time-based: also alarm when PERCLOS over the last minute reaches this")
+    parser.add_argument("--latency-budget", type=float, default=None,
+                        help="target capture-to-decision latency in ms; sheds work per frame to meet it")
+    parser.add_argument("--alarm-log", default=None,
+                        help="log alarm sounds to this file instead of playing them (headless testing)")
+    parser.add_argument("--predictor", default=None,
+                        help="path of the 68-point landmark model (default: shape_predictor_68_face_landmarks.dat)")
+    add_backend_arguments(parser)
+    parser.add_argument("--overlay", choices=OVERLAY_LEVELS, default='debug',
+                        help="overlay detail: nothing, status text and alerts only, or also landmarks")
+    parser.add_argument("--record", default=None,
+                        help="append per-face landmarks and EAR/MAR to this session file for replay")
+    add_telemetry_arguments(parser)
+    add_calibration_arguments(parser)
+    args = parser.parse_args()
+    
+    alarm_service = AlarmService(FileAudioBackend(args.alarm_log)) if args.alarm_log else None
+    decision_engine = None
+    if args.time_based:
+        decision_engine = DecisionEngine(eye_closed_seconds=args.eye_closed_seconds,
+                                         perclos_threshold=args.perclos_threshold)
+    detector = DrowsinessDetector(args.keyframe_interval, args.redetect_threshold,
+                                  args.detection_scale, args.roi_padding, focus=args.focus,
+                                  alarm_service=alarm_service, decision_engine=decision_engine,
+                                  backend=backend_from_args(args))
+    detector.face_monitor.driver_region = args.driver_region or detector.face_monitor.driver_region
+    detector.face_monitor.smoothing = args.smoothing
+    detector.face_monitor.max_landmark_age = args.max_landmark_age
+    detector.overlay.level = args.overlay
+    if args.record:
+        detector.recorder = SessionRecorder(args.record)
+    detector.set_calibration(calibration_from_args(args, 'camera0'))
+    detector.telemetry = publisher_from_args(args)
+    if detector.telemetry is not None:
+        detector.telemetry.start()
+    if args.latency_budget is not None:
+        detector.governor = LoadGovernor(detector, args.latency_budget)
+    detector.profiler.enabled = args.profile or args.metrics_port is not None
+    detector.profiler.log_interval = args.profile_log_interval
+    detector.profiler.jsonl_path = args.profile_jsonl
+    if args.metrics_port is not None:
+        detector.profiler.serve(args.metrics_port)
     detector.detect_drowsiness()
\ No newline at end of file
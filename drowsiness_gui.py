@@ -1,20 +1,35 @@
+import argparse
+import threading
 import tkinter as tk
 from tkinter import ttk
 import cv2
-from PIL import Image, ImageTk
-import threading
+from PIL import ImageTk
 from drowsiness_detector import DrowsinessDetector
-import numpy as np
+from pipeline import FramePipeline
+from frame_buffers import FrameBuffers
+from governor import LoadGovernor
+from alarm_service import AlarmService, PygameAudioBackend
+from landmark_backends import add_backend_arguments, backend_from_args
+from overlay import OVERLAY_LEVELS
+from telemetry import add_telemetry_arguments, publisher_from_args
+from calibration import add_calibration_arguments, calibration_from_args
+from collections import deque
 import time
 
 class DrowsinessGUI:
-    def __init__(self, root):
+    def __init__(self, root, predictor_path=None, backend=None, telemetry=None, calibration=None,
+                 latency_budget=100.0):
         self.root = root
         self.root.title("Drowsiness Detection System")
         self.root.geometry("1200x800")
         
-        # Initialize the drowsiness detector
-        self.detector = DrowsinessDetector()
+        # Initialize the drowsiness detector; its models and the alarm sound are loaded
+        # in the background so the window shows immediately
+        self.detector = DrowsinessDetector(enable_audio=False, predictor_path=predictor_path, backend=backend)
+        self.startup = self.detector.profiler.startup
+        self.detector.overlay.show_profile = False  # Timings are shown in the status panel instead
+        self.model_state = 'loading'
+        self.model_error = None
         
         # Create main frame
         self.main_frame = ttk.Frame(self.root)
@@ -23,10 +38,14 @@ class DrowsinessGUI:
         # Create video frame
         self.video_frame = ttk.LabelFrame(self.main_frame, text="Video Feed")
         self.video_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.video_frame.pack_propagate(False)  # Frame size must not follow the image size
         
         # Create video label
         self.video_label = ttk.Label(self.video_frame)
         self.video_label.pack(fill=tk.BOTH, expand=True)
+        self.video_label.bind("<Configure>", self.on_video_resize)
+        self.root.bind("<Map>", self.on_visibility_change)
+        self.root.bind("<Unmap>", self.on_visibility_change)
         
         # Create control panel
         self.control_frame = ttk.LabelFrame(self.main_frame, text="Control Panel")
@@ -66,6 +85,34 @@ class DrowsinessGUI:
         self.alarm_status = ttk.Label(self.alarm_frame, text="Alarm Status: Off")
         self.alarm_status.pack(side=tk.LEFT)
         
+        # Model readiness and startup timings
+        self.model_status = ttk.Label(self.status_frame, text="Models: loading...")
+        self.model_status.pack(fill=tk.X, padx=5, pady=2)
+        
+        # Pipeline queue depths and latency
+        self.pipeline_frame = ttk.Frame(self.status_frame)
+        self.pipeline_frame.pack(fill=tk.X, padx=5, pady=2)
+        self.pipeline_status = ttk.Label(self.pipeline_frame, text="Queues: -")
+        self.pipeline_status.pack(side=tk.LEFT)
+        self.latency_status = ttk.Label(self.pipeline_frame, text="Latency: -")
+        self.latency_status.pack(side=tk.RIGHT)
+        
+        # Render cost and buffer allocations
+        self.render_frame_stats = ttk.Frame(self.status_frame)
+        self.render_frame_stats.pack(fill=tk.X, padx=5, pady=2)
+        self.render_status = ttk.Label(self.render_frame_stats, text="Render: -")
+        self.render_status.pack(side=tk.LEFT)
+        self.allocation_status = ttk.Label(self.render_frame_stats, text="Allocations: 0")
+        self.allocation_status.pack(side=tk.RIGHT)
+        
+        # Per-driver calibration progress or the learned baseline
+        self.calibration_status = ttk.Label(self.status_frame, text="Calibration: Off")
+        self.calibration_status.pack(fill=tk.X, padx=5, pady=2)
+        
+        # Per-stage timings, shown when profiling is enabled
+        self.profile_status = ttk.Label(self.status_frame, text="", justify=tk.LEFT)
+        self.profile_status.pack(fill=tk.X, padx=5, pady=2)
+        
         # Add threshold controls
         self.threshold_frame = ttk.LabelFrame(self.control_frame, text="Thresholds")
         self.threshold_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -73,13 +120,15 @@ class DrowsinessGUI:
         # EAR threshold
         ttk.Label(self.threshold_frame, text="EAR Threshold:").pack(fill=tk.X, padx=5, pady=2)
         self.ear_threshold = ttk.Scale(self.threshold_frame, from_=0.1, to=0.4, 
-                                     orient=tk.HORIZONTAL, value=self.detector.EAR_THRESHOLD)
+                                     orient=tk.HORIZONTAL, value=self.detector.EAR_THRESHOLD,
+                                     command=self.update_thresholds)
         self.ear_threshold.pack(fill=tk.X, padx=5, pady=2)
         
         # Yawn threshold
         ttk.Label(self.threshold_frame, text="Yawn Threshold:").pack(fill=tk.X, padx=5, pady=2)
         self.yawn_threshold = ttk.Scale(self.threshold_frame, from_=1, to=30, 
-                                      orient=tk.HORIZONTAL, value=self.detector.YAWN_THRESHOLD)
+                                      orient=tk.HORIZONTAL, value=self.detector.YAWN_THRESHOLD,
+                                      command=self.update_thresholds)
         self.yawn_threshold.pack(fill=tk.X, padx=5, pady=2)
         
         # Add control buttons
@@ -87,7 +136,7 @@ class DrowsinessGUI:
         self.button_frame.pack(fill=tk.X, padx=5, pady=5)
         
         self.start_button = ttk.Button(self.button_frame, text="Start Detection", 
-                                     command=self.start_detection)
+                                     command=self.start_detection, state=tk.DISABLED)
         self.start_button.pack(side=tk.LEFT, padx=5, pady=5)
         
         self.stop_button = ttk.Button(self.button_frame, text="Stop Detection", 
@@ -99,158 +148,318 @@ class DrowsinessGUI:
                                      command=self.toggle_alarm)
         self.alarm_button.pack(side=tk.LEFT, padx=5, pady=5)
         
-        # Add debug mode toggle
-        self.debug_var = tk.BooleanVar(value=True)
-        self.debug_check = ttk.Checkbutton(self.button_frame, text="Debug Mode", 
-                                         variable=self.debug_var)
-        self.debug_check.pack(side=tk.LEFT, padx=5, pady=5)
+        # Learn the driver's baseline again (only with a calibration)
+        self.recalibrate_button = ttk.Button(self.button_frame, text="Recalibrate", command=self.recalibrate,
+                                             state=tk.NORMAL if calibration is not None else tk.DISABLED)
+        self.recalibrate_button.pack(side=tk.LEFT, padx=5, pady=5)
+        
+        # Add overlay level selection: none, minimal (status and alerts) or debug (also landmarks)
+        ttk.Label(self.button_frame, text="Overlay:").pack(side=tk.LEFT, padx=(5, 0), pady=5)
+        self.overlay_var = tk.StringVar(value='debug')
+        self.overlay_select = ttk.Combobox(self.button_frame, textvariable=self.overlay_var, width=8,
+                                           values=OVERLAY_LEVELS, state='readonly')
+        self.overlay_select.bind("<<ComboboxSelected>>", self.update_overlay_level)
+        self.overlay_select.pack(side=tk.LEFT, padx=5, pady=5)
+        
+        # Add profiling toggle
+        self.profile_var = tk.BooleanVar(value=False)
+        self.profile_check = ttk.Checkbutton(self.button_frame, text="Profiling", 
+                                           variable=self.profile_var, command=self.update_profiling)
+        self.profile_check.pack(side=tk.LEFT, padx=5, pady=5)
+        
+        # Add adaptive load toggle: sheds work per frame to keep latency within budget
+        self.adaptive_var = tk.BooleanVar(value=False)
+        self.adaptive_check = ttk.Checkbutton(self.button_frame, text="Adaptive Load", 
+                                            variable=self.adaptive_var, command=self.update_adaptive_load)
+        self.adaptive_check.pack(side=tk.LEFT, padx=5, pady=5)
         
         # Initialize variables
         self.is_running = False
         self.cap = None
-        self.update_thread = None
+        self.pipeline = None
+        self.stopping = None
         self.blink_count = 0
         self.last_blink_time = time.time()
         self.alarm_enabled = True
+        self.overlay_level = self.overlay_var.get()
+        self.update_thresholds()
+        
+        # Render state: reused buffers, one persistent PhotoImage, and the current display size
+        self.buffers = FrameBuffers()
+        self.photo = None
+        self.photo_allocations = 0
+        self.display_size = (800, 600)
+        self.display_visible = True
+        self.render_times = deque(maxlen=120)
+        
+        # Optional telemetry publisher, fed from the inference thread
+        self.telemetry = telemetry
+        
+        # Optional per-driver calibration; a stored profile replaces the slider thresholds right away
+        self.detector.set_calibration(calibration)
+        if calibration is not None:
+            self.calibration_status.config(text=f"Calibration: {calibration.describe()}")
+        
+        # Load governor, idle until Adaptive Load is ticked
+        self.governor = LoadGovernor(self.detector, budget_ms=latency_budget, enabled=False)
+        
+        # Start loading models; Start Detection is enabled once they are ready
+        self.startup_reported = False
+        threading.Thread(target=self.load_models, daemon=True).start()
+        self.root.after(100, self.check_models)
+        
+    def load_models(self):
+        """Background thread: load the models and alarm sound without blocking the window"""
+        try:
+            self.detector.load_models()
+            self.detector.alarm_service = AlarmService(PygameAudioBackend('alarm.wav'))
+            self.model_state = 'ready'
+        except Exception as e:
+            self.model_error = e
+            self.model_state = 'failed'
+        
+    def check_models(self):
+        """Poll the background load and update the readiness state (runs on the Tk thread)"""
+        if self.model_state == 'loading':
+            self.root.after(100, self.check_models)
+        elif self.model_state == 'ready':
+            self.model_status.config(text=f"Models: ready ({self.startup.milestones['models']:.1f} s)")
+            self.start_button.config(state=tk.NORMAL)
+        else:
+            self.model_status.config(text=f"Models: failed to load ({self.model_error})")
         
     def toggle_alarm(self):
         self.alarm_enabled = not self.alarm_enabled
         if not self.alarm_enabled:
-            self.detector.alarm_on = False
+            self.detector.stop_alarm()
             self.alarm_status.config(text="Alarm Status: Off")
         else:
             self.alarm_status.config(text="Alarm Status: On")
         
+    def update_thresholds(self, value=None):
+        """Copy slider values into the detector (runs on the Tk thread)"""
+        self.detector.EAR_THRESHOLD = self.ear_threshold.get()
+        self.detector.YAWN_THRESHOLD = self.yawn_threshold.get()
+        
+    def recalibrate(self):
+        """Return to the slider thresholds and learn the driver's baseline again"""
+        self.detector.calibration.restart()
+        self.update_thresholds()
+        
+    def update_overlay_level(self, event=None):
+        """Mirror the overlay selection so the render thread never touches Tk variables"""
+        self.overlay_level = self.overlay_var.get()
+        
+    def on_video_resize(self, event):
+        """Track the video area size so frames are only scaled to what is actually shown"""
+        if event.width > 1 and event.height > 1:
+            self.display_size = (event.width, event.height)
+        
+    def on_visibility_change(self, event):
+        """Skip rendering entirely while the window is minimized"""
+        if event.widget is self.root:
+            self.display_visible = event.type == tk.EventType.Map
+            if self.display_visible:
+                self.startup.mark('window')
+        
+    def update_profiling(self):
+        """Turn per-stage timing on or off"""
+        self.detector.profiler.enabled = self.profile_var.get()
+        if not self.profile_var.get():
+            self.profile_status.config(text="")
+        
+    def update_adaptive_load(self):
+        """Turn the load governor on or off, restoring full quality when turned off"""
+        self.governor.enabled = self.adaptive_var.get()
+        if not self.governor.enabled:
+            self.governor.reset()
+        
     def start_detection(self):
+        self.startup.mark('start')
         self.is_running = True
         self.start_button.config(state=tk.DISABLED)
         self.stop_button.config(state=tk.NORMAL)
         self.cap = cv2.VideoCapture(0)
-        self.update_thread = threading.Thread(target=self.update_frame)
-        self.update_thread.start()
+        self.pipeline = FramePipeline(self.cap, self.process_frame, self.render_frame,
+                                      profiler=self.detector.profiler, governor=self.governor)
+        self.pipeline.start()
+        self.root.after(10, self.update_display)
         
     def stop_detection(self):
         self.is_running = False
-        self.start_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
-        if self.cap is not None:
-            self.cap.release()
-        self.detector.alarm_on = False
-        
-    def update_frame(self):
-        while self.is_running:
-            ret, frame = self.cap.read()
-            if not ret:
-                break
-                
-            # Update thresholds
-            self.detector.EAR_THRESHOLD = self.ear_threshold.get()
-            self.detector.YAWN_THRESHOLD = self.yawn_threshold.get()
+        self.detector.stop_alarm()
+        # Joining the pipeline threads can take up to a second per stage, so it happens off the
+        # Tk thread; Start Detection is enabled again once the camera has been released
+        self.stopping = threading.Thread(target=self.release_capture, args=(self.pipeline, self.cap),
+                                         daemon=True)
+        self.stopping.start()
+        self.root.after(50, self.check_stopped)
+        
+    def release_capture(self, pipeline, cap):
+        """Background thread: stop the pipeline stages and release the camera"""
+        if pipeline is not None:
+            pipeline.stop()
+        if cap is not None:
+            cap.release()
+        
+    def check_stopped(self):
+        """Poll the background shutdown (runs on the Tk thread)"""
+        if self.stopping.is_alive():
+            self.root.after(50, self.check_stopped)
+        else:
+            self.start_button.config(state=tk.NORMAL)
+        
+    def process_frame(self, frame, captured_at):
+        """Inference stage: detect faces, compute features and decide on the alarm"""
+        profiler = self.detector.profiler
+        with profiler.stage('gray'):
+            gray = self.buffers.gray(frame)
+        
+        # Each tracked face keeps its own counters; time-based decisions use the capture time
+        results = self.detector.analyze_faces(gray, drive_alarm=False, timestamp=captured_at)
+        self.startup.mark('first_frame')
+        if results:
+            self.startup.mark('first_face')
+        for result in results:
+            status = result['status']
             
-            # Process frame
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.detector.detector(gray)
+            # Count blinks
+            if status['blink_detected']:
+                current_time = time.time()
+                if current_time - self.last_blink_time > 0.5:  # Debounce blinks
+                    self.blink_count += 1
+                    self.last_blink_time = current_time
+        
+        # Handle alarm: any monitored face that is drowsy or yawning sounds it
+        if results:
+            alarm_needed = any(result['status']['drowsiness_level'] > 0 or result['status']['yawn_detected']
+                               for result in results)
+            if alarm_needed and self.alarm_enabled:
+                self.detector.start_alarm()
+            else:
+                self.detector.stop_alarm()
+        if self.telemetry is not None:
+            self.telemetry.record(results, self.detector.alarm_on, self.detector.EAR_THRESHOLD)
+        profiler.end_frame()
+        return results
+        
+    def render_frame(self, frame, results):
+        """Render stage: draw overlays and convert the frame for Tk"""
+        if not self.display_visible:
+            return None
+        start = time.perf_counter()
+        
+        # Landmark and debug overlays are dropped when the governor is shedding load
+        level = self.overlay_level
+        if not self.governor.draw_enabled and level == 'debug':
+            level = 'minimal'
+        self.detector.overlay.render(frame, results, self.detector.alarm_on, level)
+        drawn = time.perf_counter()
+        
+        # Resize and convert into reused buffers wrapped by persistent PIL images; the PhotoImage
+        # itself is updated on the Tk thread
+        image = self.buffers.display_image(frame, self.display_size)
+        done = time.perf_counter()
+        self.detector.profiler.record('convert', done - drawn)
+        self.render_times.append(done - start)
+        return image, results
+        
+    def update_display(self):
+        """Show the newest rendered frame and status; scheduled on the Tk main loop"""
+        if not self.is_running:
+            return
+        
+        output = self.pipeline.get_display()
+        if output is not None:
+            image, results = output
             
-            if len(faces) == 0:
-                cv2.putText(frame, "No Face Detected", (10, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            # Update the persistent PhotoImage in place, recreating it only when the size changes
+            with self.detector.profiler.stage('display'):
+                if self.photo is None or (self.photo.width(), self.photo.height()) != image.size:
+                    self.photo = ImageTk.PhotoImage(image=image)
+                    self.photo_allocations += 1
+                    self.video_label.config(image=self.photo)
+                else:
+                    self.photo.paste(image)
             
-            for face in faces:
-                landmarks = self.detector.predictor(gray, face)
-                landmarks = np.array([[p.x, p.y] for p in landmarks.parts()])
-                
-                # Get eye landmarks
-                left_eye = landmarks[36:42]
-                right_eye = landmarks[42:48]
-                
-                # Calculate EAR for both eyes
-                left_ear = self.detector.calculate_ear(left_eye)
-                right_ear = self.detector.calculate_ear(right_eye)
-                ear = (left_ear + right_ear) / 2.0
-                
-                # Get mouth landmarks
-                mouth = landmarks[48:68]
-                mar = self.detector.calculate_yawn(mouth)
-                
-                # Get detection status
-                status = self.detector.get_detection_status(ear, mar)
+            for result in results:
+                status = result['status']
                 
                 # Update status labels
                 self.eye_status.config(text=f"Eye Status: {status['eye_status']}")
                 self.yawn_status.config(text=f"Yawn Status: {status['yawn_status']}")
                 
                 # Update values
-                self.ear_value.config(text=f"EAR: {ear:.3f}")
-                self.mar_value.config(text=f"MAR: {mar:.3f}")
+                self.ear_value.config(text=f"EAR: {result['ear']:.3f}")
+                self.mar_value.config(text=f"MAR: {result['mar']:.3f}")
                 
                 # Update blink status
                 if status['blink_detected']:
-                    current_time = time.time()
-                    if current_time - self.last_blink_time > 0.5:  # Debounce blinks
-                        self.blink_count += 1
-                        self.last_blink_time = current_time
                     self.blink_status.config(text="Blink Status: Blink Detected")
                 else:
                     self.blink_status.config(text="Blink Status: No Blink")
-                
                 self.blink_counter.config(text=f"Blink Count: {self.blink_count}")
                 
-                # Handle alarm
-                if (status['drowsiness_level'] > 0 or status['yawn_detected']) and self.alarm_enabled:
-                    if not self.detector.alarm_on:
-                        self.detector.alarm_on = True
-                        threading.Thread(target=self.detector.play_alarm).start()
-                        self.alarm_status.config(text="Alarm Status: Active")
-                else:
-                    self.detector.alarm_on = False
-                    if self.alarm_enabled:
-                        self.alarm_status.config(text="Alarm Status: On")
-                
-                # Draw landmarks
-                for (x, y) in landmarks:
-                    cv2.circle(frame, (x, y), 1, (0, 255, 0), -1)
-                
-                # Draw eye and mouth regions
-                if self.debug_var.get():
-                    # Draw eye regions
-                    cv2.rectangle(frame, (min(left_eye[:, 0]), min(left_eye[:, 1])),
-                                (max(left_eye[:, 0]), max(left_eye[:, 1])), (0, 255, 0), 1)
-                    cv2.rectangle(frame, (min(right_eye[:, 0]), min(right_eye[:, 1])),
-                                (max(right_eye[:, 0]), max(right_eye[:, 1])), (0, 255, 0), 1)
-                    
-                    # Draw mouth region
-                    cv2.rectangle(frame, (min(mouth[:, 0]), min(mouth[:, 1])),
-                                (max(mouth[:, 0]), max(mouth[:, 1])), (0, 255, 0), 1)
-                
-                # Add status text to frame
-                cv2.putText(frame, f"EAR: {ear:.3f}", (10, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                cv2.putText(frame, f"MAR: {mar:.3f}", (10, 60),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                
-                # Add alarm status to frame
+                # Update alarm status
                 if self.detector.alarm_on:
-                    cv2.putText(frame, "ALARM ACTIVE!", (10, 90),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-                
-                # Add yawn detection status
-                if status['yawn_detected']:
-                    cv2.putText(frame, "YAWN DETECTED!", (10, 120),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-            
-            # Convert frame to PhotoImage
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame = cv2.resize(frame, (800, 600))
-            photo = ImageTk.PhotoImage(image=Image.fromarray(frame))
-            
-            # Update video label
-            self.video_label.config(image=photo)
-            self.video_label.image = photo
+                    self.alarm_status.config(text="Alarm Status: Active")
+                elif self.alarm_enabled:
+                    self.alarm_status.config(text="Alarm Status: On")
+        
+        # Report startup timings once the first face has been detected
+        if not self.startup_reported and 'first_face' in self.startup.milestones:
+            self.startup_reported = True
+            milestones = self.startup.milestones
+            self.model_status.config(text=f"Models: ready ({milestones['models']:.1f} s), first face "
+                                          f"{milestones['first_face'] - milestones['start']:.2f} s after start")
+            print(self.startup.format_line())
+        
+        # Update pipeline metrics
+        stats = self.pipeline.stats()
+        self.pipeline_status.config(text=f"Queues: {stats['inference_queue']}/{stats['render_queue']}, "
+                                         f"dropped {sum(stats['dropped'].values())}")
+        latency_text = f"Latency: {stats['glass_to_alarm']['mean_ms']:.0f} ms"
+        if self.detector.alarm_service is not None:
+            latency_text += f", sound {self.detector.alarm_service.stats()['latency_mean_ms']:.0f} ms"
+        self.latency_status.config(text=latency_text)
+        if self.render_times:
+            render_ms = sum(self.render_times) / len(self.render_times) * 1000.0
+            overlay_ms = self.detector.overlay.stats()['cost_mean_ms']
+            self.render_status.config(text=f"Render: {render_ms:.1f} ms (overlay {overlay_ms:.1f}), "
+                                           f"skipped {stats['skipped_renders']}, "
+                                           f"load level {self.governor.level}")
+        self.allocation_status.config(text=f"Allocations: {self.buffers.allocations + self.photo_allocations}")
+        if self.detector.calibration is not None:
+            self.calibration_status.config(text=f"Calibration: {self.detector.calibration.describe()}")
+        if self.detector.profiler.enabled:
+            self.profile_status.config(text="\n".join(self.detector.profiler.overlay_lines()))
+        
+        if self.pipeline.running:
+            self.root.after(10, self.update_display)
+        else:
+            self.stop_detection()
             
     def run(self):
         self.root.mainloop()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drowsiness detection GUI")
+    parser.add_argument("--predictor", default=None,
+                        help="path of the 68-point landmark model (default: shape_predictor_68_face_landmarks.dat)")
+    add_backend_arguments(parser)
+    add_telemetry_arguments(parser)
+    parser.add_argument("--latency-budget", type=float, default=100.0,
+                        help="target capture-to-decision latency in ms for Adaptive Load (default: 100)")
+    add_calibration_arguments(parser)
+    args = parser.parse_args()
+    
+    telemetry = publisher_from_args(args)
+    if telemetry is not None:
+        telemetry.start()
     root = tk.Tk()
-    app = DrowsinessGUI(root)
-    app.run() 
\ No newline at end of file
+    app = DrowsinessGUI(root, backend=backend_from_args(args), telemetry=telemetry,
+                        calibration=calibration_from_args(args, 'camera0'), latency_budget=args.latency_budget)
+    app.run()
+    if telemetry is not None:
+        telemetry.stop()
\ No newline at end of file
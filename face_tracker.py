@@ -0,0 +1,65 @@
+import dlib
+
+class FaceTracker:
+    def __init__(self, detector, keyframe_interval=1, redetect_threshold=7.0):
+        # Full detector, run on keyframes only
+        self.detector = detector
+
+        # Run the detector every N frames; 1 disables tracking entirely
+        self.keyframe_interval = keyframe_interval
+        # Correlation tracker confidence (peak-to-sidelobe ratio) below which we re-detect
+        self.redetect_threshold = redetect_threshold
+
+        # Tracking state
+        self.trackers = []
+        self.frames_since_detection = 0
+        self.last_confidence = 0.0
+        self.detection_count = 0  # Number of full detector runs, useful for benchmarks
+
+    def reset(self):
+        """Drop all tracks so the next frame runs the full detector"""
+        self.trackers = []
+        self.frames_since_detection = 0
+
+    def needs_detection(self):
+        """Check whether the next frame should be a keyframe"""
+        if self.keyframe_interval <= 1 or not self.trackers:
+            return True
+        return self.frames_since_detection >= self.keyframe_interval
+
+    def detect(self, image):
+        """Run the full detector and (re)start a tracker for every face found"""
+        faces = list(self.detector(image))
+        self.detection_count += 1
+        self.frames_since_detection = 1
+        self.trackers = []
+
+        if self.keyframe_interval > 1:
+            for face in faces:
+                tracker = dlib.correlation_tracker()
+                tracker.start_track(image, face)
+                self.trackers.append(tracker)
+        return faces
+
+    def track(self, image):
+        """Advance all trackers by one frame, returning None if any track is lost"""
+        faces = []
+        for tracker in self.trackers:
+            confidence = tracker.update(image)
+            self.last_confidence = confidence
+            if confidence < self.redetect_threshold:
+                return None
+
+            position = tracker.get_position()
+            faces.append(dlib.rectangle(int(position.left()), int(position.top()),
+                                        int(position.right()), int(position.bottom())))
+        self.frames_since_detection += 1
+        return faces
+
+    def update(self, image):
+        """Get face rectangles for the current frame"""
+        if not self.needs_detection():
+            faces = self.track(image)
+            if faces is not None:
+                return faces
+        return self.detect(image)
@@ -0,0 +1,55 @@
+import numpy as np
+
+# Landmark index pairs for the 68-point model. Each ratio is a sum of "vertical" distances
+# divided by a multiple of one "horizontal" distance, matching calculate_ear / calculate_yawn.
+LEFT_EYE_VERTICAL = np.array([[37, 41], [38, 40]])
+LEFT_EYE_HORIZONTAL = np.array([36, 39])
+RIGHT_EYE_VERTICAL = np.array([[43, 47], [44, 46]])
+RIGHT_EYE_HORIZONTAL = np.array([42, 45])
+MOUTH_VERTICAL = np.array([[61, 67], [62, 66], [63, 65]])
+MOUTH_HORIZONTAL = np.array([60, 64])
+
+# All pairs stacked so every distance is computed in a single pass
+_PAIRS = np.vstack([LEFT_EYE_VERTICAL, [LEFT_EYE_HORIZONTAL],
+                    RIGHT_EYE_VERTICAL, [RIGHT_EYE_HORIZONTAL],
+                    MOUTH_VERTICAL, [MOUTH_HORIZONTAL],
+                    [[36, 45]]])  # Outer eye corners, for inter-ocular distance
+
+def shape_to_array(shape, dtype=np.int64):
+    """Convert a dlib full_object_detection into a (num_parts, 2) array"""
+    count = shape.num_parts
+    coords = np.fromiter((c for p in shape.parts() for c in (p.x, p.y)), dtype=dtype, count=2 * count)
+    return coords.reshape(count, 2)
+
+def stack_shapes(shapes, dtype=np.int64):
+    """Convert many dlib detections into an (N, 68, 2) array"""
+    if len(shapes) == 0:
+        return np.empty((0, 68, 2), dtype=dtype)
+    return np.stack([shape_to_array(shape, dtype) for shape in shapes])
+
+def compute_features(landmarks):
+    """Compute EAR, MAR and related geometry for (68, 2) or (N, 68, 2) landmark arrays
+
+    Returns a dict of float64 values (scalars for one face, length-N arrays for a batch).
+    """
+    points = np.asarray(landmarks, dtype=np.float64)
+    diff = points[..., _PAIRS[:, 0], :] - points[..., _PAIRS[:, 1], :]
+    dist = np.sqrt(np.einsum('...ij,...ij->...i', diff, diff))
+
+    # Degenerate landmarks give inf/nan, the same as the scalar formulas
+    with np.errstate(divide='ignore', invalid='ignore'):
+        left_ear = (dist[..., 0] + dist[..., 1]) / (2.0 * dist[..., 2])
+        right_ear = (dist[..., 3] + dist[..., 4]) / (2.0 * dist[..., 5])
+        mar = (dist[..., 6] + dist[..., 7] + dist[..., 8]) / (2.0 * dist[..., 9])
+
+    return {
+        'left_ear': left_ear,
+        'right_ear': right_ear,
+        'ear': (left_ear + right_ear) / 2.0,
+        'mar': mar,
+        'left_eye_width': dist[..., 2],
+        'right_eye_width': dist[..., 5],
+        'mouth_width': dist[..., 9],
+        'mouth_opening': (dist[..., 6] + dist[..., 7] + dist[..., 8]) / 3.0,
+        'interocular_distance': dist[..., 10],
+    }
@@ -0,0 +1,55 @@
+import cv2
+import numpy as np
+from PIL import Image
+
+class FrameBuffers:
+    def __init__(self, display_buffers=3):
+        # Reused output arrays, only reallocated when the frame or display size changes
+        self.gray_buffer = None
+        # Ring of display buffers so the UI thread can read one while the next is written
+        self.display_buffers = [None] * display_buffers
+        self.resize_buffers = [None] * display_buffers
+        # PIL images sharing memory with the display buffers (RGBA, which PIL can wrap without a copy)
+        self.display_images = [None] * display_buffers
+        self.next_display = 0
+
+        # Number of (re)allocations, to make per-frame allocation regressions visible
+        self.allocations = 0
+
+    def ensure(self, buffer, shape):
+        """Return buffer if it already has the right shape, otherwise allocate a new one"""
+        if buffer is None or buffer.shape != shape:
+            self.allocations += 1
+            return np.empty(shape, dtype=np.uint8)
+        return buffer
+
+    def gray(self, frame):
+        """BGR to grayscale into a reused buffer"""
+        self.gray_buffer = self.ensure(self.gray_buffer, frame.shape[:2])
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.gray_buffer)
+
+    def display(self, frame, size):
+        """Resize to the display size (width, height) and convert to RGBA into the next ring buffer"""
+        index = self.next_display
+        self.next_display = (index + 1) % len(self.display_buffers)
+
+        width, height = size
+        if frame.shape[1] != width or frame.shape[0] != height:
+            self.resize_buffers[index] = self.ensure(self.resize_buffers[index], (height, width, 3))
+            frame = cv2.resize(frame, (width, height), dst=self.resize_buffers[index])
+
+        buffer = self.ensure(self.display_buffers[index], (height, width, 4))
+        if buffer is not self.display_buffers[index]:
+            self.display_buffers[index] = buffer
+            self.display_images[index] = None
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA, dst=buffer)
+
+    def display_image(self, frame, size):
+        """Like display(), but return a persistent PIL image over the ring buffer instead of an array"""
+        index = self.next_display
+        buffer = self.display(frame, size)
+        if self.display_images[index] is None:
+            self.allocations += 1
+            height, width = buffer.shape[:2]
+            self.display_images[index] = Image.frombuffer('RGBA', (width, height), buffer, 'raw', 'RGBA', 0, 1)
+        return self.display_images[index]
@@ -0,0 +1,97 @@
+import time
+from collections import deque
+import numpy as np
+
+# Work levels from full quality to cheapest. Each level may reuse landmarks for a few frames
+# (skipping the predictor), search a smaller detection image (relative to the configured
+# scale) and drop the landmark/debug overlays, keeping only status text and alerts.
+LEVELS = (
+    {'max_landmark_age': 0, 'detection_scale': 1.0, 'draw': True},
+    {'max_landmark_age': 1, 'detection_scale': 1.0, 'draw': True},
+    {'max_landmark_age': 1, 'detection_scale': 0.5, 'draw': True},
+    {'max_landmark_age': 2, 'detection_scale': 0.5, 'draw': False},
+    {'max_landmark_age': 3, 'detection_scale': 0.35, 'draw': False},
+)
+
+class LoadGovernor:
+    def __init__(self, detector, budget_ms=100.0, window=30, headroom=0.6, cooldown=1.0, enabled=True):
+        # Detector whose per-frame work is adjusted
+        self.detector = detector
+        self.enabled = enabled
+
+        # Target capture-to-decision latency; shed load above it, restore quality once
+        # latency drops below headroom * budget
+        self.budget_ms = budget_ms
+        self.headroom = headroom
+        # Frames per decision and minimum seconds between level changes
+        self.window = window
+        self.cooldown = cooldown
+
+        # Settings at level 0, taken from the detector as configured
+        self.base_scale = detector.region_detector.scale
+        self.base_landmark_age = detector.face_monitor.max_landmark_age
+
+        self.level = 0
+        self.draw_enabled = True
+        self.latencies = deque(maxlen=window)
+        self.last_change = 0.0
+        self.decisions = deque(maxlen=100)
+
+        # Level, settings and decision history appear in the profiler's summaries and metrics
+        detector.profiler.add_source('governor', self.stats)
+
+    def update(self, latency):
+        """Record one frame's capture-to-decision latency (seconds) and adjust the level if needed"""
+        if not self.enabled:
+            return
+        self.latencies.append(latency * 1000.0)
+        now = time.perf_counter()
+        if len(self.latencies) < self.window or now - self.last_change < self.cooldown:
+            return
+
+        latency_ms = self.latency_p90()
+        if latency_ms > self.budget_ms and self.level < len(LEVELS) - 1:
+            self.set_level(self.level + 1, latency_ms, now)
+        elif latency_ms < self.budget_ms * self.headroom and self.level > 0:
+            self.set_level(self.level - 1, latency_ms, now)
+
+    def set_level(self, level, latency_ms=None, now=None):
+        """Apply a work level to the detector and log the decision"""
+        previous = self.level
+        self.level = level
+        settings = LEVELS[level]
+        self.detector.face_monitor.max_landmark_age = max(self.base_landmark_age, settings['max_landmark_age'])
+        self.detector.region_detector.scale = self.base_scale * settings['detection_scale']
+        self.draw_enabled = settings['draw']
+
+        self.last_change = now or time.perf_counter()
+        self.latencies.clear()
+        decision = {'time': time.time(), 'from': previous, 'to': level, 'p90_latency_ms': latency_ms,
+                    'budget_ms': self.budget_ms}
+        self.decisions.append(decision)
+        if latency_ms is not None:
+            print(f"[governor] level {previous} -> {level} (p90 latency {latency_ms:.1f} ms, "
+                  f"budget {self.budget_ms:.1f} ms)")
+
+    def latency_p90(self):
+        """p90 of the recent latencies in milliseconds"""
+        return float(np.percentile(self.latencies, 90)) if self.latencies else 0.0
+
+    def reset(self):
+        """Return to full quality"""
+        if self.level != 0:
+            self.set_level(0)
+
+    def stats(self):
+        """Current level, settings, recent latency and level-change history"""
+        recent = list(self.latencies)
+        return {
+            'enabled': self.enabled,
+            'level': self.level,
+            'settings': dict(LEVELS[self.level]),
+            'budget_ms': self.budget_ms,
+            'latency_mean_ms': sum(recent) / len(recent) if recent else 0.0,
+            'latency_p90_ms': self.latency_p90(),
+            'changes': len(self.decisions),
+            'decisions': list(self.decisions),
+        }
@@ -0,0 +1,159 @@
+import os
+import threading
+import cv2
+import dlib
+import numpy as np
+from features import shape_to_array
+from model_registry import LazyModel, ThreadLocalModel, get_model, get_face_detector, get_shape_predictor
+
+# 68-point indices a landmark model must supply for EAR and MAR: both eyes (36-47) and the mouth (48-67)
+EYES_AND_MOUTH = tuple(range(36, 68))
+# Coordinate given to 68-point landmarks that a partial model doesn't predict
+MISSING = -1
+
+FACE_DETECTORS = ('hog', 'haar', 'lbp', 'dnn')
+
+class CascadeFaceDetector:
+    def __init__(self, path, scale_factor=1.1, min_neighbors=5, min_size=(60, 60)):
+        # OpenCV Haar or LBP cascade, loaded through the model registry on first use
+        self.path = os.path.abspath(path)
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+        self.cascade = LazyModel(load_opencv_model, ('cascade', self.path), load_cascade, self.path)
+        # Shared OpenCV models are not documented as thread-safe, so calls are serialized
+        self.lock = threading.Lock()
+
+    def __call__(self, image):
+        with self.lock:
+            boxes = self.cascade.get().detectMultiScale(image, scaleFactor=self.scale_factor,
+                                                        minNeighbors=self.min_neighbors, minSize=self.min_size)
+        return [dlib.rectangle(int(x), int(y), int(x + w - 1), int(y + h - 1)) for x, y, w, h in boxes]
+
+class DnnFaceDetector:
+    def __init__(self, model_path, config_path=None, confidence=0.5, input_size=(300, 300)):
+        # OpenCV DNN face detector, e.g. the res10 SSD (res10_300x300_ssd_iter_140000.caffemodel
+        # with its deploy.prototxt); any net with the same SSD output layout works
+        self.model_path = os.path.abspath(model_path)
+        self.config_path = os.path.abspath(config_path) if config_path else ''
+        self.confidence = confidence
+        self.input_size = input_size
+        self.net = LazyModel(load_opencv_model, ('dnn', self.model_path), cv2.dnn.readNet,
+                             self.model_path, self.config_path)
+        self.lock = threading.Lock()
+
+    def __call__(self, image):
+        height, width = image.shape[:2]
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        blob = cv2.dnn.blobFromImage(image, 1.0, self.input_size, (104.0, 177.0, 123.0))
+        with self.lock:
+            net = self.net.get()
+            net.setInput(blob)
+            detections = net.forward()
+
+        # Rows are (image, class, confidence, x0, y0, x1, y1) with coordinates relative to the image
+        detections = detections.reshape(-1, 7)
+        detections = detections[detections[:, 2] >= self.confidence]
+        boxes = np.clip(detections[:, 3:7], 0.0, 1.0) * [width, height, width, height]
+        return [dlib.rectangle(int(x0), int(y0), int(x1), int(y1))
+                for x0, y0, x1, y1 in boxes if x1 > x0 and y1 > y0]
+
+def load_cascade(path):
+    """cv2.CascadeClassifier, which OpenCV 5 only ships in the contrib modules"""
+    if not hasattr(cv2, 'CascadeClassifier'):
+        raise ImportError("This OpenCV build has no cascade classifiers (install opencv-contrib-python)")
+    return cv2.CascadeClassifier(path)
+
+def bundled_cascade(name):
+    """Path of a cascade shipped with OpenCV, which OpenCV 5 only ships in the contrib modules"""
+    data = getattr(getattr(cv2, 'data', None), 'haarcascades', None)
+    path = os.path.join(data, name) if data else None
+    if not hasattr(cv2, 'CascadeClassifier') or path is None or not os.path.exists(path):
+        raise ImportError(f"This OpenCV build has no bundled {name} (install opencv-contrib-python, "
+                          "or pass the cascade file as the detector model)")
+    return path
+
+def load_opencv_model(key, load, *paths):
+    """Load an OpenCV model file once per process through the model registry"""
+    for path in paths:
+        if path and not os.path.exists(path):
+            raise FileNotFoundError(f"Face detector model not found: {path}")
+    return get_model(key, lambda: load(*paths))
+
+class LandmarkBackend:
+    def __init__(self, name, detector, predictor, points=None):
+        # Face detector: callable(image) -> list of dlib.rectangle
+        # Landmark predictor: callable(image, rectangle) -> dlib full_object_detection
+        self.name = name
+        self.detector = detector
+        self.predictor = predictor
+
+        # 68-point indices of the predictor's parts, in order; None means the full 68-point layout.
+        # Partial models must at least cover the eyes and mouth.
+        self.points = None if points is None else np.asarray(points)
+        if self.points is not None and not set(EYES_AND_MOUTH) <= set(self.points.tolist()):
+            raise ValueError(f"Landmark backend '{name}' must supply points 36-67 for EAR/MAR")
+
+    def landmarks(self, image, face):
+        """(68, 2) landmarks for a face, with MISSING for points the model doesn't predict"""
+        parts = shape_to_array(self.predictor(image, face))
+        if self.points is None:
+            return parts
+        if len(parts) != len(self.points):
+            raise ValueError(f"Landmark model returned {len(parts)} points, expected {len(self.points)}")
+        landmarks = np.full((68, 2), MISSING, dtype=parts.dtype)
+        landmarks[self.points] = parts
+        return landmarks
+
+    def load(self):
+        """Load lazily loaded models now"""
+        for model in (getattr(self.detector, 'cascade', None), getattr(self.detector, 'net', None),
+                      self.detector, self.predictor):
+            if isinstance(model, LazyModel):
+                model.get()
+
+def create_backend(face_detector='hog', detector_model=None, detector_config=None, predictor_path=None,
+                   points=None, detector=None, predictor=None):
+    """Build a landmark backend; the default is dlib's HOG detector with the 68-point predictor
+
+    face_detector is 'hog', 'haar' (OpenCV's bundled frontal cascade unless detector_model is
+    given), 'lbp' (detector_model is the cascade file) or 'dnn' (detector_model and optional
+    detector_config are the network files). predictor_path may point to a smaller model whose
+    parts map to the 68-point indices in points, e.g. EYES_AND_MOUTH.
+    """
+    if detector is None:
+        if face_detector == 'hog':
+            detector = ThreadLocalModel(get_face_detector)
+        elif face_detector == 'haar':
+            detector = CascadeFaceDetector(detector_model or bundled_cascade('haarcascade_frontalface_default.xml'))
+        elif face_detector == 'lbp':
+            if not detector_model:
+                raise ValueError("The LBP face detector needs a cascade file (e.g. lbpcascade_frontalface_improved.xml)")
+            detector = CascadeFaceDetector(detector_model)
+        elif face_detector == 'dnn':
+            if not detector_model:
+                raise ValueError("The DNN face detector needs a model file")
+            detector = DnnFaceDetector(detector_model, detector_config)
+        else:
+            raise ValueError(f"Unknown face detector: {face_detector}")
+    if predictor is None:
+        predictor = LazyModel(get_shape_predictor, predictor_path)
+
+    name = face_detector if points is None else f"{face_detector}+partial"
+    return LandmarkBackend(name, detector, predictor, points)
+
+def add_backend_arguments(parser):
+    """Command-line options selecting the landmark backend"""
+    parser.add_argument("--face-detector", choices=FACE_DETECTORS, default='hog',
+                        help="face detector: dlib HOG (default), OpenCV Haar/LBP cascade or OpenCV DNN")
+    parser.add_argument("--detector-model", default=None,
+                        help="cascade XML for haar/lbp, or network weights for dnn")
+    parser.add_argument("--detector-config", default=None, help="network config for dnn (e.g. deploy.prototxt)")
+    parser.add_argument("--partial-landmarks", action="store_true",
+                        help="the --predictor model only predicts the eye and mouth points (36-67)")
+
+def backend_from_args(args):
+    """Build the landmark backend selected by add_backend_arguments options"""
+    return create_backend(args.face_detector, args.detector_model, args.detector_config, args.predictor,
+                          EYES_AND_MOUTH if args.partial_landmarks else None)
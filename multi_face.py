@@ -0,0 +1,136 @@
+FOCUS_MODES = ('all', 'largest', 'driver')
+
+def rect_iou(a, b):
+    """Intersection over union of two dlib rectangles"""
+    left, top = max(a.left(), b.left()), max(a.top(), b.top())
+    right, bottom = min(a.right(), b.right()), min(a.bottom(), b.bottom())
+    intersection = max(0, right - left + 1) * max(0, bottom - top + 1)
+    union = a.width() * a.height() + b.width() * b.height() - intersection
+    return intersection / union if union > 0 else 0.0
+
+class FaceTrack:
+    def __init__(self, track_id, face, state):
+        self.track_id = track_id
+        self.face = face
+        # Per-identity counters and blink/yawn history
+        self.state = state
+        self.missed = 0
+
+        # Last landmarks and the box they were predicted for
+        self.landmarks = None
+        self.landmark_face = None
+        self.landmark_age = 0
+
+        # Smoothed feature values
+        self.ear = None
+        self.mar = None
+
+class MultiFaceMonitor:
+    def __init__(self, detector, focus='all', driver_region=None, iou_threshold=0.3, max_missed=10,
+                 smoothing=0.0, max_landmark_age=0, relandmark_iou=0.9):
+        if focus not in FOCUS_MODES:
+            raise ValueError(f"Unknown focus mode: {focus}")
+
+        # Owning DrowsinessDetector: provides face location, landmarks and thresholds
+        self.detector = detector
+
+        # Which faces to monitor: every face, only the largest, or only one inside the driver
+        # region (x0, y0, x1, y1 as fractions of the frame); ignored faces are never landmarked
+        self.focus = focus
+        self.driver_region = driver_region or (0.0, 0.0, 1.0, 1.0)
+
+        # Association between frames
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+
+        # EMA weight of the previous value (0 = no smoothing)
+        self.smoothing = smoothing
+        # Reuse landmarks for up to N frames while the face box stays put (0 = always re-landmark)
+        self.max_landmark_age = max_landmark_age
+        self.relandmark_iou = relandmark_iou
+
+        self.tracks = []
+        self.next_track_id = 0
+
+    def reset(self):
+        """Forget all tracks"""
+        self.tracks = []
+
+    def select_faces(self, faces, frame_shape):
+        """Keep only the faces the focus mode asks for"""
+        if self.focus == 'all' or len(faces) == 0:
+            return list(faces)
+
+        if self.focus == 'driver':
+            height, width = frame_shape[:2]
+            x0, y0, x1, y1 = self.driver_region
+            faces = [face for face in faces
+                     if x0 * width <= face.center().x <= x1 * width
+                     and y0 * height <= face.center().y <= y1 * height]
+            if len(faces) == 0:
+                return []
+
+        return [max(faces, key=lambda face: face.width() * face.height())]
+
+    def associate(self, faces):
+        """Greedily match faces to existing tracks by IoU, creating tracks for new faces"""
+        pairs = sorted(((rect_iou(track.face, face), t, f)
+                        for t, track in enumerate(self.tracks) for f, face in enumerate(faces)),
+                       reverse=True)
+        matched_tracks, matched_faces = set(), set()
+        for iou, t, f in pairs:
+            if iou < self.iou_threshold:
+                break
+            if t in matched_tracks or f in matched_faces:
+                continue
+            matched_tracks.add(t)
+            matched_faces.add(f)
+            self.tracks[t].face = faces[f]
+            self.tracks[t].missed = 0
+
+        # Age out tracks that were not seen
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.missed += 1
+        self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+
+        for f, face in enumerate(faces):
+            if f not in matched_faces:
+                self.tracks.append(FaceTrack(self.next_track_id, face, self.detector.create_track_state()))
+                self.next_track_id += 1
+
+    def needs_landmarks(self, track):
+        """Only re-landmark a track when it is new, has moved, or its landmarks are too old"""
+        if track.landmarks is None or track.landmark_age >= self.max_landmark_age:
+            return True
+        return rect_iou(track.face, track.landmark_face) < self.relandmark_iou
+
+    def update(self, gray, timestamp=None):
+        """Locate, associate and score faces, returning one result per visible track"""
+        faces = self.select_faces(self.detector.locate_faces(gray), gray.shape)
+        self.associate(faces)
+
+        results = []
+        for track in self.tracks:
+            if track.missed > 0:
+                continue
+
+            if self.needs_landmarks(track):
+                track.landmarks, ear, mar = self.detector.extract_features(gray, track.face)
+                track.landmark_face = track.face
+                track.landmark_age = 0
+                if track.ear is None or self.smoothing <= 0:
+                    track.ear, track.mar = ear, mar
+                else:
+                    track.ear = self.smoothing * track.ear + (1.0 - self.smoothing) * ear
+                    track.mar = self.smoothing * track.mar + (1.0 - self.smoothing) * mar
+            else:
+                track.landmark_age += 1
+
+            # Each identity keeps its own counters, using the owner's current thresholds
+            self.detector.copy_thresholds_to(track.state)
+            with self.detector.profiler.stage('status'):
+                status = track.state.get_detection_status(track.ear, track.mar, timestamp)
+            results.append({'track_id': track.track_id, 'face': track.face, 'landmarks': track.landmarks,
+                            'ear': track.ear, 'mar': track.mar, 'status': status})
+        return results
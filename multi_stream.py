@@ -0,0 +1,228 @@
+import argparse
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from drowsiness_detector import DrowsinessDetector
+from landmark_backends import add_backend_arguments, backend_from_args, create_backend
+from pipeline import DropOldestQueue
+from calibration import DriverCalibration, ProfileStore
+
+def open_source(source):
+    """Open a device index ("0"), a video file or a stream URL"""
+    if isinstance(source, int) or str(source).isdigit():
+        return cv2.VideoCapture(int(source))
+    return cv2.VideoCapture(source)
+
+class MonitoredStream:
+    def __init__(self, stream_id, source, state, stats_window=120):
+        self.stream_id = stream_id
+        self.source = source
+
+        # Per-stream detection state (counters, tracker, alarm flag) sharing the pool's dlib models
+        self.state = state
+
+        # Only the newest frame is kept, so a slow stream never processes a backlog
+        self.frames = DropOldestQueue(1)
+        self.capture = None
+        self.capture_thread = None
+        self.busy = False  # A frame from this stream is currently being processed
+        self.finished = False
+
+        # Rolling stats
+        self.completed_at = deque(maxlen=stats_window)
+        self.latencies = deque(maxlen=stats_window)
+        self.processed = 0
+        self.last_results = []
+
+    def is_file(self):
+        """Local files stand in for live streams and are paced to their own frame rate"""
+        return not str(self.source).isdigit() and os.path.exists(str(self.source))
+
+    def capture_loop(self, runner):
+        """Read frames into the stream's single-slot queue"""
+        self.capture = open_source(self.source)
+        frame_interval = 0.0
+        if self.is_file():
+            fps = self.capture.get(cv2.CAP_PROP_FPS)
+            frame_interval = 1.0 / fps if fps > 0 else 1.0 / 30
+
+        next_frame = time.perf_counter()
+        while runner.running:
+            ret, frame = self.capture.read()
+            if not ret:
+                break
+            self.frames.put((time.perf_counter(), frame))
+            if frame_interval:
+                next_frame += frame_interval
+                time.sleep(max(0.0, next_frame - time.perf_counter()))
+        self.finished = True
+        self.capture.release()
+
+    def stats(self):
+        """Per-stream FPS, latency and drop counts"""
+        fps = 0.0
+        if len(self.completed_at) > 1:
+            span = self.completed_at[-1] - self.completed_at[0]
+            fps = (len(self.completed_at) - 1) / span if span > 0 else 0.0
+        latencies = np.array(self.latencies) * 1000.0
+        # The longest-tracked face is taken to be the driver, as for calibration
+        driver = min(self.last_results, key=lambda result: result['track_id']) if self.last_results else None
+        return {
+            'stream': self.stream_id,
+            'source': str(self.source),
+            'fps': fps,
+            'latency_mean_ms': float(latencies.mean()) if len(latencies) else 0.0,
+            'latency_p95_ms': float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+            'processed': self.processed,
+            'dropped': self.frames.dropped,
+            'alarm_on': self.state.alarm_on,
+            'faces': len(self.last_results),
+            'eye_status': driver['status']['eye_status'] if driver else None,
+        }
+
+class MultiStreamRunner:
+    def __init__(self, sources, workers=None, detector_options=None, on_result=None, predictor_path=None,
+                 backend=None, profile_store=None, calibration_seconds=60.0):
+        # One landmark backend is shared by every stream; it hands each worker thread its own
+        # dlib face detector, and OpenCV face detectors serialize their calls
+        self.backend = backend if backend is not None else create_backend(predictor_path=predictor_path)
+        self.backend.load()
+
+        options = dict(detector_options or {})
+        options.setdefault('enable_audio', False)
+        self.streams = []
+        for stream_id, source in enumerate(sources):
+            state = DrowsinessDetector(backend=self.backend, **options)
+            # Each camera calibrates to its driver, keyed by source so a returning camera reloads its profile
+            if profile_store is not None:
+                state.set_calibration(DriverCalibration(calibration_seconds, store=profile_store, key=str(source)))
+            self.streams.append(MonitoredStream(stream_id, source, state))
+
+        # Worker pool shared by all streams; at most one in-flight frame per stream
+        self.workers = workers or min(len(self.streams), os.cpu_count() or 1)
+        self.pool = None
+        self.slots = threading.Semaphore(self.workers)
+        self.on_result = on_result  # Optional callback(stream, results) with analyze_faces results
+
+        self.running = False
+        self.next_stream = 0
+        self.dispatch_thread = None
+
+    def start(self):
+        """Start one capture thread per stream and the shared dispatcher"""
+        self.running = True
+        self.pool = ThreadPoolExecutor(max_workers=self.workers)
+        for stream in self.streams:
+            stream.capture_thread = threading.Thread(target=stream.capture_loop, args=(self,), daemon=True)
+            stream.capture_thread.start()
+        self.dispatch_thread = threading.Thread(target=self.dispatch_loop, daemon=True)
+        self.dispatch_thread.start()
+
+    def stop(self):
+        """Stop capturing and wait for in-flight frames"""
+        self.running = False
+        if self.dispatch_thread is not None:
+            self.dispatch_thread.join(timeout=1)
+        for stream in self.streams:
+            if stream.capture_thread is not None:
+                stream.capture_thread.join(timeout=1)
+            stream.state.stop_alarm()
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+
+    def all_finished(self):
+        """True once every source has ended and no frames are pending"""
+        # The queue is checked before busy: the dispatcher sets busy before it takes a frame,
+        # so a frame is always either still queued or marked busy
+        return all(stream.finished and stream.frames.qsize() == 0 and not stream.busy
+                   for stream in self.streams)
+
+    def dispatch_loop(self):
+        """Hand frames to the pool round-robin so one busy stream can't starve the others"""
+        while self.running:
+            dispatched = False
+            count = len(self.streams)
+            for offset in range(count):
+                stream = self.streams[(self.next_stream + offset) % count]
+                if stream.busy:
+                    continue
+                if not self.slots.acquire(blocking=False):
+                    break
+                stream.busy = True
+                item = stream.frames.get(timeout=0)
+                if item is None:
+                    stream.busy = False
+                    self.slots.release()
+                    continue
+                self.pool.submit(self.process, stream, item)
+                dispatched = True
+
+            # Start the next round from a different stream
+            self.next_stream = (self.next_stream + 1) % count
+            if not dispatched:
+                time.sleep(0.002)
+
+    def process(self, stream, item):
+        """Run detection for one frame of one stream on a pool worker"""
+        captured_at, frame = item
+        try:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            # Every face in the cabin is tracked with its own state; any drowsy face raises the stream's alarm
+            results = stream.state.analyze_faces(gray, timestamp=captured_at)
+            if results:
+                stream.last_results = results
+
+            now = time.perf_counter()
+            stream.latencies.append(now - captured_at)
+            stream.completed_at.append(now)
+            stream.processed += 1
+            if self.on_result is not None:
+                self.on_result(stream, results)
+        except Exception as e:
+            print(f"Error processing stream {stream.stream_id}: {e}")
+        finally:
+            stream.busy = False
+            self.slots.release()
+
+    def stats(self):
+        """Stats for every stream"""
+        return [stream.stats() for stream in self.streams]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monitor several cameras or streams from one process")
+    parser.add_argument("sources", nargs="+", help="device indices, video files or stream URLs")
+    parser.add_argument("--workers", type=int, default=None, help="detection worker threads")
+    parser.add_argument("--stats-interval", type=float, default=5.0, help="seconds between stats lines")
+    parser.add_argument("--keyframe-interval", type=int, default=1)
+    parser.add_argument("--detection-scale", type=float, default=1.0)
+    parser.add_argument("--predictor", default=None, help="path of the 68-point landmark model")
+    add_backend_arguments(parser)
+    parser.add_argument("--calibrate", action="store_true",
+                        help="calibrate the thresholds to each camera's driver, keeping profiles per source")
+    parser.add_argument("--profiles", default="driver_profiles.json", help="driver profile store")
+    parser.add_argument("--calibration-seconds", type=float, default=60.0)
+    args = parser.parse_args()
+
+    runner = MultiStreamRunner(args.sources, args.workers,
+                               {'keyframe_interval': args.keyframe_interval,
+                                'detection_scale': args.detection_scale},
+                               backend=backend_from_args(args),
+                               profile_store=ProfileStore(args.profiles) if args.calibrate else None,
+                               calibration_seconds=args.calibration_seconds)
+    runner.start()
+    try:
+        while not runner.all_finished():
+            time.sleep(args.stats_interval)
+            for stats in runner.stats():
+                print(f"[{stats['stream']}] {stats['source']}: {stats['fps']:5.1f} FPS, "
+                      f"latency {stats['latency_mean_ms']:6.1f} ms (p95 {stats['latency_p95_ms']:6.1f}), "
+                      f"dropped {stats['dropped']}, faces {stats['faces']}, eyes {stats['eye_status']}, "
+                      f"alarm {'ON' if stats['alarm_on'] else 'off'}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runner.stop()
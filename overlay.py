@@ -0,0 +1,124 @@
+import time
+from collections import deque
+import cv2
+import numpy as np
+
+OVERLAY_LEVELS = ('none', 'minimal', 'debug')
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+GREEN = (0, 255, 0)
+RED = (0, 0, 255)
+CYAN = (255, 255, 0)
+
+# Landmark ranges boxed in debug mode and around alerts
+LEFT_EYE = slice(36, 42)
+RIGHT_EYE = slice(42, 48)
+MOUTH = slice(48, 68)
+
+# Pixel offsets of one landmark dot (a 1-pixel-radius filled circle)
+_DOT = np.array([[0, 0], [1, 0], [-1, 0], [0, 1], [0, -1]])
+
+class OverlayRenderer:
+    def __init__(self, level='debug', profiler=None, profile_refresh=0.5, show_profile=True):
+        # 'none' draws nothing, 'minimal' only status text and alerts, 'debug' also landmarks
+        # and eye/mouth regions
+        if level not in OVERLAY_LEVELS:
+            raise ValueError(f"Unknown overlay level: {level}")
+        self.level = level
+        # Drawing time is recorded as the profiler's 'draw' stage
+        self.profiler = profiler
+
+        # The profiling text layer (drawn while the profiler is enabled) needs percentiles over
+        # every stage, so its lines are cached and only recomputed this often (seconds)
+        self.show_profile = show_profile
+        self.profile_refresh = profile_refresh
+        self.profile_lines = []
+        self.profile_updated = 0.0
+
+        self.costs = deque(maxlen=120)
+
+    def text(self, frame, text, origin, color, scale=0.7, thickness=2):
+        """Draw one line of status text"""
+        cv2.putText(frame, text, origin, FONT, scale, color, thickness)
+
+    def landmarks(self, frame, points, color=GREEN):
+        """Draw every landmark of every face with one vectorized pixel write"""
+        if not len(points):
+            return
+        points = np.asarray(points).reshape(-1, 2)
+        points = points[(points >= 0).all(axis=1)]  # Points a partial model doesn't predict
+        pixels = (points[:, None, :] + _DOT).reshape(-1, 2)
+        height, width = frame.shape[:2]
+        inside = (pixels[:, 0] < width) & (pixels[:, 1] < height) & (pixels >= 0).all(axis=1)
+        pixels = pixels[inside]
+        frame[pixels[:, 1], pixels[:, 0]] = color
+
+    def boxes(self, frame, landmarks, regions, color, padding=0, thickness=1):
+        """Draw the bounding boxes of landmark regions"""
+        for region in regions:
+            points = landmarks[region]
+            (x0, y0), (x1, y1) = points.min(axis=0), points.max(axis=0)
+            cv2.rectangle(frame, (int(x0) - padding, int(y0) - padding), (int(x1) + padding, int(y1) + padding),
+                          color, thickness)
+
+    def render(self, frame, results, alarm_on=False, level=None):
+        """Draw the overlay for one frame in place; level overrides the configured level"""
+        start = time.perf_counter()
+        level = level or self.level
+        if level != 'none':
+            self.draw(frame, results, alarm_on, level)
+        cost = time.perf_counter() - start
+        self.costs.append(cost)
+        if self.profiler is not None:
+            self.profiler.record('draw', cost)
+        return frame
+
+    def draw(self, frame, results, alarm_on, level):
+        if not results:
+            self.text(frame, "No Face Detected", (10, 30), RED)
+        elif level == 'debug':
+            self.landmarks(frame, np.stack([result['landmarks'] for result in results]))
+
+        for result in results:
+            landmarks, status = result['landmarks'], result['status']
+            if level == 'debug':
+                self.boxes(frame, landmarks, (LEFT_EYE, RIGHT_EYE, MOUTH), GREEN)
+            # Alerts are boxed at every level
+            if status['eye_status'] == 'Drowsy':
+                self.boxes(frame, landmarks, (LEFT_EYE, RIGHT_EYE), RED, padding=5, thickness=2)
+            if status['yawn_detected']:
+                self.boxes(frame, landmarks, (MOUTH,), RED, padding=10, thickness=2)
+            # Label each face when several are monitored
+            if len(results) > 1:
+                face = result['face']
+                self.text(frame, f"ID {result['track_id']}", (face.left(), face.top() - 10), CYAN, 0.6)
+
+        # Status text for the face that needs the most attention
+        if results:
+            result = max(results, key=lambda r: (r['status']['drowsiness_level'], r['status']['yawn_detected']))
+            self.text(frame, f"EAR: {result['ear']:.3f}", (10, 30), GREEN)
+            self.text(frame, f"MAR: {result['mar']:.3f}", (10, 60), GREEN)
+            if alarm_on:
+                self.text(frame, "ALARM ACTIVE!", (10, 90), RED)
+            if result['status']['yawn_detected']:
+                self.text(frame, "YAWN DETECTED!", (10, 120), RED)
+            if result['status']['eye_status'] == 'Drowsy':
+                self.text(frame, "DROWSY EYES!", (10, 150), RED)
+
+        # Per-stage timings along the bottom, refreshed a few times per second
+        if self.show_profile and self.profiler is not None and self.profiler.enabled:
+            now = time.perf_counter()
+            if now - self.profile_updated >= self.profile_refresh:
+                self.profile_lines = self.profiler.overlay_lines()
+                self.profile_updated = now
+            for i, line in enumerate(self.profile_lines):
+                self.text(frame, line, (10, frame.shape[0] - 15 - 18 * i), CYAN, 0.45, 1)
+
+    def stats(self):
+        """Mean and max overlay cost in milliseconds"""
+        costs = np.array(list(self.costs)) * 1000.0
+        return {
+            'level': self.level,
+            'cost_mean_ms': float(costs.mean()) if len(costs) else 0.0,
+            'cost_max_ms': float(costs.max()) if len(costs) else 0.0,
+        }
@@ -0,0 +1,196 @@
+import threading
+import time
+from collections import deque
+import numpy as np
+from profiling import Profiler
+
+class DropOldestQueue:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.items = deque()
+        self.dropped = 0
+        self.condition = threading.Condition()
+
+    def put(self, item):
+        """Add an item, discarding the oldest one instead of blocking when full"""
+        with self.condition:
+            if len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        """Take the oldest item, or return None if nothing arrives within timeout"""
+        with self.condition:
+            if not self.items:
+                self.condition.wait(timeout)
+            if not self.items:
+                return None
+            return self.items.popleft()
+
+    def drain(self):
+        """Take every queued item at once without waiting"""
+        with self.condition:
+            items = list(self.items)
+            self.items.clear()
+            return items
+
+    def qsize(self):
+        """Current number of queued items"""
+        with self.condition:
+            return len(self.items)
+
+class LatestFrameReader:
+    def __init__(self, capture):
+        # Wraps a capture so read() always returns the newest frame instead of draining a backlog
+        self.capture = capture
+        self.frames = DropOldestQueue(1)
+        self.running = True
+        self.thread = threading.Thread(target=self.reader_loop, daemon=True)
+        self.thread.start()
+
+    def reader_loop(self):
+        """Keep reading so the camera buffer never fills up with stale frames"""
+        while self.running:
+            ret, frame = self.capture.read()
+            if not ret:
+                self.running = False
+                self.frames.put(None)
+                break
+            self.frames.put((time.perf_counter(), frame))
+
+    def read(self):
+        """Return (ret, frame, captured_at) for the newest frame, waiting for one if necessary"""
+        while True:
+            item = self.frames.get(timeout=0.5)
+            if item is not None:
+                captured_at, frame = item
+                return True, frame, captured_at
+            if not self.running:
+                return False, None, None
+
+    def release(self):
+        """Stop the reader thread and release the capture"""
+        self.running = False
+        self.thread.join(timeout=1)
+        self.capture.release()
+
+class FramePipeline:
+    def __init__(self, capture, infer, render, queue_size=2, latency_window=300, profiler=None, governor=None):
+        # Frame source (anything with a cv2.VideoCapture-style read()) and the two processing stages:
+        # infer(frame, captured_at) runs detection and the alarm decision, render(frame, result)
+        # prepares display output; captured_at is the perf_counter() time the frame was read
+        self.capture = capture
+        self.infer = infer
+        self.render = render
+        self.profiler = profiler or Profiler()
+        # Optional load governor fed with every capture-to-decision latency
+        self.governor = governor
+
+        # Bounded queues between stages; when a stage falls behind the oldest frames are dropped
+        self.inference_queue = DropOldestQueue(queue_size)
+        self.render_queue = DropOldestQueue(queue_size)
+        self.display_queue = DropOldestQueue(1)
+
+        # Rolling latency samples in seconds, measured from the moment a frame was captured
+        self.decision_latencies = deque(maxlen=latency_window)
+        self.display_latencies = deque(maxlen=latency_window)
+
+        # Frames that were never rendered because a newer one was already waiting or
+        # the render stage had nothing to show (e.g. hidden window)
+        self.skipped_renders = 0
+
+        self.running = False
+        self.threads = []
+
+    def start(self):
+        """Start the capture, inference and render threads"""
+        self.running = True
+        self.threads = [
+            threading.Thread(target=self.capture_loop, daemon=True),
+            threading.Thread(target=self.inference_loop, daemon=True),
+            threading.Thread(target=self.render_loop, daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        """Stop all stages and wait briefly for their threads to exit"""
+        self.running = False
+        for thread in self.threads:
+            thread.join(timeout=1)
+        self.threads = []
+
+    def capture_loop(self):
+        """Read frames as fast as the source delivers them"""
+        while self.running:
+            with self.profiler.stage('capture'):
+                ret, frame = self.capture.read()
+            if not ret:
+                self.running = False
+                break
+            self.inference_queue.put((time.perf_counter(), frame))
+
+    def inference_loop(self):
+        """Run detection and the alarm decision, independent of how fast frames are rendered"""
+        while self.running:
+            item = self.inference_queue.get(timeout=0.1)
+            if item is None:
+                continue
+            captured_at, frame = item
+            result = self.infer(frame, captured_at)
+            latency = time.perf_counter() - captured_at
+            self.decision_latencies.append(latency)
+            if self.governor is not None:
+                self.governor.update(latency)
+            self.render_queue.put((captured_at, frame, result))
+
+    def render_loop(self):
+        """Prepare display output for the UI thread"""
+        while self.running:
+            item = self.render_queue.get(timeout=0.1)
+            if item is None:
+                continue
+            # Don't render a frame that the next one would immediately replace
+            if self.render_queue.qsize() > 0:
+                self.skipped_renders += 1
+                continue
+            captured_at, frame, result = item
+            output = self.render(frame, result)
+            if output is None:
+                self.skipped_renders += 1
+                continue
+            self.display_queue.put((captured_at, output))
+
+    def get_display(self):
+        """Fetch the newest rendered output without blocking (call from the UI thread)"""
+        item = self.display_queue.get(timeout=0)
+        if item is None:
+            return None
+        captured_at, output = item
+        self.display_latencies.append(time.perf_counter() - captured_at)
+        return output
+
+    def stats(self):
+        """Report queue depths, drop counts and latency percentiles in milliseconds"""
+        def percentiles(samples):
+            if not samples:
+                return {'mean_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+            values = np.array(samples) * 1000.0
+            return {'mean_ms': float(values.mean()), 'p95_ms': float(np.percentile(values, 95)),
+                    'max_ms': float(values.max())}
+
+        return {
+            'inference_queue': self.inference_queue.qsize(),
+            'render_queue': self.render_queue.qsize(),
+            'display_queue': self.display_queue.qsize(),
+            'dropped': {
+                'inference': self.inference_queue.dropped,
+                'render': self.render_queue.dropped,
+                'display': self.display_queue.dropped,
+            },
+            'skipped_renders': self.skipped_renders,
+            'glass_to_alarm': percentiles(list(self.decision_latencies)),
+            'glass_to_display': percentiles(list(self.display_latencies)),
+        }
@@ -0,0 +1,204 @@
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+STAGES = ('capture', 'gray', 'detect', 'landmarks', 'features', 'status', 'draw', 'display')
+
+class _NullStage:
+    """Shared no-op context manager used while profiling is disabled"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+class _StageTimer:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+class StartupTimer:
+    def __init__(self):
+        # Seconds from creation to named milestones (models loaded, first frame, first face, ...),
+        # each recorded once
+        self.origin = time.perf_counter()
+        self.milestones = {}
+
+    def mark(self, name):
+        """Record a milestone the first time it is reached"""
+        if name not in self.milestones:
+            self.milestones[name] = time.perf_counter() - self.origin
+        return self.milestones[name]
+
+    def format_line(self):
+        """One-line text summary for logs"""
+        parts = [f"{name} {seconds:.2f}s" for name, seconds in self.milestones.items()]
+        return "[startup] " + ", ".join(parts)
+
+def prometheus_gauges(prefix, stats):
+    """Gauge lines for the numeric fields of a stats dict, flattening nested dicts into the name"""
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            lines += prometheus_gauges(f"{prefix}_{key}", value)
+        elif isinstance(value, (bool, int, float)):
+            lines += [f"# TYPE {prefix}_{key} gauge", f"{prefix}_{key} {float(value):g}"]
+    return lines
+
+class Profiler:
+    def __init__(self, enabled=False, window=300, log_interval=None, jsonl_path=None):
+        # Disabled profilers hand out a shared no-op context, so instrumentation costs ~nothing
+        self.enabled = enabled
+
+        # Rolling samples (seconds) per stage and frame completion times for FPS
+        self.window = window
+        self.samples = {stage: deque(maxlen=window) for stage in STAGES}
+        self.frame_times = deque(maxlen=window)
+
+        # Periodic outputs: a log line and/or a JSON lines dump every log_interval seconds
+        self.log_interval = log_interval
+        self.jsonl_path = jsonl_path
+        self.last_report = time.perf_counter()
+
+        # Startup milestones; recorded whether or not per-frame profiling is enabled
+        self.startup = StartupTimer()
+
+        # Other components' stats (name -> callable returning a dict), e.g. the load governor;
+        # included in summaries, and their numeric fields exported as Prometheus gauges
+        self.sources = {}
+
+        self.server = None
+
+    def stage(self, name):
+        """Context manager timing one stage: `with profiler.stage('detect'): ...`"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _StageTimer(self, name)
+
+    def record(self, name, seconds):
+        """Add a stage duration sample"""
+        if not self.enabled:
+            return
+        if name not in self.samples:
+            self.samples[name] = deque(maxlen=self.window)
+        self.samples[name].append(seconds)
+
+    def add_source(self, name, stats):
+        """Include stats() of another component in summaries and metrics under name"""
+        self.sources[name] = stats
+
+    def end_frame(self):
+        """Mark a frame as complete and emit periodic reports"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.frame_times.append(now)
+
+        if self.log_interval and now - self.last_report >= self.log_interval:
+            self.last_report = now
+            summary = self.summary()
+            print(self.format_log_line(summary))
+            if self.jsonl_path:
+                with open(self.jsonl_path, 'a') as f:
+                    f.write(json.dumps(summary) + '\n')
+
+    def fps(self):
+        """Frames per second over the rolling window"""
+        if len(self.frame_times) < 2:
+            return 0.0
+        span = self.frame_times[-1] - self.frame_times[0]
+        return (len(self.frame_times) - 1) / span if span > 0 else 0.0
+
+    def summary(self):
+        """Rolling p50/p95/p99 per stage in milliseconds, plus FPS and registered sources"""
+        stages = {}
+        for name, samples in list(self.samples.items()):
+            if not samples:
+                continue
+            values = np.array(samples) * 1000.0
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            stages[name] = {'count': len(values), 'mean_ms': float(values.mean()),
+                            'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99)}
+        summary = {'timestamp': time.time(), 'fps': self.fps(), 'stages': stages,
+                   'startup': dict(self.startup.milestones)}
+        for name, stats in list(self.sources.items()):
+            summary[name] = stats()
+        return summary
+
+    def format_log_line(self, summary=None):
+        """One-line text summary for logs"""
+        summary = summary or self.summary()
+        parts = [f"{name} {stats['p50_ms']:.1f}/{stats['p95_ms']:.1f}ms"
+                 for name, stats in summary['stages'].items()]
+        return f"[profile] {summary['fps']:.1f} FPS | p50/p95: " + ", ".join(parts)
+
+    def overlay_lines(self):
+        """Short lines suitable for drawing on a frame or showing in a label"""
+        summary = self.summary()
+        lines = [f"FPS: {summary['fps']:.1f}"]
+        for name, stats in summary['stages'].items():
+            lines.append(f"{name}: {stats['p50_ms']:.1f} / {stats['p95_ms']:.1f} / {stats['p99_ms']:.1f} ms")
+        return lines
+
+    def prometheus_text(self):
+        """Prometheus text exposition of the rolling stats"""
+        summary = self.summary()
+        lines = ["# TYPE drowsiness_fps gauge", f"drowsiness_fps {summary['fps']:.3f}",
+                 "# TYPE drowsiness_stage_seconds summary"]
+        for name, stats in summary['stages'].items():
+            for quantile, key in (('0.5', 'p50_ms'), ('0.95', 'p95_ms'), ('0.99', 'p99_ms')):
+                lines.append(f'drowsiness_stage_seconds{{stage="{name}",quantile="{quantile}"}} '
+                             f"{stats[key] / 1000.0:.6f}")
+            lines.append(f'drowsiness_stage_seconds_count{{stage="{name}"}} {stats["count"]}')
+        lines.append("# TYPE drowsiness_startup_seconds gauge")
+        for name, seconds in summary['startup'].items():
+            lines.append(f'drowsiness_startup_seconds{{milestone="{name}"}} {seconds:.6f}')
+        for name in list(self.sources):
+            lines += prometheus_gauges(f"drowsiness_{name}", summary[name])
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=9100, host='127.0.0.1'):
+        """Serve /metrics (Prometheus text) and /metrics.json on a local background thread"""
+        profiler = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics.json':
+                    body, content_type = json.dumps(profiler.summary()).encode(), 'application/json'
+                elif self.path == '/metrics':
+                    body, content_type = profiler.prometheus_text().encode(), 'text/plain; version=0.0.4'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server
+
+    def shutdown(self):
+        """Stop the metrics endpoint if it is running"""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server = None
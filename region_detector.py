@@ -0,0 +1,82 @@
+import cv2
+import numpy as np
+import dlib
+
+class RegionDetector:
+    def __init__(self, detector, scale=1.0, roi_padding=None, full_search_interval=30):
+        # Wrapped full-resolution face detector
+        self.detector = detector
+
+        # Downscale factor for the detection image (1.0 = full resolution)
+        self.scale = scale
+        # Padding around each previous face, as a fraction of its size; None searches the whole frame
+        self.roi_padding = roi_padding
+        # Search the whole frame at least every N calls so new faces are still picked up
+        self.full_search_interval = full_search_interval
+
+        # Faces found by the previous call, each searched for again in its own padded region
+        self.last_faces = []
+        self.calls_since_full_search = 0
+
+    def __call__(self, image):
+        """Detect faces and return rectangles in full-resolution coordinates"""
+        if self.roi_padding is not None and self.last_faces \
+                and self.calls_since_full_search < self.full_search_interval:
+            faces = self.detect_in_rois(image)
+            self.calls_since_full_search += 1
+            # Any face missing from its region (moved fast, left the frame) triggers a full search,
+            # so the others never drop out of the results and lose their track IDs
+            if faces is not None:
+                self.last_faces = faces
+                return faces
+
+        faces = self.detect_scaled(image, 0, 0)
+        self.calls_since_full_search = 0
+        self.last_faces = faces
+        return faces
+
+    def reset(self):
+        """Forget the previous faces so the next call searches the whole frame"""
+        self.last_faces = []
+
+    def detect_in_rois(self, image):
+        """Search a padded region around each previous face; None if any of them wasn't found"""
+        faces = []
+        for face in self.last_faces:
+            found = self.detect_in_roi(image, face)
+            if not found:
+                return None
+            # Regions of neighbouring faces can overlap, so skip faces already found
+            for candidate in found:
+                center = candidate.center()
+                if not any(other.contains(center) for other in faces):
+                    faces.append(candidate)
+        return faces
+
+    def detect_in_roi(self, image, face):
+        """Search only a padded region around one known face"""
+        pad_x = int(face.width() * self.roi_padding)
+        pad_y = int(face.height() * self.roi_padding)
+        height, width = image.shape[:2]
+        left = max(0, face.left() - pad_x)
+        top = max(0, face.top() - pad_y)
+        right = min(width, face.right() + pad_x)
+        bottom = min(height, face.bottom() + pad_y)
+        if right <= left or bottom <= top:
+            return []
+
+        roi = np.ascontiguousarray(image[top:bottom, left:right])
+        return self.detect_scaled(roi, left, top)
+
+    def detect_scaled(self, image, offset_x, offset_y):
+        """Run the detector on a downscaled copy and map rectangles back to full resolution"""
+        if self.scale != 1.0:
+            image = cv2.resize(image, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+
+        faces = []
+        for face in self.detector(image):
+            faces.append(dlib.rectangle(int(face.left() / self.scale) + offset_x,
+                                        int(face.top() / self.scale) + offset_y,
+                                        int(face.right() / self.scale) + offset_x,
+                                        int(face.bottom() / self.scale) + offset_y))
+        return faces
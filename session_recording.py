@@ -0,0 +1,146 @@
+import argparse
+import os
+import time
+import numpy as np
+from features import compute_features
+
+# File layout: a fixed 64-byte header followed by fixed-size little-endian records, so a
+# session can be appended to while live and memory-mapped as one structured array later
+MAGIC = b'DRWSREC1'
+HEADER_SIZE = 64
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),          # seconds (wall clock)
+    ('track_id', '<i4'),           # face track, see multi_face.py
+    ('box', '<i2', (4,)),          # left, top, right, bottom
+    ('landmarks', '<i2', (68, 2)),
+    ('ear', '<f4'),
+    ('mar', '<f4'),
+])
+
+class SessionRecorder:
+    def __init__(self, path, flush_every=64):
+        # Records are staged in a preallocated block and written in one call when it fills up
+        self.path = path
+        self.buffer = np.zeros(flush_every, dtype=RECORD_DTYPE)
+        self.pending = 0
+        self.count = 0
+
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, 'ab')
+        if new_file:
+            self.file.write(MAGIC.ljust(HEADER_SIZE, b'\0'))
+        else:
+            with open(path, 'rb') as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    self.file.close()
+                    raise ValueError(f"{path} is not a session recording")
+
+    def record(self, timestamp, face, landmarks, ear, mar, track_id=0):
+        """Append one face sample"""
+        row = self.buffer[self.pending]
+        row['timestamp'] = timestamp
+        row['track_id'] = track_id
+        row['box'] = (face.left(), face.top(), face.right(), face.bottom())
+        row['landmarks'] = landmarks
+        row['ear'] = ear
+        row['mar'] = mar
+        self.pending += 1
+        self.count += 1
+        if self.pending == len(self.buffer):
+            self.flush()
+
+    def extend(self, records):
+        """Append a structured array of records, e.g. from session_records"""
+        self.flush()
+        self.file.write(np.ascontiguousarray(records, dtype=RECORD_DTYPE).tobytes())
+        self.file.flush()
+        self.count += len(records)
+
+    def flush(self):
+        """Write staged records to disk"""
+        if self.pending:
+            self.file.write(self.buffer[:self.pending].tobytes())
+            self.file.flush()
+            self.pending = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+def session_records(timestamps, landmarks, ear, mar, track_id=0):
+    """Pack per-frame arrays (e.g. a synthetic_session) into records, boxing each face's landmarks"""
+    records = np.zeros(len(timestamps), dtype=RECORD_DTYPE)
+    records['timestamp'] = timestamps
+    records['track_id'] = track_id
+    records['landmarks'] = landmarks
+    records['box'][:, :2] = np.min(landmarks, axis=1)
+    records['box'][:, 2:] = np.max(landmarks, axis=1)
+    records['ear'] = ear
+    records['mar'] = mar
+    return records
+
+def load_session(path):
+    """Memory-map a recording as a structured array with RECORD_DTYPE fields"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a session recording")
+    count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if count <= 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+def recompute_features(records):
+    """Recompute EAR and MAR from the stored landmarks in one vectorized pass"""
+    features = compute_features(records['landmarks'])
+    return features['ear'], features['mar']
+
+def replay_session(records, decide, track_id=None, recompute=False):
+    """Stream recorded samples through decide(timestamp, ear, mar) and return per-record drowsiness levels
+
+    decide is e.g. `lambda t, ear, mar: detector.get_detection_status(ear, mar, t)` or a
+    DecisionEngine's update. With several tracks, pass track_id to replay one identity.
+    """
+    if track_id is not None:
+        records = records[records['track_id'] == track_id]
+    if recompute:
+        ears, mars = recompute_features(records)
+    else:
+        ears, mars = records['ear'].astype(np.float64), records['mar'].astype(np.float64)
+
+    # Plain Python floats are much faster than NumPy scalars in the per-sample loop
+    timestamps = records['timestamp'].tolist()
+    levels = np.zeros(len(timestamps), dtype=np.int8)
+    for i, (timestamp, ear, mar) in enumerate(zip(timestamps, ears.tolist(), mars.tolist())):
+        levels[i] = decide(timestamp, ear, mar)['drowsiness_level']
+    return levels
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or replay a recorded session")
+    parser.add_argument("recording")
+    parser.add_argument("--time-based", action="store_true", help="replay through the time-based decision engine")
+    parser.add_argument("--ear-threshold", type=float, default=0.15)
+    parser.add_argument("--yawn-threshold", type=float, default=0.35)
+    parser.add_argument("--recompute", action="store_true", help="recompute EAR/MAR from the landmarks")
+    args = parser.parse_args()
+
+    records = load_session(args.recording)
+    tracks = np.unique(records['track_id'])
+    duration = float(records['timestamp'][-1] - records['timestamp'][0]) if len(records) else 0.0
+    print(f"{args.recording}: {len(records)} samples, {len(tracks)} tracks, {duration:.1f} s")
+
+    from drowsiness_detector import DrowsinessDetector
+    from decision_engine import DecisionEngine
+    for track in tracks:
+        # A silent detector holds the per-face state, exactly as in the live loop
+        engine = DecisionEngine() if args.time_based else None
+        state = DrowsinessDetector(enable_audio=False, decision_engine=engine)
+        state.EAR_THRESHOLD = args.ear_threshold
+        state.YAWN_THRESHOLD = args.yawn_threshold
+        decide = lambda t, ear, mar: state.get_detection_status(ear, mar, t)
+
+        start = time.perf_counter()
+        levels = replay_session(records, decide, track_id=track, recompute=args.recompute)
+        elapsed = time.perf_counter() - start
+        onsets = int(np.sum(np.diff(np.concatenate(([0], levels))) > 0))
+        print(f"  track {track}: {len(levels)} samples, {onsets} alarms, "
+              f"{len(levels) / elapsed if elapsed > 0 else 0.0:,.0f} samples/s")
@@ -0,0 +1,117 @@
+import numpy as np
+
+# Landmarks of the 68-point model whose vertical offset sets the EAR / MAR of a face
+EYE_TOP = [37, 38, 43, 44]
+EYE_BOTTOM = [41, 40, 47, 46]
+INNER_MOUTH_TOP = [61, 62, 63]
+INNER_MOUTH_BOTTOM = [67, 66, 65]
+OUTER_MOUTH_TOP = [49, 50, 51, 52, 53]
+OUTER_MOUTH_BOTTOM = [59, 58, 57, 56, 55]
+
+# With these half-widths, EAR = d / EYE_HALF_WIDTH and MAR = 3 d / (2 MOUTH_HALF_WIDTH),
+# where d is how far the top and bottom points sit from the eye / mouth centre line
+EYE_HALF_WIDTH = 20.0
+MOUTH_HALF_WIDTH = 30.0
+
+# Typical feature values for the generated sessions
+OPEN_EAR, CLOSED_EAR = 0.30, 0.05
+CLOSED_MAR, YAWN_MAR = 0.05, 0.70
+
+def template_face(center=(320.0, 260.0)):
+    """A synthetic frontal (68, 2) face with eyes and mouth shut, in float64 pixel coordinates"""
+    cx, cy = center
+    points = np.zeros((68, 2))
+
+    # Jaw line (0-16): lower half of an ellipse
+    angles = np.linspace(np.pi, 0.0, 17)
+    points[0:17, 0] = cx + 110 * np.cos(angles)
+    points[0:17, 1] = cy - 20 + 130 * np.sin(angles)
+    # Brows (17-26)
+    points[17:22, 0] = np.linspace(cx - 90, cx - 20, 5)
+    points[22:27, 0] = np.linspace(cx + 20, cx + 90, 5)
+    points[17:27, 1] = cy - 75
+    # Nose bridge (27-30) and base (31-35)
+    points[27:31, 0] = cx
+    points[27:31, 1] = np.linspace(cy - 50, cy, 4)
+    points[31:36, 0] = np.linspace(cx - 20, cx + 20, 5)
+    points[31:36, 1] = cy + 10
+
+    # Eyes (36-41 left, 42-47 right): outer corner, two top points, inner corner, two bottom points
+    for start, ex in ((36, cx - 60), (42, cx + 60)):
+        points[start:start + 6, 0] = [ex - EYE_HALF_WIDTH, ex - 7, ex + 7, ex + EYE_HALF_WIDTH, ex + 7, ex - 7]
+        points[start:start + 6, 1] = cy - 40
+
+    # Outer lips (48-59) and inner lips (60-67)
+    my = cy + 60
+    points[48:55, 0] = np.linspace(cx - 40, cx + 40, 7)
+    points[55:60, 0] = np.linspace(cx + 27, cx - 27, 5)
+    points[60:68, 0] = [cx - MOUTH_HALF_WIDTH, cx - 15, cx, cx + 15, cx + MOUTH_HALF_WIDTH, cx + 15, cx, cx - 15]
+    points[48:68, 1] = my
+    return points
+
+def faces_from_features(ear, mar, template=None):
+    """Build (N, 68, 2) float landmarks whose EAR and MAR equal the given per-frame values"""
+    template = template_face() if template is None else template
+    ear = np.asarray(ear, dtype=np.float64)
+    mar = np.asarray(mar, dtype=np.float64)
+    faces = np.repeat(template[None], len(ear), axis=0)
+
+    eye_offset = (ear * EYE_HALF_WIDTH)[:, None]
+    faces[:, EYE_TOP, 1] -= eye_offset
+    faces[:, EYE_BOTTOM, 1] += eye_offset
+
+    mouth_offset = (mar * 2.0 * MOUTH_HALF_WIDTH / 3.0)[:, None]
+    faces[:, INNER_MOUTH_TOP, 1] -= mouth_offset
+    faces[:, INNER_MOUTH_BOTTOM, 1] += mouth_offset
+    faces[:, OUTER_MOUTH_TOP, 1] -= mouth_offset + 6.0
+    faces[:, OUTER_MOUTH_BOTTOM, 1] += mouth_offset + 6.0
+    return faces
+
+def synthetic_session(duration=120.0, fps=30.0, seed=0, blinks_per_minute=15, drowsy_episodes=4, yawns=3,
+                      noise=0.01, open_ear=OPEN_EAR, rest_mar=CLOSED_MAR):
+    """Generate a reproducible labelled session of EAR/MAR values and matching landmarks
+
+    open_ear and rest_mar set the driver's baseline, e.g. narrow eyes or a slightly open mouth.
+    Returns a dict with 'timestamps' (s), 'ear', 'mar', 'landmarks' (N, 68, 2 int16),
+    'labels' (True while the driver is drowsy) and the ground-truth 'episodes'.
+    """
+    rng = np.random.default_rng(seed)
+    count = int(duration * fps)
+    if count < 1:
+        raise ValueError(f"A synthetic session needs at least one frame, got {duration} s at {fps} FPS")
+    timestamps = np.arange(count) / fps
+    ear = np.full(count, open_ear)
+    mar = np.full(count, rest_mar)
+    labels = np.zeros(count, dtype=bool)
+    episodes = []
+
+    def span(length):
+        # Blinks and episodes longer than the session are cut to its length
+        length = min(length, duration)
+        start = int(rng.uniform(0, duration - length) * fps)
+        return start, min(count, start + max(1, int(length * fps)))
+
+    # Short blinks are normal behaviour and must not be labelled drowsy
+    for _ in range(int(duration / 60.0 * blinks_per_minute)):
+        start, end = span(rng.uniform(0.1, 0.25))
+        ear[start:end] = CLOSED_EAR
+
+    # Long eye closures and yawns are the drowsy episodes
+    for kind, number, low, high in (('eyes_closed', drowsy_episodes, 1.5, 3.0), ('yawn', yawns, 3.0, 5.0)):
+        for _ in range(number):
+            start, end = span(rng.uniform(low, high))
+            if kind == 'eyes_closed':
+                ear[start:end] = CLOSED_EAR
+            else:
+                mar[start:end] = YAWN_MAR
+            labels[start:end] = True
+            episodes.append({'kind': kind, 'start': timestamps[start], 'end': timestamps[end - 1]})
+
+    # Measurement noise, then landmarks quantized like real predictor output
+    ear = np.clip(ear + rng.normal(0, noise, count), 0.0, None)
+    mar = np.clip(mar + rng.normal(0, noise, count), 0.0, None)
+    landmarks = np.rint(faces_from_features(ear, mar)).astype(np.int16)
+
+    episodes.sort(key=lambda episode: episode['start'])
+    return {'timestamps': timestamps, 'ear': ear, 'mar': mar, 'landmarks': landmarks,
+            'labels': labels, 'episodes': episodes, 'fps': fps}
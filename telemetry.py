@@ -0,0 +1,638 @@
+import abc
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import os
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+from decision_engine import SlidingWindow
+from pipeline import DropOldestQueue
+
+# Every record is a JSON object whose 'type' is 'event' (state changes, sent as soon as they happen)
+# or 'metrics' (one per interval with per-track EAR/MAR, PERCLOS, FPS and alarm state)
+WEBSOCKET_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+def encode_records(records):
+    """Compact JSON array of records"""
+    return json.dumps(records, separators=(',', ':')).encode()
+
+class TelemetrySink(abc.ABC):
+    """Base class for telemetry destinations; send() receives a list of records"""
+    name = 'sink'
+
+    async def open(self):
+        pass
+
+    @abc.abstractmethod
+    async def send(self, records):
+        """Deliver one batch of records"""
+
+    async def close(self):
+        pass
+
+class HttpSink(TelemetrySink):
+    def __init__(self, url):
+        # Each batch is POSTed as a JSON array; any 2xx answer counts as delivered
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"Telemetry URL must be http(s)://host[:port]/path, got {url}")
+        self.name = url
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = parts.scheme == 'https'
+        self.path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+
+    async def send(self, records):
+        body = encode_records(records)
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl or None)
+        try:
+            writer.write(f"POST {self.path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                         f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                         f"Connection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+            status_line = await reader.readline()
+        finally:
+            writer.close()
+        status = status_line.split()
+        if len(status) < 2 or not status[1].startswith(b'2'):
+            raise ConnectionError(f"{self.name} answered {status_line.decode(errors='replace').strip() or 'nothing'}")
+
+class WebSocketSink(TelemetrySink):
+    def __init__(self, port=8765, host='127.0.0.1', history=300, max_buffer=1 << 20):
+        # Local endpoint for dashboards: WebSocket clients get every batch as a text frame,
+        # and a plain GET returns the last `history` records as JSON
+        self.name = f"ws://{host}:{port}"
+        self.host = host
+        self.port = port
+        self.recent = deque(maxlen=history)
+        # Clients with more than max_buffer bytes unsent are disconnected instead of buffered
+        self.max_buffer = max_buffer
+        self.clients = set()
+        self.server = None
+
+    async def open(self):
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+
+    async def handle(self, reader, writer):
+        """Serve one connection: a WebSocket upgrade or a plain GET"""
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), 5.0)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        headers = {}
+        for line in request.split(b'\r\n')[1:]:
+            name, _, value = line.partition(b':')
+            headers[name.strip().lower()] = value.strip()
+
+        key = headers.get(b'sec-websocket-key')
+        if key is None:
+            body = encode_records(list(self.recent))
+            writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                         f"Connection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+            writer.close()
+            return
+
+        accept = base64.b64encode(hashlib.sha1(key + WEBSOCKET_GUID).digest())
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        self.clients.add(writer)
+        try:
+            # Clients only send control frames; answer pings and wait for the close
+            while True:
+                opcode, payload = await read_websocket_frame(reader)
+                if opcode == 0x8:
+                    break
+                if opcode == 0x9:
+                    writer.write(websocket_frame(payload, 0xA))
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass  # Cancelled at shutdown: just close the connection
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    async def send(self, records):
+        self.recent.extend(records)
+        frame = websocket_frame(encode_records(records))
+        for writer in list(self.clients):
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                self.clients.discard(writer)
+                writer.close()
+            else:
+                writer.write(frame)
+
+    async def close(self):
+        for writer in list(self.clients):
+            writer.close()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+def websocket_frame(payload, opcode=0x1):
+    """One unmasked, unfragmented server frame (text by default)"""
+    length = len(payload)
+    if length < 126:
+        head = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 1 << 16:
+        head = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        head = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return head + payload
+
+async def read_websocket_frame(reader):
+    """Read one client frame and return (opcode, unmasked payload)"""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', await reader.readexactly(8))[0]
+    if length > 1 << 16:
+        raise ConnectionError("WebSocket client frame too large")
+    mask = await reader.readexactly(4) if second & 0x80 else b'\0\0\0\0'
+    payload = await reader.readexactly(length)
+    return first & 0x0F, bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+
+class UdpSink(TelemetrySink):
+    def __init__(self, host, port):
+        # One record per datagram; sending never waits, and a lost datagram only loses that record
+        self.name = f"udp://{host}:{port}"
+        self.address = (host, port)
+        self.transport = None
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol,
+                                                                remote_addr=self.address)
+
+    async def send(self, records):
+        for record in records:
+            self.transport.sendto(json.dumps(record, separators=(',', ':')).encode())
+
+    async def close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+class JsonlSink(TelemetrySink):
+    def __init__(self, path, max_bytes=10_000_000, backups=5):
+        # Appends one record per line; at max_bytes the file moves to path.1 (path.1 to path.2, ...)
+        # and the oldest of `backups` files is discarded
+        self.name = path
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.file = None
+        # A write whose send timed out keeps running on its thread, so writes, rotation and
+        # closing are serialized
+        self.lock = threading.Lock()
+
+    async def send(self, records):
+        # File writes run on a worker thread so a slow disk never blocks the event loop
+        await asyncio.to_thread(self.write, records)
+
+    def write(self, records):
+        data = ''.join(json.dumps(record) + '\n' for record in records).encode()
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.path, 'ab')
+            if self.max_bytes and self.file.tell() > 0 and self.file.tell() + len(data) > self.max_bytes:
+                self.rotate()
+            self.file.write(data)
+            self.file.flush()
+
+    def rotate(self):
+        """Shift path -> path.1 -> path.2 ... and start a new file"""
+        self.file.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.file = open(self.path, 'ab')
+
+    async def close(self):
+        await asyncio.to_thread(self.close_file)
+
+    def close_file(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+class TelemetryPublisher:
+    def __init__(self, sinks, source=None, interval=1.0, max_events=1000, max_pending=60, max_batch=500,
+                 send_timeout=2.0, perclos_window=60.0):
+        # Sinks are driven by an asyncio loop on a background thread. The frame loop only calls
+        # record(), which updates this interval's counters under a short lock and never waits on I/O.
+        self.sinks = list(sinks)
+        # Driver, vehicle or camera ID sent with every record
+        self.source = source or socket.gethostname()
+        # Metrics are aggregated over `interval` seconds; events go out as soon as they happen
+        self.interval = interval
+        self.send_timeout = send_timeout
+        # Without the time-based engine's PERCLOS, it is computed here over this many seconds
+        self.perclos_window = perclos_window
+
+        self.lock = threading.Lock()
+        self.window = self.new_window(time.time())
+        self.tracks = {}  # track_id -> drowsiness state used to detect events
+        self.alarm_on = False
+
+        # Backpressure: events waiting for the loop and batches waiting for each sink are bounded,
+        # and the oldest are dropped (and counted) when a sink falls behind
+        self.events = DropOldestQueue(max_events)
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self.pending = {sink.name: deque() for sink in self.sinks}
+        self.sent = {sink.name: 0 for sink in self.sinks}
+        self.dropped = {sink.name: 0 for sink in self.sinks}
+        self.errors = {sink.name: 0 for sink in self.sinks}
+        self.last_error = {sink.name: None for sink in self.sinks}
+
+        self.loop = None
+        self.thread = None
+        self.wakeup = None
+        self.signals = {}
+        self.ready = threading.Event()
+        self.error = None
+        self.running = False
+        # Set once the final batch has been dispatched; senders exit when it is set and their queue is empty
+        self.closing = False
+
+    def new_window(self, start):
+        return {'start': start, 'frames': 0, 'alarm_frames': 0, 'tracks': {}}
+
+    def event(self, name, timestamp, **fields):
+        return {'type': 'event', 'event': name, 'timestamp': timestamp, 'source': self.source, **fields}
+
+    def record(self, results, alarm_on=False, ear_threshold=None, timestamp=None):
+        """Fold one frame's per-face results into the current interval and queue state-change events"""
+        timestamp = time.time() if timestamp is None else timestamp
+        events = []
+        with self.lock:
+            window = self.window
+            window['frames'] += 1
+            window['alarm_frames'] += bool(alarm_on)
+            for result in results:
+                track_id, status = result['track_id'], result['status']
+                ear, mar = float(result['ear']), float(result['mar'])
+                stats = window['tracks'].get(track_id)
+                if stats is None:
+                    stats = window['tracks'][track_id] = {'frames': 0, 'ear_sum': 0.0, 'ear_min': math.inf,
+                                                          'mar_sum': 0.0, 'mar_max': -math.inf, 'level': 0}
+                stats['frames'] += 1
+                stats['ear_sum'] += ear
+                stats['ear_min'] = min(stats['ear_min'], ear)
+                stats['mar_sum'] += mar
+                stats['mar_max'] = max(stats['mar_max'], mar)
+                stats['level'] = max(stats['level'], status['drowsiness_level'])
+
+                track = self.tracks.get(track_id)
+                if track is None:
+                    track = self.tracks[track_id] = {'level': 0, 'yawn': False, 'since': timestamp,
+                                                     'perclos': SlidingWindow(self.perclos_window)}
+                if 'perclos' in status:
+                    stats['perclos'] = status['perclos']
+                elif ear_threshold is not None:
+                    track['perclos'].update(timestamp, 1.0 if ear < ear_threshold else 0.0)
+                    stats['perclos'] = track['perclos'].mean()
+
+                level = status['drowsiness_level']
+                if level != track['level']:
+                    if level > 0:
+                        events.append(self.event('drowsy_start', timestamp, track_id=track_id, ear=ear, mar=mar,
+                                                 eye_status=status['eye_status'],
+                                                 yawn_status=status['yawn_status'],
+                                                 perclos=stats.get('perclos')))
+                    else:
+                        events.append(self.event('drowsy_end', timestamp, track_id=track_id,
+                                                 duration=timestamp - track['since']))
+                    track['level'] = level
+                    track['since'] = timestamp
+                if status['yawn_detected'] and not track['yawn']:
+                    events.append(self.event('yawn', timestamp, track_id=track_id, mar=mar))
+                track['yawn'] = status['yawn_detected']
+
+            if bool(alarm_on) != self.alarm_on:
+                self.alarm_on = bool(alarm_on)
+                events.append(self.event('alarm_on' if alarm_on else 'alarm_off', timestamp))
+
+        if events:
+            for event in events:
+                self.events.put(event)
+            self.notify()
+
+    def notify(self):
+        """Wake the publisher loop so events go out without waiting for the next interval"""
+        if self.running:
+            try:
+                self.loop.call_soon_threadsafe(self.wakeup.set)
+            except RuntimeError:
+                pass  # Loop already closed
+
+    def take_metrics(self, now):
+        """Close the current interval: its metrics record plus events for faces that disappeared"""
+        with self.lock:
+            window, self.window = self.window, self.new_window(now)
+            alarm_on = self.alarm_on
+            lost = [track_id for track_id in self.tracks if track_id not in window['tracks']]
+            records = []
+            for track_id in lost:
+                track = self.tracks.pop(track_id)
+                if track['level'] > 0:
+                    records.append(self.event('drowsy_end', now, track_id=track_id,
+                                              duration=now - track['since'], face_lost=True))
+
+        elapsed = now - window['start']
+        frames = window['frames']
+        tracks = []
+        for track_id, stats in window['tracks'].items():
+            tracks.append({'track_id': track_id,
+                           'ear_mean': stats['ear_sum'] / stats['frames'], 'ear_min': stats['ear_min'],
+                           'mar_mean': stats['mar_sum'] / stats['frames'], 'mar_max': stats['mar_max'],
+                           'perclos': stats.get('perclos'), 'drowsiness_level': stats['level']})
+        records.append({'type': 'metrics', 'timestamp': now, 'source': self.source, 'interval': elapsed,
+                        'frames': frames, 'fps': frames / elapsed if elapsed > 0 else 0.0,
+                        'alarm_on': alarm_on, 'alarm_fraction': window['alarm_frames'] / frames if frames else 0.0,
+                        'faces': len(tracks), 'tracks': tracks})
+        return records
+
+    def start(self, timeout=5.0):
+        """Open the sinks on a background event loop; raises if one of them can't be opened"""
+        self.thread = threading.Thread(target=self.run_loop, name='telemetry', daemon=True)
+        self.thread.start()
+        if not self.ready.wait(timeout):
+            raise TimeoutError("Telemetry sinks did not open in time")
+        if self.error is not None:
+            self.thread.join()
+            raise self.error
+        return self
+
+    def stop(self, timeout=5.0):
+        """Send the last interval and whatever is still queued (within send_timeout), then close the sinks"""
+        if self.thread is None:
+            return
+        if self.running:
+            self.loop.call_soon_threadsafe(self.request_stop)
+        self.thread.join(timeout)
+        self.thread = None
+
+    def request_stop(self):
+        self.running = False
+        self.wakeup.set()
+
+    def run_loop(self):
+        asyncio.run(self.main())
+
+    async def main(self):
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+        opened = []
+        try:
+            for sink in self.sinks:
+                await sink.open()
+                opened.append(sink)
+        except Exception as e:
+            self.error = e
+            for sink in opened:
+                await sink.close()
+            self.ready.set()
+            return
+
+        loop = self.loop
+        self.signals = {sink.name: asyncio.Event() for sink in self.sinks}
+        senders = [asyncio.create_task(self.sender(sink)) for sink in self.sinks]
+        with self.lock:
+            self.window['start'] = time.time()
+        self.closing = False
+        self.running = True
+        self.ready.set()
+
+        next_metrics = loop.time() + self.interval
+        while self.running:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), max(0.0, next_metrics - loop.time()))
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            batch = self.events.drain()
+            if not self.running or loop.time() >= next_metrics:
+                batch.extend(self.take_metrics(time.time()))
+                next_metrics = max(next_metrics + self.interval, loop.time())
+            if batch:
+                self.dispatch(batch)
+
+        self.closing = True
+        for signal in self.signals.values():
+            signal.set()
+        done, remaining = await asyncio.wait(senders, timeout=self.send_timeout)
+        for task in remaining:
+            task.cancel()
+        await asyncio.gather(*remaining, return_exceptions=True)
+        for sink in self.sinks:
+            await sink.close()
+
+    def dispatch(self, batch):
+        """Queue a batch for every sink, dropping a sink's oldest batch when it is too far behind"""
+        for sink in self.sinks:
+            queue = self.pending[sink.name]
+            if len(queue) >= self.max_pending:
+                self.dropped[sink.name] += len(queue.popleft())
+            queue.append(batch)
+            self.signals[sink.name].set()
+
+    async def sender(self, sink):
+        """Send one sink's queued batches in order, merging a backlog into larger batches"""
+        queue, signal = self.pending[sink.name], self.signals[sink.name]
+        while not self.closing or queue:
+            if not queue:
+                await signal.wait()
+                signal.clear()
+                continue
+            batch = []
+            while queue and len(batch) < self.max_batch:
+                batch.extend(queue.popleft())
+            try:
+                await asyncio.wait_for(sink.send(batch), self.send_timeout)
+                self.sent[sink.name] += len(batch)
+            except Exception as e:
+                self.errors[sink.name] += 1
+                self.dropped[sink.name] += len(batch)
+                self.last_error[sink.name] = f"{type(e).__name__}: {e}"
+
+    def stats(self):
+        """Delivery counters per sink"""
+        return {
+            'events_dropped': self.events.dropped,
+            'sinks': {sink.name: {'sent': self.sent[sink.name], 'dropped': self.dropped[sink.name],
+                                  'errors': self.errors[sink.name], 'pending': len(self.pending[sink.name]),
+                                  'last_error': self.last_error[sink.name]}
+                      for sink in self.sinks},
+        }
+
+class StandInServer:
+    def __init__(self, host='127.0.0.1', http_port=0, udp_port=0, delay=0.0, on_records=None):
+        # Local stand-in for the fleet backend: accepts HTTP POSTs of record arrays and UDP datagrams
+        # of single records. Port 0 picks a free port. `delay` holds every HTTP answer back, to
+        # simulate a slow backend.
+        self.host = host
+        self.http_port = http_port
+        self.udp_port = udp_port
+        self.delay = delay
+        self.on_records = on_records
+        self.received = []
+        self.requests = 0
+        self.loop = None
+        self.thread = None
+        self.ready = threading.Event()
+        self.stopped = None
+
+    @property
+    def http_url(self):
+        return f"http://{self.host}:{self.http_port}/telemetry"
+
+    def add(self, records):
+        self.received.extend(records)
+        if self.on_records is not None:
+            self.on_records(records)
+
+    async def handle_http(self, reader, writer):
+        try:
+            request = await reader.readuntil(b'\r\n\r\n')
+            length = 0
+            for line in request.split(b'\r\n')[1:]:
+                name, _, value = line.partition(b':')
+                if name.strip().lower() == b'content-length':
+                    length = int(value)
+            records = json.loads(await reader.readexactly(length)) if length else []
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            self.requests += 1
+            self.add(records)
+            writer.write(b"HTTP/1.1 204 No Content\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError,
+                asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def main(self):
+        self.loop = asyncio.get_running_loop()
+        server = await asyncio.start_server(self.handle_http, self.host, self.http_port)
+        self.http_port = server.sockets[0].getsockname()[1]
+        stand_in = self
+
+        class UdpReceiver(asyncio.DatagramProtocol):
+            def datagram_received(self, data, address):
+                stand_in.add([json.loads(data)])
+
+        transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+            UdpReceiver, local_addr=(self.host, self.udp_port))
+        self.udp_port = transport.get_extra_info('sockname')[1]
+        self.stopped = asyncio.Event()
+        self.ready.set()
+        await self.stopped.wait()
+        transport.close()
+        server.close()
+        await server.wait_closed()
+
+    def start(self):
+        """Serve on a background thread; the actual ports are set once this returns"""
+        self.thread = threading.Thread(target=asyncio.run, args=(self.main(),), daemon=True)
+        self.thread.start()
+        self.ready.wait(5.0)
+        return self
+
+    def stop(self):
+        if self.thread is not None:
+            self.loop.call_soon_threadsafe(self.stopped.set)
+            self.thread.join(5.0)
+            self.thread = None
+
+def add_telemetry_arguments(parser):
+    """Command-line options selecting telemetry sinks"""
+    parser.add_argument("--telemetry-http", default=None, metavar="URL",
+                        help="POST telemetry batches as JSON arrays to this URL")
+    parser.add_argument("--telemetry-ws", type=int, default=None, metavar="PORT",
+                        help="serve telemetry on ws://127.0.0.1:PORT (a plain GET returns recent records)")
+    parser.add_argument("--telemetry-udp", default=None, metavar="HOST:PORT",
+                        help="send each telemetry record as a UDP datagram")
+    parser.add_argument("--telemetry-jsonl", default=None, metavar="PATH",
+                        help="append telemetry to a rotating JSON lines file")
+    parser.add_argument("--telemetry-source", default=None,
+                        help="driver, vehicle or camera ID sent with every record (default: host name)")
+    parser.add_argument("--telemetry-interval", type=float, default=1.0, help="seconds per metrics record")
+
+def publisher_from_args(args):
+    """Build (but don't start) the publisher selected by add_telemetry_arguments options, or None"""
+    sinks = []
+    if args.telemetry_http:
+        sinks.append(HttpSink(args.telemetry_http))
+    if args.telemetry_ws is not None:
+        sinks.append(WebSocketSink(args.telemetry_ws))
+    if args.telemetry_udp:
+        host, _, port = args.telemetry_udp.rpartition(':')
+        sinks.append(UdpSink(host or '127.0.0.1', int(port)))
+    if args.telemetry_jsonl:
+        sinks.append(JsonlSink(args.telemetry_jsonl))
+    if not sinks:
+        return None
+    return TelemetryPublisher(sinks, source=args.telemetry_source, interval=args.telemetry_interval)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Telemetry stand-in server and synthetic publisher")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    listen = subparsers.add_parser("listen", help="run a local stand-in for the fleet backend and print what arrives")
+    listen.add_argument("--http-port", type=int, default=8080)
+    listen.add_argument("--udp-port", type=int, default=9999)
+    listen.add_argument("--delay", type=float, default=0.0, help="hold every HTTP answer back this long (seconds)")
+
+    demo = subparsers.add_parser("demo", help="publish a synthetic drive in real time")
+    demo.add_argument("--duration", type=float, default=60.0, help="seconds of synthetic driving")
+    add_telemetry_arguments(demo)
+    args = parser.parse_args()
+
+    if args.command == "listen":
+        def show(records):
+            for record in records:
+                print(json.dumps(record))
+
+        server = StandInServer(http_port=args.http_port, udp_port=args.udp_port, delay=args.delay,
+                               on_records=show).start()
+        print(f"Listening on {server.http_url} and udp://{server.host}:{server.udp_port} (Ctrl+C to stop)")
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            server.stop()
+    else:
+        from drowsiness_detector import DrowsinessDetector
+        from synthetic_fixtures import synthetic_session
+
+        publisher = publisher_from_args(args)
+        if publisher is None:
+            parser.error("select at least one sink, e.g. --telemetry-http http://127.0.0.1:8080/telemetry")
+        publisher.start()
+        session = synthetic_session(duration=args.duration)
+        state = DrowsinessDetector(enable_audio=False)
+        start = time.perf_counter()
+        for t, ear, mar in zip(session['timestamps'].tolist(), session['ear'].tolist(), session['mar'].tolist()):
+            delay = start + t - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            status = state.get_detection_status(ear, mar, t)
+            publisher.record([{'track_id': 0, 'ear': ear, 'mar': mar, 'status': status}], state.alarm_on,
+                             state.EAR_THRESHOLD)
+        publisher.stop()
+        print(json.dumps(publisher.stats(), indent=2))
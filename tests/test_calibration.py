@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+from calibration import EAR_THRESHOLD_RANGE, YAWN_THRESHOLD_RANGE, DriverCalibration, P2Quantile, ProfileStore
+from drowsiness_detector import FaceState
+
+@pytest.mark.parametrize('q', [0.1, 0.5, 0.9])
+@pytest.mark.parametrize('distribution', ['uniform', 'normal', 'skewed'])
+def test_p2_tracks_the_sample_quantile(q, distribution):
+    rng = np.random.default_rng(1)
+    samples = {'uniform': lambda: rng.uniform(0, 1, 20000),
+               'normal': lambda: rng.normal(0.3, 0.02, 20000),
+               'skewed': lambda: rng.exponential(0.05, 20000)}[distribution]()
+    estimator = P2Quantile(q)
+    for value in samples.tolist():
+        estimator.update(value)
+    assert estimator.count == len(samples)
+    # Within a percentile of the exact quantile
+    assert np.quantile(samples, q - 0.01) <= estimator.value() <= np.quantile(samples, q + 0.01)
+
+def test_p2_is_exact_for_few_samples():
+    estimator = P2Quantile(0.5)
+    assert estimator.value() is None
+    for value in (0.4, 0.1, 0.3):
+        estimator.update(value)
+    assert estimator.value() == 0.3
+
+def test_p2_ignores_a_minority_of_outliers():
+    # Blinks and yawns among open-eye frames must not drag the open-eye median
+    rng = np.random.default_rng(2)
+    values = np.where(rng.uniform(size=5000) < 0.1, 0.05, rng.normal(0.32, 0.01, 5000))
+    estimator = P2Quantile(0.5)
+    for value in values.tolist():
+        estimator.update(value)
+    assert estimator.value() == pytest.approx(0.32, abs=0.005)
+
+def calibrate(calibration, ear, mar, fps=30.0, seconds=None, start=0.0):
+    """Feed constant features until the calibration completes (or for `seconds`); returns the last timestamp"""
+    i, timestamp = 0, start
+    while seconds is None or i < seconds * fps:
+        timestamp = start + i / fps
+        if calibration.update(timestamp, ear, mar):
+            break
+        i += 1
+    return timestamp
+
+def test_thresholds_follow_the_driver_baseline():
+    calibration = DriverCalibration(duration=10.0)
+    finished = calibrate(calibration, 0.24, 0.10)
+    assert finished == pytest.approx(10.0)
+    assert calibration.calibrated and calibration.progress() == 1.0
+    thresholds = calibration.thresholds()
+    assert thresholds['EAR_THRESHOLD'] == pytest.approx(0.12)
+    assert thresholds['BLINK_THRESHOLD'] == thresholds['EAR_THRESHOLD']
+    assert thresholds['YAWN_THRESHOLD'] == pytest.approx(0.40)
+
+    state = FaceState()
+    calibration.apply(state)
+    assert (state.EAR_THRESHOLD, state.YAWN_THRESHOLD) == (thresholds['EAR_THRESHOLD'], thresholds['YAWN_THRESHOLD'])
+
+def test_defaults_reproduce_the_fixed_thresholds():
+    calibration = DriverCalibration(duration=5.0)
+    calibrate(calibration, 0.30, 0.05)
+    thresholds = calibration.thresholds()
+    assert thresholds['EAR_THRESHOLD'] == pytest.approx(FaceState().EAR_THRESHOLD)
+    assert thresholds['YAWN_THRESHOLD'] == pytest.approx(FaceState().YAWN_THRESHOLD)
+
+def test_thresholds_are_clamped():
+    calibration = DriverCalibration(duration=5.0)
+    calibrate(calibration, 0.9, 0.9)
+    thresholds = calibration.thresholds()
+    assert thresholds['EAR_THRESHOLD'] == EAR_THRESHOLD_RANGE[1]
+    assert thresholds['YAWN_THRESHOLD'] == YAWN_THRESHOLD_RANGE[1]
+
+def test_gaps_and_sample_count_delay_completion():
+    calibration = DriverCalibration(duration=10.0, max_gap=2.0)
+    last = calibrate(calibration, 0.3, 0.05, seconds=4.0)
+    # The face is lost for a minute; only max_gap of it counts
+    calibration.update(last + 60.0, 0.3, 0.05)
+    assert calibration.elapsed == pytest.approx(last + 2.0)
+    assert not calibration.calibrated
+
+    # At 1 FPS the duration passes before min_samples frames have been seen
+    slow = DriverCalibration(duration=10.0, min_samples=100)
+    assert calibrate(slow, 0.3, 0.05, fps=1.0) == pytest.approx(99.0)
+
+def test_restart_forgets_the_profile():
+    calibration = DriverCalibration(duration=5.0)
+    calibrate(calibration, 0.3, 0.05)
+    calibration.restart()
+    assert not calibration.calibrated
+    assert calibration.progress() == 0.0
+    assert calibration.ear_open.count == 0
+
+def test_profiles_are_stored_and_reused(tmp_path):
+    path = str(tmp_path / 'profiles.json')
+    calibration = DriverCalibration(duration=5.0, store=ProfileStore(path), key='driver-7')
+    calibrate(calibration, 0.26, 0.08)
+    assert not calibration.loaded
+
+    # A new process skips calibration for a known driver
+    stored = DriverCalibration(duration=5.0, store=ProfileStore(path), key='driver-7')
+    assert stored.calibrated and stored.loaded
+    assert stored.thresholds() == calibration.thresholds()
+    assert stored.describe().startswith('stored')
+    assert not DriverCalibration(store=ProfileStore(path), key='driver-8').calibrated
+
+    store = ProfileStore(path)
+    assert store.keys() == ['driver-7']
+    assert store.remove('driver-7') and not store.remove('driver-7')
+    assert ProfileStore(path).get('driver-7') is None
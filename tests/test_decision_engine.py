@@ -0,0 +1,97 @@
+import math
+import pytest
+from decision_engine import DecisionEngine, SlidingWindow, TimeEMA
+from drowsiness_detector import FaceState
+
+OPEN, CLOSED, REST = 0.30, 0.05, 0.05
+
+def feed(engine, fps, duration, ear, mar=REST, start=0.0):
+    """Feed constant features at fps and return (timestamp, status) pairs"""
+    return [(start + i / fps, engine.update(start + i / fps, ear, mar)) for i in range(int(duration * fps))]
+
+def first_alarm(statuses):
+    return next((t for t, status in statuses if status['drowsiness_level'] > 0), None)
+
+@pytest.mark.parametrize('fps', [10, 30, 60])
+def test_closure_alarms_after_the_same_time_at_any_frame_rate(fps):
+    engine = DecisionEngine(eye_closed_seconds=0.5)
+    feed(engine, fps, 1.0, OPEN)
+    onset = first_alarm(feed(engine, fps, 2.0, CLOSED, start=1.0))
+    assert onset == pytest.approx(1.5, abs=1.0 / fps)
+
+def test_short_closure_is_not_drowsy():
+    engine = DecisionEngine(eye_closed_seconds=0.5)
+    statuses = feed(engine, 30, 0.3, CLOSED) + feed(engine, 30, 1.0, OPEN, start=0.3)
+    assert first_alarm(statuses) is None
+
+def test_yawn_alarms_after_yawn_seconds():
+    engine = DecisionEngine(yawn_seconds=1.0)
+    onset = first_alarm(feed(engine, 30, 2.0, OPEN, mar=0.6))
+    assert onset == pytest.approx(1.0, abs=1.0 / 30)
+
+def test_gap_restarts_the_closure_timer():
+    engine = DecisionEngine(eye_closed_seconds=0.5, max_gap=1.0)
+    feed(engine, 30, 0.4, CLOSED)
+    # The face comes back 3 s later, still with eyes closed: the run starts again
+    status = engine.update(3.4, CLOSED, REST)
+    assert status['eyes_closed_seconds'] == 0.0
+    assert status['drowsiness_level'] == 0
+
+def test_perclos_counts_time_not_frames():
+    engine = DecisionEngine(perclos_window=10.0, max_gap=10.0)
+    # Closed for 2 s at 60 FPS, then open for 6 s at 5 FPS: 25% of the time, ~75% of the frames
+    feed(engine, 60, 2.0, CLOSED)
+    statuses = feed(engine, 5, 6.0, OPEN, start=2.0)
+    assert statuses[-1][1]['perclos'] == pytest.approx(2.0 / 7.8, abs=1e-6)
+
+def test_perclos_threshold_raises_drowsiness():
+    engine = DecisionEngine(eye_closed_seconds=10.0, perclos_window=4.0, perclos_threshold=0.4)
+    # Alternate 1 s closed and 1 s open: never a long closure, but PERCLOS stays near 50%
+    statuses = []
+    for second in range(6):
+        statuses += feed(engine, 30, 1.0, CLOSED if second % 2 == 0 else OPEN, start=float(second))
+    assert first_alarm(statuses) is not None
+    assert all(status['eye_status'] == 'Normal' for _, status in statuses)
+
+def test_copy_has_the_configuration_but_not_the_state():
+    engine = DecisionEngine(ear_threshold=0.2, eye_closed_seconds=0.3, perclos_threshold=0.5)
+    feed(engine, 30, 1.0, CLOSED)
+    other = engine.copy()
+    assert (other.ear_threshold, other.eye_closed_seconds, other.perclos_threshold) == (0.2, 0.3, 0.5)
+    assert other.closed_since is None and other.last_time is None
+
+def test_time_ema_decays_with_elapsed_time():
+    ema = TimeEMA(1.0)
+    ema.update(0.0, 0.0)
+    assert ema.update(1.0, 1.0) == pytest.approx(1.0 - math.exp(-1.0))
+    assert TimeEMA(0.0).update(0.0, 5.0) == 5.0
+
+def test_sliding_window_is_time_weighted():
+    window = SlidingWindow(10.0)
+    # 1.0 held for 3 s, then 0.0 held for 1 s
+    window.update(0.0, 1.0)
+    window.update(3.0, 0.0)
+    window.update(4.0, 0.0)
+    assert window.covered() == pytest.approx(4.0)
+    assert window.mean() == pytest.approx(0.75)
+    assert window.variance() == pytest.approx(0.75 * 0.25)
+
+def test_sliding_window_expires_and_caps_gaps():
+    window = SlidingWindow(2.0)
+    for t in range(6):
+        window.update(float(t), float(t))
+    # Only [3, 5) remains: 3 for one second and 4 for one second
+    assert window.covered() == pytest.approx(2.0)
+    assert window.mean() == pytest.approx(3.5)
+
+    held = SlidingWindow(100.0, max_hold=0.5)
+    held.update(0.0, 1.0)
+    held.update(10.0, 0.0)
+    assert held.covered() == pytest.approx(0.5)
+
+def test_face_state_decides_on_sample_timestamps():
+    # Replayed samples run in microseconds; the decision must follow their timestamps, not the clock
+    state = FaceState(DecisionEngine(eye_closed_seconds=0.5))
+    statuses = [(i / 30, state.get_detection_status(CLOSED, REST, i / 30)) for i in range(30)]
+    assert first_alarm(statuses) == pytest.approx(0.5, abs=1.0 / 30)
+    assert state.alarm_on
@@ -0,0 +1,53 @@
+import dlib
+import numpy as np
+import pytest
+from drowsiness_detector import DrowsinessDetector
+from features import compute_features, shape_to_array, stack_shapes
+from synthetic_fixtures import synthetic_session
+
+@pytest.fixture(scope='module')
+def detector():
+    # Only the scalar formulas are used, so no models are loaded
+    return DrowsinessDetector(enable_audio=False)
+
+def scalar_features(detector, landmarks):
+    ear = (detector.calculate_ear(landmarks[36:42]) + detector.calculate_ear(landmarks[42:48])) / 2.0
+    return ear, detector.calculate_yawn(landmarks[48:68])
+
+def test_batch_matches_scalar_formulas_exactly(detector):
+    # Landmarks are integer pixel positions, as dlib returns them
+    landmarks = synthetic_session(duration=30)['landmarks']
+    expected = np.array([scalar_features(detector, face) for face in landmarks])
+    features = compute_features(landmarks)
+    assert np.array_equal(features['ear'], expected[:, 0])
+    assert np.array_equal(features['mar'], expected[:, 1])
+
+def test_single_face_matches_batch(detector):
+    landmarks = synthetic_session(duration=5)['landmarks']
+    batch = compute_features(landmarks)
+    for i in (0, len(landmarks) // 2, len(landmarks) - 1):
+        single = compute_features(landmarks[i])
+        assert np.ndim(single['ear']) == 0
+        assert single['ear'] == batch['ear'][i]
+        assert single['mar'] == batch['mar'][i]
+        assert (single['ear'], single['mar']) == scalar_features(detector, landmarks[i])
+
+def test_float_landmarks_agree_with_scalar_formulas(detector):
+    landmarks = np.random.default_rng(0).uniform(0, 640, (500, 68, 2))
+    expected = np.array([scalar_features(detector, face) for face in landmarks])
+    features = compute_features(landmarks)
+    np.testing.assert_allclose(features['ear'], expected[:, 0], rtol=1e-12)
+    np.testing.assert_allclose(features['mar'], expected[:, 1], rtol=1e-12)
+
+def test_ear_is_mean_of_both_eyes():
+    features = compute_features(synthetic_session(duration=5)['landmarks'])
+    assert np.array_equal(features['ear'], (features['left_ear'] + features['right_ear']) / 2.0)
+
+def test_shape_conversion():
+    points = [dlib.point(i, 2 * i + 1) for i in range(68)]
+    shape = dlib.full_object_detection(dlib.rectangle(0, 0, 200, 200), points)
+    landmarks = shape_to_array(shape)
+    assert landmarks.shape == (68, 2)
+    assert landmarks[10].tolist() == [10, 21]
+    assert stack_shapes([shape, shape]).shape == (2, 68, 2)
+    assert stack_shapes([]).shape == (0, 68, 2)
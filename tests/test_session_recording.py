@@ -0,0 +1,90 @@
+import dlib
+import numpy as np
+import pytest
+from decision_engine import DecisionEngine
+from drowsiness_detector import FaceState
+from features import compute_features
+from session_recording import (HEADER_SIZE, RECORD_DTYPE, SessionRecorder, load_session, recompute_features,
+                               replay_session, session_records)
+from synthetic_fixtures import synthetic_session
+
+@pytest.fixture(scope='module')
+def session():
+    return synthetic_session(duration=20)
+
+def test_recorded_samples_round_trip(tmp_path, session):
+    path = str(tmp_path / 'session.rec')
+    # A small staging block so the session crosses several flushes and ends with a partial one
+    recorder = SessionRecorder(path, flush_every=64)
+    for i, (timestamp, landmarks, ear, mar) in enumerate(zip(session['timestamps'], session['landmarks'],
+                                                             session['ear'], session['mar'])):
+        left, top = landmarks.min(axis=0).tolist()
+        right, bottom = landmarks.max(axis=0).tolist()
+        recorder.record(timestamp, dlib.rectangle(left, top, right, bottom), landmarks, ear, mar, track_id=i % 2)
+    recorder.close()
+
+    records = load_session(path)
+    count = len(session['timestamps'])
+    assert len(records) == recorder.count == count
+    assert (tmp_path / 'session.rec').stat().st_size == HEADER_SIZE + count * RECORD_DTYPE.itemsize
+    assert np.array_equal(records['timestamp'], session['timestamps'])
+    assert np.array_equal(records['landmarks'], session['landmarks'])
+    assert np.array_equal(records['ear'], session['ear'].astype(np.float32))
+    assert np.array_equal(records['mar'], session['mar'].astype(np.float32))
+    assert np.array_equal(records['track_id'], np.arange(count) % 2)
+    assert np.array_equal(records, session_records(session['timestamps'], session['landmarks'], session['ear'],
+                                                   session['mar'], np.arange(count) % 2))
+
+def test_reopened_recording_is_appended_to(tmp_path, session):
+    path = str(tmp_path / 'session.rec')
+    records = session_records(session['timestamps'], session['landmarks'], session['ear'], session['mar'])
+    half = len(records) // 2
+    for part in (records[:half], records[half:]):
+        recorder = SessionRecorder(path)
+        recorder.extend(part)
+        recorder.close()
+    assert np.array_equal(load_session(path), records)
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'not a recording' * 10)
+    with pytest.raises(ValueError):
+        load_session(str(path))
+    with pytest.raises(ValueError):
+        SessionRecorder(str(path))
+
+def test_empty_recording_loads(tmp_path):
+    path = str(tmp_path / 'empty.rec')
+    SessionRecorder(path).close()
+    assert len(load_session(path)) == 0
+
+def test_recomputed_features_match_stored(session):
+    # Live recordings store the features computed from the recorded landmarks
+    features = compute_features(session['landmarks'])
+    records = session_records(session['timestamps'], session['landmarks'], features['ear'], features['mar'])
+    ear, mar = recompute_features(records)
+    assert np.array_equal(ear.astype(np.float32), records['ear'])
+    assert np.array_equal(mar.astype(np.float32), records['mar'])
+
+def test_replay_matches_the_live_decisions(tmp_path, session):
+    # Decisions on the recording must equal those made on the original stream, per track
+    path = str(tmp_path / 'session.rec')
+    tracks = np.arange(len(session['timestamps'])) % 2
+    recorder = SessionRecorder(path)
+    recorder.extend(session_records(session['timestamps'], session['landmarks'], session['ear'], session['mar'],
+                                    tracks))
+    recorder.close()
+    records = load_session(path)
+
+    for track in (0, 1):
+        live = FaceState(DecisionEngine())
+        selected = tracks == track
+        expected = [live.get_detection_status(float(ear), float(mar), float(t))['drowsiness_level']
+                    for t, ear, mar in zip(session['timestamps'][selected],
+                                           session['ear'][selected].astype(np.float32),
+                                           session['mar'][selected].astype(np.float32))]
+        replayed = FaceState(DecisionEngine())
+        levels = replay_session(records, lambda t, ear, mar: replayed.get_detection_status(ear, mar, t),
+                                track_id=track)
+        assert levels.tolist() == expected
+        assert any(expected)
@@ -0,0 +1,85 @@
+import csv
+import numpy as np
+import pytest
+from drowsiness_detector import FaceState
+from session_recording import replay_session, session_records
+from synthetic_fixtures import synthetic_session
+from threshold_sweep import (eye_run_lengths, label_episodes, roc_curve, score_levels, sweep_thresholds,
+                             write_results, yawn_counters)
+
+METRICS = ['precision', 'recall', 'false_positive_rate', 'episodes_detected', 'false_alarms', 'latency_to_alarm_s']
+
+@pytest.fixture(scope='module')
+def session():
+    return synthetic_session(duration=60, seed=3)
+
+@pytest.fixture(scope='module')
+def sweep(session):
+    return sweep_thresholds(session['ear'], session['mar'], session['labels'], session['timestamps'],
+                            [0.10, 0.15, 0.20], [0.30, 0.45], [1, 3, 10, 25])
+
+def replay_levels(session, ear_threshold, yawn_threshold, consecutive_frames):
+    state = FaceState()
+    state.EAR_THRESHOLD = ear_threshold
+    state.YAWN_THRESHOLD = yawn_threshold
+    state.CONSECUTIVE_FRAMES = consecutive_frames
+    records = session_records(session['timestamps'], session['landmarks'], session['ear'], session['mar'])
+    return replay_session(records, lambda t, ear, mar: state.get_detection_status(ear, mar, t)) > 0
+
+def test_counters_match_get_detection_status(session):
+    # Stored features are float32, as in a recording
+    ear = session['ear'].astype(np.float32).astype(np.float64)
+    mar = session['mar'].astype(np.float32).astype(np.float64)
+    state = FaceState()
+    eye, yawn = [], []
+    for e, m in zip(ear.tolist(), mar.tolist()):
+        state.get_detection_status(e, m)
+        eye.append(state.eye_counter)
+        yawn.append(state.yawn_counter)
+    assert eye_run_lengths(ear, [state.EAR_THRESHOLD])[0].tolist() == eye
+    assert yawn_counters(mar, [state.YAWN_THRESHOLD])[0].tolist() == yawn
+
+def test_sweep_matches_replay_for_every_config(session, sweep):
+    # The sweep runs on the float32 features a replay reads back from a recording
+    swept = sweep_thresholds(session['ear'].astype(np.float32), session['mar'].astype(np.float32),
+                             session['labels'], session['timestamps'],
+                             np.unique(sweep['ear_threshold']), np.unique(sweep['yawn_threshold']),
+                             np.unique(sweep['consecutive_frames']))
+    # The grid spans configs that miss, catch and over-trigger on the episodes
+    assert swept['recall'].min() < swept['recall'].max() and swept['false_alarms'].max() > 0
+    starts, ends = label_episodes(session['labels'])
+    for i in range(len(swept['recall'])):
+        levels = replay_levels(session, swept['ear_threshold'][i], swept['yawn_threshold'][i],
+                               int(swept['consecutive_frames'][i]))
+        replayed = score_levels(levels[None, :], session['labels'], session['timestamps'], starts, ends)
+        for metric in METRICS:
+            assert np.array_equal(replayed[metric][0], swept[metric][i], equal_nan=True), (metric, i)
+
+def test_grid_layout(sweep):
+    assert len(sweep['recall']) == 3 * 2 * 4
+    # C order: consecutive frames vary fastest, the EAR threshold slowest
+    assert sweep['consecutive_frames'][:4].tolist() == [1, 3, 10, 25]
+    assert sweep['ear_threshold'][:8].tolist() == [0.10] * 8
+    assert sweep['episodes'] == len(label_episodes(synthetic_session(duration=60, seed=3)['labels'])[0])
+
+def test_label_episodes():
+    starts, ends = label_episodes(np.array([1, 1, 0, 0, 1, 0, 1, 1, 1], dtype=bool))
+    assert starts.tolist() == [0, 4, 6]
+    assert ends.tolist() == [1, 4, 8]
+
+def test_roc_curve_is_a_frontier(sweep):
+    frontier = roc_curve(sweep)
+    assert np.all(np.diff(sweep['false_alarms'][frontier]) >= 0)
+    assert np.all(np.diff(sweep['recall'][frontier]) > 0)
+    # No config beats a frontier point on both axes
+    for i in frontier:
+        better = (sweep['false_alarms'] <= sweep['false_alarms'][i]) & (sweep['recall'] > sweep['recall'][i])
+        assert not better.any()
+
+def test_results_csv(tmp_path, sweep):
+    path = tmp_path / 'sweep.csv'
+    write_results(str(path), sweep)
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == len(sweep['recall'])
+    assert float(rows[5]['recall']) == sweep['recall'][5]
@@ -0,0 +1,184 @@
+import argparse
+import csv
+import numpy as np
+
+# Bound on the (configs x frames) working arrays, so long sessions are swept in blocks of configs
+MAX_BLOCK_ELEMENTS = 1 << 24
+
+def eye_run_lengths(ear, thresholds):
+    """eye_counter of get_detection_status for every EAR threshold: (T, N) consecutive closed frames"""
+    closed = ear[None, :] < np.asarray(thresholds, dtype=np.float64)[:, None]
+    index = np.arange(len(ear), dtype=np.int32)
+    last_open = np.maximum.accumulate(np.where(closed, -1, index), axis=1)
+    return index - last_open
+
+def yawn_counters(mar, thresholds):
+    """yawn_counter of get_detection_status for every yawn threshold: (T, N)
+
+    The counter steps +1 while yawning and -1 otherwise, floored at zero, which is the
+    prefix sum of the steps minus its running minimum (clipped at zero).
+    """
+    steps = np.where(mar[None, :] > np.asarray(thresholds, dtype=np.float64)[:, None], 1, -1).astype(np.int32)
+    walk = np.cumsum(steps, axis=1, dtype=np.int32)
+    return walk - np.minimum(np.minimum.accumulate(walk, axis=1), 0)
+
+def label_episodes(labels):
+    """Start and end (inclusive) indices of each run of True labels"""
+    edges = np.diff(np.concatenate(([0], labels.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+
+def score_levels(levels, labels, timestamps, starts, ends):
+    """Frame- and episode-level metrics for a (K, N) block of drowsiness levels"""
+    count = levels.shape[1]
+    positives = labels.sum()
+    negatives = count - positives
+
+    true_positive = (levels & labels).sum(axis=1)
+    predicted = levels.sum(axis=1)
+    onsets = levels & ~np.concatenate((np.zeros((len(levels), 1), dtype=bool), levels[:, :-1]), axis=1)
+    false_alarms = (onsets & ~labels).sum(axis=1)
+
+    # Index of the next alarm frame at or after every frame, to find each episode's first alarm
+    index = np.arange(count, dtype=np.int32)
+    next_alarm = np.minimum.accumulate(np.where(levels, index, np.int32(count))[:, ::-1], axis=1)[:, ::-1]
+    first = next_alarm[:, starts]
+    detected = first <= ends
+    latency = np.where(detected, timestamps[np.minimum(first, count - 1)] - timestamps[starts], np.nan)
+    detected_count = detected.sum(axis=1)
+    latency_sum = np.where(detected, latency, 0.0).sum(axis=1)
+
+    return {
+        'precision': np.divide(true_positive, predicted, out=np.ones(len(levels)), where=predicted > 0),
+        'recall': true_positive / positives if positives else np.zeros(len(levels)),
+        'false_positive_rate': (predicted - true_positive) / negatives if negatives else np.zeros(len(levels)),
+        'episodes_detected': detected_count,
+        'false_alarms': false_alarms,
+        'latency_to_alarm_s': np.divide(latency_sum, detected_count, out=np.full(len(levels), np.nan),
+                                        where=detected_count > 0),
+    }
+
+def sweep_thresholds(ear, mar, labels, timestamps, ear_thresholds, yawn_thresholds, consecutive_frames):
+    """Evaluate the frame-counting state machine for every threshold combination at once
+
+    Returns a dict of flat arrays, one entry per (EAR threshold, yawn threshold, consecutive
+    frames) combination in C order, holding the configuration and its metrics.
+    """
+    ear = np.asarray(ear, dtype=np.float64)
+    mar = np.asarray(mar, dtype=np.float64)
+    labels = np.asarray(labels, dtype=bool)
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    ear_thresholds = np.asarray(ear_thresholds, dtype=np.float64)
+    yawn_thresholds = np.asarray(yawn_thresholds, dtype=np.float64)
+    consecutive_frames = np.asarray(consecutive_frames, dtype=np.int32)
+
+    # Counters depend on one threshold each, so they are computed once per threshold value;
+    # a config alarms wherever the larger of its two counters reaches CONSECUTIVE_FRAMES
+    eye_runs = eye_run_lengths(ear, ear_thresholds)
+    yawn_runs = yawn_counters(mar, yawn_thresholds)
+    starts, ends = label_episodes(labels)
+
+    pairs = [(a, b) for a in range(len(ear_thresholds)) for b in range(len(yawn_thresholds))]
+    block = max(1, MAX_BLOCK_ELEMENTS // max(1, len(ear) * len(consecutive_frames)))
+    blocks = []
+    for offset in range(0, len(pairs), block):
+        ai, bi = np.array(pairs[offset:offset + block]).T
+        counters = np.maximum(eye_runs[ai], yawn_runs[bi])
+        levels = counters[:, None, :] >= consecutive_frames[None, :, None]
+        blocks.append(score_levels(levels.reshape(-1, len(ear)), labels, timestamps, starts, ends))
+
+    results = {key: np.concatenate([metrics[key] for metrics in blocks]) for key in blocks[0]}
+    grid = np.meshgrid(ear_thresholds, yawn_thresholds, consecutive_frames, indexing='ij')
+    results['ear_threshold'] = grid[0].ravel()
+    results['yawn_threshold'] = grid[1].ravel()
+    results['consecutive_frames'] = grid[2].ravel()
+    results['episodes'] = len(starts)
+    results['hours'] = (timestamps[-1] - timestamps[0]) / 3600.0 if len(timestamps) > 1 else 0.0
+    return results
+
+def roc_curve(results, x='false_alarms', y='recall'):
+    """Indices of the configs on the upper-left frontier of y against x, sorted by x"""
+    order = np.lexsort((-results[y], results[x]))
+    frontier, best = [], -np.inf
+    for i in order:
+        if results[y][i] > best:
+            frontier.append(i)
+            best = results[y][i]
+    return np.array(frontier, dtype=np.int64)
+
+def write_results(path, results):
+    """Write one CSV row per configuration"""
+    columns = ['ear_threshold', 'yawn_threshold', 'consecutive_frames', 'precision', 'recall',
+               'false_positive_rate', 'episodes_detected', 'false_alarms', 'latency_to_alarm_s']
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for row in zip(*(results[column].tolist() for column in columns)):
+            writer.writerow(row)
+
+def load_episode_labels(path, timestamps):
+    """Per-sample labels from a CSV of 'start,end' episode times in seconds from the session start"""
+    labels = np.zeros(len(timestamps), dtype=bool)
+    elapsed = timestamps - timestamps[0]
+    with open(path, newline='') as f:
+        for row in csv.reader(f):
+            try:
+                start, end = float(row[0]), float(row[1])
+            except (ValueError, IndexError):
+                continue  # header or blank line
+            labels[(elapsed >= start) & (elapsed <= end)] = True
+    return labels
+
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser(description="Sweep detection thresholds over a labelled session")
+    parser.add_argument("--recording", default=None, help="session recording to sweep (default: synthetic session)")
+    parser.add_argument("--episodes", default=None, help="CSV of drowsy 'start,end' seconds for the recording")
+    parser.add_argument("--track", type=int, default=None, help="track to evaluate (default: the most frequent)")
+    parser.add_argument("--duration", type=float, default=3600.0, help="synthetic session length in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ear-thresholds", type=float, nargs=3, default=[0.10, 0.25, 0.01],
+                        metavar=('START', 'STOP', 'STEP'))
+    parser.add_argument("--yawn-thresholds", type=float, nargs=3, default=[0.25, 0.60, 0.025],
+                        metavar=('START', 'STOP', 'STEP'))
+    parser.add_argument("--consecutive-frames", type=int, nargs="+", default=list(range(1, 31)))
+    parser.add_argument("--output", default=None, help="write every configuration's metrics to this CSV")
+    args = parser.parse_args()
+
+    if args.recording:
+        from session_recording import load_session
+        records = load_session(args.recording)
+        tracks, counts = np.unique(records['track_id'], return_counts=True)
+        track = args.track if args.track is not None else tracks[np.argmax(counts)]
+        records = records[records['track_id'] == track]
+        timestamps = records['timestamp'].astype(np.float64)
+        ear, mar = records['ear'], records['mar']
+        if not args.episodes:
+            parser.error("--episodes is required with --recording")
+        labels = load_episode_labels(args.episodes, timestamps)
+    else:
+        from synthetic_fixtures import synthetic_session
+        session = synthetic_session(duration=args.duration, seed=args.seed)
+        timestamps, ear, mar, labels = session['timestamps'], session['ear'], session['mar'], session['labels']
+
+    ear_thresholds = np.arange(*args.ear_thresholds)
+    yawn_thresholds = np.arange(*args.yawn_thresholds)
+    start = time.perf_counter()
+    results = sweep_thresholds(ear, mar, labels, timestamps, ear_thresholds, yawn_thresholds,
+                               args.consecutive_frames)
+    elapsed = time.perf_counter() - start
+    configs = len(results['recall'])
+    print(f"{configs} configs x {len(ear)} samples ({results['hours']:.2f} h, {results['episodes']} episodes) "
+          f"in {elapsed:.2f} s")
+
+    per_hour = max(results['hours'], 1e-9)
+    print(f"{'EAR':>6s} {'yawn':>6s} {'frames':>6s} {'precision':>9s} {'recall':>6s} {'episodes':>8s} "
+          f"{'false/h':>7s} {'latency':>7s}")
+    for i in roc_curve(results):
+        print(f"{results['ear_threshold'][i]:6.3f} {results['yawn_threshold'][i]:6.3f} "
+              f"{results['consecutive_frames'][i]:6d} {results['precision'][i]:9.3f} {results['recall'][i]:6.3f} "
+              f"{results['episodes_detected'][i]:4d}/{results['episodes']:<3d} "
+              f"{results['false_alarms'][i] / per_hour:7.1f} {results['latency_to_alarm_s'][i]:6.2f}s")
+    if args.output:
+        write_results(args.output, results)
+        print(f"Results written to {args.output}")